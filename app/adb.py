@@ -0,0 +1,114 @@
+"""
+async DB API.
+
+app.db의 동기 sqlite3 함수들을 전용 executor에서 돌려서
+async def 엔드포인트가 FastAPI 기본 threadpool을 점유하지 않게 한다.
+- 쓰기: 스레드 1개(단일 writer) -> SQLite 쓰기 락 경합 없음
+- 읽기: DB_READ_WORKERS개 스레드 (각자 app.db.get_conn()의 스레드별 WAL 연결 사용)
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app import db
+
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "4"))
+
+_lock = threading.Lock()
+_writer: Optional[ThreadPoolExecutor] = None
+_readers: Optional[ThreadPoolExecutor] = None
+
+
+def _executors():
+    global _writer, _readers
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        if _readers is None:
+            _readers = ThreadPoolExecutor(max_workers=max(1, DB_READ_WORKERS), thread_name_prefix="db-reader")
+        return _writer, _readers
+
+
+def shutdown() -> None:
+    """실행 중인 작업을 마치고 executor를 닫는다(lifespan 종료 시)."""
+    global _writer, _readers
+    with _lock:
+        ws, _writer, _readers = [_writer, _readers], None, None
+    for ex in ws:
+        if ex is not None:
+            ex.shutdown(wait=True)
+
+
+async def run_read(fn: Callable, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_executors()[1], partial(fn, *args, **kwargs))
+
+
+async def run_write(fn: Callable, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_executors()[0], partial(fn, *args, **kwargs))
+
+
+def stats() -> Dict[str, Any]:
+    w, r = _writer, _readers
+    return {
+        "read_workers": DB_READ_WORKERS,
+        "write_queue": w._work_queue.qsize() if w else 0,
+        "read_queue": r._work_queue.qsize() if r else 0,
+    }
+
+
+# --- logs ---
+async def insert_log(user_id: str, state: str, message: str, reply: str, slots_json: Optional[str] = None) -> None:
+    await run_write(db.insert_log, user_id, state, message, reply, slots_json)
+
+
+async def insert_logs(rows: List[tuple]) -> int:
+    return await run_write(db.insert_logs, rows)
+
+
+async def fetch_logs(user_id: str, limit: int = 20, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await run_read(db.fetch_logs, user_id, limit, before_id)
+
+
+async def fetch_logs_page(user_id: str, limit: int = 20, before_id: Optional[int] = None) -> Dict[str, Any]:
+    return await run_read(db.fetch_logs_page, user_id, limit, before_id)
+
+
+async def iter_logs(user_id: str, before_id: Optional[int] = None, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+    """db.iter_logs를 batch_size씩 읽기 스레드에서 당겨오는 async 버전."""
+    it = db.iter_logs(user_id, before_id=before_id, batch_size=batch_size)
+    while True:
+        chunk = await run_read(lambda: list(islice(it, batch_size)))
+        for row in chunk:
+            yield row
+        if len(chunk) < batch_size:
+            return
+
+
+async def fetch_latest_launch_brief(user_id: str) -> Optional[str]:
+    return await run_read(db.fetch_latest_launch_brief, user_id)
+
+
+async def search_logs(q: str, user_id: Optional[str] = None, limit: int = 20,
+                      brief_only: bool = False, raw: bool = False) -> List[Dict[str, Any]]:
+    return await run_read(db.search_logs, q, user_id=user_id, limit=limit, brief_only=brief_only, raw=raw)
+
+
+# --- signals ---
+async def insert_signal(user_id: str, kind: str, payload_json: str, ts: Optional[str] = None) -> None:
+    await run_write(db.insert_signal, user_id, kind, payload_json, ts)
+
+
+async def query_signals(user_id: str, **kwargs) -> Dict[str, Any]:
+    return await run_read(db.query_signals, user_id, **kwargs)
+
+
+async def query_signal_rollups(user_id: str, **kwargs) -> List[Dict[str, Any]]:
+    return await run_read(db.query_signal_rollups, user_id, **kwargs)
+
+
+async def fetch_signals(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+    return await run_read(db.fetch_signals, user_id, limit)
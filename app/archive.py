@@ -0,0 +1,325 @@
+"""
+오래된 chat 로그 아카이브.
+
+logs 테이블에서 cutoff보다 오래된 행을 날짜별 append-only gzip 세그먼트로 옮기고
+hot DB(data/app.db)에서는 지운다.
+
+    data/archive/
+      manifest.json                 {"watermark": 아카이브된 최대 logs.id(통계용), "pending": 세그먼트에 썼지만 아직 안 지운 id}
+      logs-2025-01-31.ndjson.gz     행당 JSON 한 줄 (gzip member를 실행마다 이어 붙임)
+      logs-2025-01-31.idx.json      {"rows", "min_id", "max_id", "users": {user_id: {...}}}
+
+읽기는 db.fetch_logs / db.iter_logs가 hot DB 다음에 자동으로 이어서 읽는다.
+검색(db.search_logs): 아카이브로 옮긴 행은 logs_fts에서도 빠지므로, hot DB 결과로 limit을 못 채우면
+search_archived_logs가 세그먼트를 최신순으로 훑어 채운다(FTS 색인 없이 단어별 부분 문자열 매칭).
+아카이브 실행은 프로세스 안(스레드)과 프로세스 사이(CLI vs 서버) 모두 한 번에 하나만 돈다(archive.lock).
+
+    python -m app.archive --older-than-days 90
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("data", "archive"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "5000"))
+
+_SEGMENT_PREFIX = "logs-"
+_SEGMENT_SUFFIX = ".ndjson.gz"
+_INDEX_SUFFIX = ".idx.json"
+_MANIFEST = "manifest.json"
+_LOCK = "archive.lock"
+
+# 세그먼트 인덱스 캐시: manifest mtime이 바뀔 때만 다시 읽는다
+_cache_lock = threading.Lock()
+_cache: Dict[str, Any] = {"key": None, "segments": []}
+# archive_logs 실행 직렬화(프로세스 안)
+_run_lock = threading.Lock()
+
+
+def _path(name: str) -> str:
+    return os.path.join(ARCHIVE_DIR, name)
+
+
+def _segment_path(day: str) -> str:
+    return _path(f"{_SEGMENT_PREFIX}{day}{_SEGMENT_SUFFIX}")
+
+
+def _index_path(day: str) -> str:
+    return _path(f"{_SEGMENT_PREFIX}{day}{_INDEX_SUFFIX}")
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _write_json_atomic(path: str, data) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _load_segments() -> List[Dict[str, Any]]:
+    """[{"day", "index"}] 최신 날짜 먼저. 아카이브가 없으면 빈 리스트."""
+    try:
+        key = os.stat(_path(_MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    with _cache_lock:
+        if _cache["key"] == key:
+            return _cache["segments"]
+    segments = []
+    for name in os.listdir(ARCHIVE_DIR):
+        if name.startswith(_SEGMENT_PREFIX) and name.endswith(_INDEX_SUFFIX):
+            day = name[len(_SEGMENT_PREFIX):-len(_INDEX_SUFFIX)]
+            segments.append({"day": day, "index": _read_json(_path(name), {})})
+    segments.sort(key=lambda s: s["day"], reverse=True)
+    with _cache_lock:
+        _cache["key"] = key
+        _cache["segments"] = segments
+    return segments
+
+
+def iter_archived_logs(user_id: str, before_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    아카이브된 로그를 fetch_logs와 같은 모양(id, ts, state, message, reply, slots_json)으로
+    최신순으로 흘려준다. 인덱스로 해당 사용자가 없는 세그먼트는 열지 않는다.
+    """
+    segs = []
+    for seg in _load_segments():
+        u = (seg["index"].get("users") or {}).get(user_id)
+        if not u:
+            continue
+        if before_id is not None and u["min_id"] >= before_id:
+            continue
+        segs.append((u["max_id"], seg))
+    # 날짜가 아니라 id 범위 순으로 (ts와 id 순서가 어긋난 행이 있어도 최대한 최신순)
+    segs.sort(key=lambda x: x[0], reverse=True)
+
+    for _, seg in segs:
+        # id 기준 dict: 아카이브 도중 죽어서 같은 행이 두 번 붙었어도 한 번만
+        rows: Dict[int, Dict[str, Any]] = {}
+        with gzip.open(_segment_path(seg["day"]), "rt", encoding="utf-8") as f:
+            for line in f:
+                d = json.loads(line)
+                if d.get("user_id") != user_id:
+                    continue
+                if before_id is not None and d["id"] >= before_id:
+                    continue
+                d.pop("user_id", None)
+                rows[d["id"]] = d
+        for id_ in sorted(rows, reverse=True):
+            yield rows[id_]
+
+
+def has_archived(user_id: str) -> bool:
+    return any(user_id in (s["index"].get("users") or {}) for s in _load_segments())
+
+
+def _snippet(text: str, terms: List[str], width: int) -> str:
+    low = text.lower()
+    hits = [(low.find(t), t) for t in terms if t in low]
+    if not hits:
+        return text[:width * 4] + ("…" if len(text) > width * 4 else "")
+    pos, term = min(hits)
+    start = max(0, pos - width * 2)
+    end = min(len(text), pos + len(term) + width * 2)
+    return ("…" if start else "") + text[start:pos] + "«" + text[pos:pos + len(term)] + "»" + \
+        text[pos + len(term):end] + ("…" if end < len(text) else "")
+
+
+def search_archived_logs(
+    terms: List[str], user_id: Optional[str] = None, limit: int = 20, brief_only: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    아카이브 세그먼트 검색. message/reply에 terms가 모두(대소문자 무시 부분 문자열) 들어간 행을
+    search_logs와 같은 모양으로 최신순 limit개. bm25 점수가 없어서 score는 None.
+    """
+    terms = [t.lower() for t in terms if t]
+    if not terms or limit <= 0:
+        return []
+    out: List[Dict[str, Any]] = []
+    seen = set()
+    for seg in _load_segments():
+        if user_id and user_id not in (seg["index"].get("users") or {}):
+            continue
+        hits = []
+        with gzip.open(_segment_path(seg["day"]), "rt", encoding="utf-8") as f:
+            for line in f:
+                d = json.loads(line)
+                if d["id"] in seen or (user_id and d.get("user_id") != user_id):
+                    continue
+                message, reply = d.get("message") or "", d.get("reply") or ""
+                if brief_only and not reply.startswith("[Launch Brief]"):
+                    continue
+                text = (message + "\n" + reply).lower()
+                if all(t in text for t in terms):
+                    seen.add(d["id"])
+                    hits.append({
+                        "id": d["id"], "ts": d.get("ts"), "user_id": d.get("user_id"), "state": d.get("state"),
+                        "message_snippet": _snippet(message, terms, 12),
+                        "reply_snippet": _snippet(reply, terms, 24),
+                        "score": None, "archived": True,
+                    })
+        hits.sort(key=lambda r: r["id"], reverse=True)
+        out.extend(hits[:limit - len(out)])
+        if len(out) >= limit:
+            break
+    return out
+
+
+@contextmanager
+def _archive_lock():
+    """archive_logs 동시 실행 방지: 스레드끼리는 _run_lock, 프로세스끼리는 lock 파일."""
+    with _run_lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        with open(_path(_LOCK), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _append_segment(day: str, rows: List[Dict[str, Any]]) -> None:
+    with open(_segment_path(day), "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+            for r in rows:
+                gz.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    idx = _read_json(_index_path(day), {"day": day, "rows": 0, "min_id": None, "max_id": None, "users": {}})
+    for r in rows:
+        idx["rows"] += 1
+        idx["min_id"] = r["id"] if idx["min_id"] is None else min(idx["min_id"], r["id"])
+        idx["max_id"] = r["id"] if idx["max_id"] is None else max(idx["max_id"], r["id"])
+        u = idx["users"].setdefault(r["user_id"], {"rows": 0, "min_id": r["id"], "max_id": r["id"]})
+        u["rows"] += 1
+        u["min_id"] = min(u["min_id"], r["id"])
+        u["max_id"] = max(u["max_id"], r["id"])
+    _write_json_atomic(_index_path(day), idx)
+
+
+def archive_logs(older_than_days: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    ts가 cutoff보다 오래된 logs 행을 세그먼트로 옮기고 hot DB에서 지운다.
+    세그먼트 fsync -> manifest에 이번 배치 id(pending) 기록 -> 그 id들만 DELETE -> pending 비우기 순서라서,
+    중간에 죽어도 다시 돌리면 pending에 있는 행은 다시 쓰지 않고 지우기만 한다.
+    ts는 id 순서와 어긋날 수 있으므로(replay/ingest, 시계 오차, backfill) id 범위가 아니라
+    세그먼트에 실제로 쓴 id만 지운다.
+    다른 실행이 돌고 있으면 끝날 때까지 기다렸다가 manifest를 다시 읽고 시작한다.
+    """
+    with _archive_lock():
+        return _archive_logs(older_than_days, batch_size)
+
+
+def _archive_logs(older_than_days: Optional[int], batch_size: Optional[int]) -> Dict[str, Any]:
+    from app.db import get_conn
+
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else int(older_than_days)
+    batch_size = batch_size or ARCHIVE_BATCH
+    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    manifest = _read_json(_path(_MANIFEST), {"watermark": 0})
+    manifest.setdefault("pending", [])
+    conn = get_conn()
+    archived = 0
+    deleted = 0
+    while True:
+        rows = [dict(r) for r in conn.execute(
+            """
+            SELECT id, ts, user_id, state, message, reply, slots_json
+            FROM logs
+            WHERE ts < ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (cutoff, batch_size),
+        ).fetchall()]
+        if not rows:
+            break
+
+        written = set(manifest["pending"])
+        fresh = [r for r in rows if r["id"] not in written]
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for r in fresh:
+            by_day.setdefault((r["ts"] or "")[:10] or "unknown", []).append(r)
+        for day, day_rows in by_day.items():
+            _append_segment(day, day_rows)
+        archived += len(fresh)
+
+        ids = [r["id"] for r in rows]
+        manifest["watermark"] = max(manifest["watermark"], ids[-1])
+        manifest["pending"] = ids
+        _write_json_atomic(_path(_MANIFEST), manifest)
+
+        with conn:
+            deleted += conn.execute(
+                "DELETE FROM logs WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+            ).rowcount
+        manifest["pending"] = []
+        _write_json_atomic(_path(_MANIFEST), manifest)
+
+    if deleted:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return {"cutoff": cutoff, "archived": archived, "deleted": deleted, "watermark": manifest["watermark"]}
+
+
+def archive_stats() -> Dict[str, Any]:
+    segments = _load_segments()
+    size = 0
+    for s in segments:
+        try:
+            size += os.path.getsize(_segment_path(s["day"]))
+        except OSError:
+            pass
+    return {
+        "dir": ARCHIVE_DIR,
+        "segments": len(segments),
+        "rows": sum(s["index"].get("rows", 0) for s in segments),
+        "bytes": size,
+        "oldest": segments[-1]["day"] if segments else None,
+        "newest": segments[0]["day"] if segments else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Move old chat logs into compressed archive segments")
+    ap.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    ap.add_argument("--batch", type=int, default=ARCHIVE_BATCH)
+    args = ap.parse_args()
+    from app.db import init_db
+    init_db()
+    print(json.dumps(archive_logs(args.older_than_days, args.batch), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
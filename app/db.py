@@ -1,22 +1,151 @@
 ﻿import os
 import json
 import sqlite3
-from typing import Any, Dict, List, Optional
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class DBConfig:
+    """
+    SQLite 연결 설정. 모든 값은 환경변수로 덮어쓸 수 있다.
+    - DB_JOURNAL_MODE: WAL이면 읽기와 쓰기가 서로 막지 않는다.
+    - DB_SYNCHRONOUS: WAL + NORMAL이면 커밋마다 fsync하지 않는다(체크포인트 때만).
+    - DB_MMAP_SIZE / DB_CACHE_SIZE: 읽기 경로의 페이지 캐시 크기.
+    - DB_STATEMENT_CACHE: 연결별 prepared statement 캐시 개수.
+    """
+    path: str = os.path.join("data", "app.db")
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kb: int = 64 * 1024
+    busy_timeout_ms: int = 5000
+    statement_cache: int = 256
+
+    @classmethod
+    def from_env(cls) -> "DBConfig":
+        d = cls()
+        return cls(
+            path=os.getenv("DB_PATH", d.path),
+            journal_mode=os.getenv("DB_JOURNAL_MODE", d.journal_mode).upper(),
+            synchronous=os.getenv("DB_SYNCHRONOUS", d.synchronous).upper(),
+            mmap_size=int(os.getenv("DB_MMAP_SIZE", d.mmap_size)),
+            cache_size_kb=int(os.getenv("DB_CACHE_SIZE_KB", d.cache_size_kb)),
+            busy_timeout_ms=int(os.getenv("DB_BUSY_TIMEOUT_MS", d.busy_timeout_ms)),
+            statement_cache=int(os.getenv("DB_STATEMENT_CACHE", d.statement_cache)),
+        )
+
+
+_local = threading.local()
+_all_conns: List[sqlite3.Connection] = []
+_all_conns_lock = threading.Lock()
+# close_all_conns() 이후 다른 스레드가 닫힌 연결을 다시 쓰지 않도록 세대 번호로 구분
+_generation = 0
+
+
+def open_conn(cfg: Optional[DBConfig] = None) -> sqlite3.Connection:
+    """
+    설정대로 새 연결을 연다(PRAGMA 적용 포함).
+    보통은 get_conn()으로 스레드별 캐시된 연결을 쓰고, 이건 벤치/도구용.
+    """
+    cfg = cfg or DBConfig.from_env()
+    db_dir = os.path.dirname(cfg.path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(
+        cfg.path,
+        check_same_thread=False,
+        timeout=cfg.busy_timeout_ms / 1000.0,
+        cached_statements=cfg.statement_cache,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA journal_mode={cfg.journal_mode}")
+    conn.execute(f"PRAGMA synchronous={cfg.synchronous}")
+    conn.execute(f"PRAGMA mmap_size={int(cfg.mmap_size)}")
+    conn.execute(f"PRAGMA cache_size={-int(cfg.cache_size_kb)}")
+    conn.execute(f"PRAGMA busy_timeout={int(cfg.busy_timeout_ms)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class _ThreadConns:
+    """
+    스레드별 연결 묶음. threading.local에만 참조가 있으므로 스레드가 끝나면 같이 사라지고,
+    그때 finalizer가 연결을 닫고 _all_conns에서 뺀다(anyio 워커처럼 생겼다 사라지는 스레드용).
+    """
+    __slots__ = ("conns", "generation", "__weakref__")
+
+    def __init__(self, generation: int):
+        self.conns: Dict[str, sqlite3.Connection] = {}
+        self.generation = generation
+        weakref.finalize(self, _release_conns, self.conns)
+
+
+def _release_conns(conns: Dict[str, sqlite3.Connection]) -> None:
+    with _all_conns_lock:
+        for conn in conns.values():
+            try:
+                _all_conns.remove(conn)
+            except ValueError:
+                pass
+    for conn in conns.values():
+        try:
+            conn.close()
+        except Exception:
+            pass
+    conns.clear()
 
 
 def get_conn() -> sqlite3.Connection:
     """
     Render/로컬 모두에서 동작하도록 상대경로 SQLite 사용.
     row_factory를 Row로 두고, fetch 시 dict로 변환해서 반환한다.
-    """
-    db_path = os.getenv("DB_PATH", os.path.join("data", "app.db"))
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+    스레드마다 DB 파일별로 연결을 한 번만 열어서 재사용한다.
+    (호출한 쪽에서 close하지 않는다. 스레드가 끝나면 자동으로, 종료 시 close_all_conns())
+    """
+    path = os.getenv("DB_PATH", DBConfig.path)
+    holder = getattr(_local, "holder", None)
+    if holder is None or holder.generation != _generation:
+        holder = _local.holder = _ThreadConns(_generation)
+    conn = holder.conns.get(path)
+    if conn is None:
+        conn = open_conn(DBConfig.from_env())
+        holder.conns[path] = conn
+        with _all_conns_lock:
+            _all_conns.append(conn)
     return conn
 
 
+def close_all_conns() -> None:
+    """모든 스레드의 캐시된 연결을 닫는다(shutdown/테스트용)."""
+    global _generation
+    with _all_conns_lock:
+        _generation += 1
+        conns = list(_all_conns)
+        _all_conns.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def db_stats() -> Dict[str, Any]:
+    cfg = DBConfig.from_env()
+    with _all_conns_lock:
+        open_count = len(_all_conns)
+    return {
+        "path": cfg.path,
+        "journal_mode": cfg.journal_mode,
+        "synchronous": cfg.synchronous,
+        "open_connections": open_count,
+    }
+
+
 def init_db() -> None:
     conn = get_conn()
     cur = conn.cursor()
@@ -34,8 +163,15 @@ def init_db() -> None:
         """
     )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_user_ts ON logs(user_id, ts)")
+    # 최신순 keyset 페이지네이션(WHERE user_id=? AND id<? ORDER BY id DESC)용
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_user_id ON logs(user_id, id)")
     conn.commit()
-    conn.close()
+    init_log_search()
+    init_slot_aggregates()
+    init_signals()
+    init_radar_cache()
+    init_fetch_cache()
+    init_llm_usage()
 
 
 def insert_log(
@@ -46,72 +182,848 @@ def insert_log(
     slots_json: Optional[str] = None,
 ) -> None:
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO logs (user_id, state, message, reply, slots_json)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (user_id, state, message, reply, slots_json),
-    )
-    conn.commit()
-    conn.close()
+    # with conn: 실패 시 rollback (재사용 연결에 열린 트랜잭션이 남지 않도록)
+    with conn:
+        cur = conn.execute(
+            """
+            INSERT INTO logs (user_id, state, message, reply, slots_json)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (user_id, state, message, reply, slots_json),
+        )
+        if slots_json:
+            _update_slot_aggregates(conn, cur.lastrowid, cur.lastrowid)
 
 
-def fetch_logs(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+def insert_logs(rows: List[tuple]) -> int:
+    """
+    여러 로그 행을 한 트랜잭션(executemany + COMMIT 1회)으로 저장한다.
+    rows: (user_id, state, message, reply, slots_json[, ts]) 튜플 리스트.
+    ts("YYYY-MM-DD HH:MM:SS", UTC)가 없거나 None이면 지금 시각(과거 로그 적재용).
+    """
+    if not rows:
+        return 0
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO logs (user_id, state, message, reply, slots_json, ts)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, datetime('now')))
+            """,
+            (r if len(r) == 6 else (*r, None) for r in rows),
+        )
+        if any(r[4] for r in rows):
+            # 같은 트랜잭션 안의 AUTOINCREMENT id는 연속이다
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            _update_slot_aggregates(conn, last_id - len(rows) + 1, last_id)
+    return len(rows)
+
+
+def fetch_logs(user_id: str, limit: int = 20, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    최신순 로그. before_id를 주면 그 id보다 오래된 행부터(keyset 페이지네이션).
+    hot DB에서 limit을 못 채우면 아카이브(app.archive)에서 이어서 채운다.
+    """
+    rows = _fetch_hot_logs(user_id, limit, before_id)
+    if len(rows) < int(limit):
+        from itertools import islice
+        from app.archive import has_archived, iter_archived_logs
+        if has_archived(user_id):
+            cursor = rows[-1]["id"] if rows else before_id
+            rows.extend(islice(iter_archived_logs(user_id, before_id=cursor), int(limit) - len(rows)))
+    return rows
+
+
+def _fetch_hot_logs(user_id: str, limit: int, before_id: Optional[int]) -> List[Dict[str, Any]]:
+    conn = get_conn()
+    if before_id is None:
+        rows = conn.execute(
+            """
+            SELECT id, ts, state, message, reply, slots_json
+            FROM logs
+            WHERE user_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (user_id, int(limit)),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            """
+            SELECT id, ts, state, message, reply, slots_json
+            FROM logs
+            WHERE user_id = ? AND id < ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (user_id, int(before_id), int(limit)),
+        ).fetchall()
+
+    # sqlite3.Row -> dict
+    return [dict(r) for r in rows]
+
+
+LAUNCH_BRIEF_PREFIX = "[Launch Brief]"
+
+
+def fetch_latest_launch_brief(user_id: str) -> Optional[str]:
+    """사용자의 가장 최근 Launch Brief reply(hot DB -> 아카이브 순). 없으면 None."""
+    row = get_conn().execute(
         """
-        SELECT ts, state, message, reply, slots_json
+        SELECT reply
         FROM logs
-        WHERE user_id = ?
+        WHERE user_id = ? AND reply LIKE ? || '%'
         ORDER BY id DESC
-        LIMIT ?
+        LIMIT 1
         """,
-        (user_id, int(limit)),
+        (user_id, LAUNCH_BRIEF_PREFIX),
+    ).fetchone()
+    if row is not None:
+        return row["reply"]
+
+    from app.archive import has_archived, iter_archived_logs
+    if has_archived(user_id):
+        for r in iter_archived_logs(user_id):
+            if (r.get("reply") or "").startswith(LAUNCH_BRIEF_PREFIX):
+                return r["reply"]
+    return None
+
+
+def fetch_logs_page(user_id: str, limit: int = 20, before_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    fetch_logs + 다음 페이지 커서.
+    next_before_id가 None이면 더 오래된 행이 없다.
+    """
+    limit = max(1, min(int(limit), 1000))
+    rows = fetch_logs(user_id, limit=limit + 1, before_id=before_id)
+    items = rows[:limit]
+    next_before_id = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_before_id": next_before_id}
+
+
+def iter_logs(user_id: str, before_id: Optional[int] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    사용자의 전체 로그(hot DB + 아카이브)를 최신순으로 흘려준다(메모리 일정).
+    hot DB는 batch_size씩 페이지마다 새로 조회하므로 중간에 다른 스레드에서 이어 돌려도 안전하다.
+    """
+    while True:
+        rows = _fetch_hot_logs(user_id, batch_size, before_id)
+        yield from rows
+        if rows:
+            before_id = rows[-1]["id"]
+        if len(rows) < batch_size:
+            break
+
+    # hot DB를 다 읽었으면 아카이브 세그먼트로 이어서
+    from app.archive import iter_archived_logs
+    yield from iter_archived_logs(user_id, before_id=before_id)
+
+# --- Full-text search (FTS5) over logs.message / logs.reply ---
+# external content 테이블이라 본문은 logs에만 저장되고, 트리거로 인덱스만 동기화한다.
+# 기본 unicode61 토크나이저 + 검색어 prefix 매칭("선크림" -> "선크림이고"도 매칭).
+FTS_TOKENIZE = os.getenv("FTS_TOKENIZE", "unicode61 remove_diacritics 2")
+FTS_ENABLED = False
+
+
+def init_log_search() -> None:
+    global FTS_ENABLED
+    conn = get_conn()
+    try:
+        with conn:
+            existed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='logs_fts'"
+            ).fetchone()
+            conn.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+                    message, reply,
+                    content='logs', content_rowid='id',
+                    tokenize='{FTS_TOKENIZE}'
+                )
+                """
+            )
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN
+                INSERT INTO logs_fts(rowid, message, reply) VALUES (new.id, new.message, new.reply);
+            END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs BEGIN
+                INSERT INTO logs_fts(logs_fts, rowid, message, reply)
+                VALUES ('delete', old.id, old.message, old.reply);
+            END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE ON logs BEGIN
+                INSERT INTO logs_fts(logs_fts, rowid, message, reply)
+                VALUES ('delete', old.id, old.message, old.reply);
+                INSERT INTO logs_fts(rowid, message, reply) VALUES (new.id, new.message, new.reply);
+            END
+            """)
+            if not existed:
+                # 기존 로그 색인
+                conn.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+        FTS_ENABLED = True
+    except sqlite3.OperationalError:
+        # FTS5가 빠진 SQLite 빌드: 검색만 비활성화
+        FTS_ENABLED = False
+
+
+def _fts_query(q: str) -> str:
+    # 사용자 입력 -> 단어별 prefix AND 쿼리 (FTS 문법 문자는 따옴표로 무력화)
+    terms = [t.replace('"', "") for t in (q or "").split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+
+def search_logs(
+    q: str,
+    user_id: Optional[str] = None,
+    limit: int = 20,
+    brief_only: bool = False,
+    raw: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    FTS5 검색(bm25 순). raw=True면 q를 FTS5 쿼리 문법 그대로 사용.
+    brief_only=True면 reply가 [Launch Brief]로 시작하는 행만.
+    아카이브된 행은 logs_fts에서 빠지므로, limit을 못 채우면 아카이브 세그먼트에서 이어서 찾는다
+    (archived=True, score=None, 최신순). raw 쿼리는 FTS 문법이라 hot DB만 검색한다.
+    """
+    if not FTS_ENABLED:
+        raise RuntimeError("FTS5 is not available in this SQLite build")
+    match = q if raw else _fts_query(q)
+    if not match:
+        return []
+    where = ["logs_fts MATCH ?"]
+    args: List[Any] = [match]
+    if user_id:
+        where.append("l.user_id = ?")
+        args.append(user_id)
+    if brief_only:
+        where.append("l.reply LIKE '[Launch Brief]%'")
+    args.append(max(1, min(int(limit), 200)))
+    try:
+        rows = get_conn().execute(
+            f"""
+            SELECT l.id, l.ts, l.user_id, l.state,
+                   snippet(logs_fts, 0, '«', '»', '…', 12) AS message_snippet,
+                   snippet(logs_fts, 1, '«', '»', '…', 24) AS reply_snippet,
+                   bm25(logs_fts) AS score
+            FROM logs_fts
+            JOIN logs l ON l.id = logs_fts.rowid
+            WHERE {" AND ".join(where)}
+            ORDER BY score
+            LIMIT ?
+            """,
+            args,
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # 잘못된 raw 쿼리 문법 등
+        raise ValueError(str(e))
+    out = [dict(r, archived=False) for r in rows]
+    limit = args[-1]
+    if not raw and len(out) < limit:
+        from app.archive import search_archived_logs
+        terms = [t.replace('"', "") for t in q.split()]
+        out.extend(search_archived_logs(terms, user_id=user_id, limit=limit - len(out), brief_only=brief_only))
+    return out
+
+
+# --- Slot aggregates (insights용 증분 집계) ---
+# insert_log 트랜잭션 안에서 slots_json을 한 번만 풀어서
+# (user_id | 전체) x slot x value 카운터와 값별 최근 근거 샘플을 갱신한다.
+# 전체(global) 집계는 scope = GLOBAL_SCOPE 로 저장.
+GLOBAL_SCOPE = "*"
+AGG_SLOTS = ("country", "category", "target", "need", "price", "channel")
+SLOT_EVIDENCE_PER_VALUE = int(os.getenv("SLOT_EVIDENCE_PER_VALUE", "3"))
+
+# id 범위의 로그에서 (scope, slot, value, log_id, ts, message, slots_json) 추출
+_SLOT_PAIRS_SQL = f"""
+    SELECT CASE WHEN g.n = 0 THEN l.user_id ELSE '{GLOBAL_SCOPE}' END AS scope,
+           j.key AS slot, j.value AS value, l.id AS log_id, l.ts AS ts,
+           l.message AS message, l.slots_json AS slots_json
+    FROM logs l
+    CROSS JOIN json_each(CASE WHEN json_valid(l.slots_json) THEN l.slots_json ELSE '{{}}' END) j
+    CROSS JOIN (SELECT 0 AS n UNION ALL SELECT 1) g
+    WHERE l.id BETWEEN ? AND ?
+      AND l.slots_json IS NOT NULL
+      AND j.type = 'text' AND j.value != ''
+      AND j.key IN ({", ".join("'" + k + "'" for k in AGG_SLOTS)})
+"""
+
+
+def init_slot_aggregates() -> None:
+    conn = get_conn()
+    with conn:
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='slot_counts'"
+        ).fetchone()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS slot_counts (
+            scope TEXT NOT NULL,
+            slot TEXT NOT NULL,
+            value TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            last_ts TEXT,
+            PRIMARY KEY (scope, slot, value)
+        ) WITHOUT ROWID
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS slot_evidence (
+            scope TEXT NOT NULL,
+            slot TEXT NOT NULL,
+            value TEXT NOT NULL,
+            log_id INTEGER NOT NULL,
+            ts TEXT,
+            message TEXT,
+            slots_json TEXT,
+            PRIMARY KEY (scope, slot, value, log_id)
+        ) WITHOUT ROWID
+        """)
+        if not existed:
+            # 처음 생성될 때 기존 로그로 한 번 채운다
+            max_id = conn.execute("SELECT max(id) FROM logs").fetchone()[0]
+            if max_id:
+                _update_slot_aggregates(conn, 1, max_id)
+
+
+def _update_slot_aggregates(conn: sqlite3.Connection, first_id: int, last_id: int) -> None:
+    """[first_id, last_id] 로그를 집계에 반영한다. 호출한 쪽의 트랜잭션 안에서 실행."""
+    conn.execute(
+        f"""
+        INSERT INTO slot_counts (scope, slot, value, n, last_ts)
+        SELECT scope, slot, value, count(*), max(ts)
+        FROM ({_SLOT_PAIRS_SQL})
+        GROUP BY scope, slot, value
+        ON CONFLICT(scope, slot, value) DO UPDATE SET
+            n = n + excluded.n,
+            last_ts = max(coalesce(last_ts, ''), excluded.last_ts)
+        """,
+        (first_id, last_id),
+    )
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO slot_evidence (scope, slot, value, log_id, ts, message, slots_json)
+        SELECT scope, slot, value, log_id, ts, message, slots_json
+        FROM ({_SLOT_PAIRS_SQL})
+        """,
+        (first_id, last_id),
+    )
+    # 값마다 최근 SLOT_EVIDENCE_PER_VALUE개만 남긴다(이번에 건드린 값만)
+    conn.execute(
+        f"""
+        DELETE FROM slot_evidence
+        WHERE (scope, slot, value, log_id) IN (
+            SELECT scope, slot, value, log_id FROM (
+                SELECT e.scope, e.slot, e.value, e.log_id,
+                       row_number() OVER (
+                           PARTITION BY e.scope, e.slot, e.value ORDER BY e.log_id DESC
+                       ) AS rn
+                FROM slot_evidence e
+                WHERE (e.scope, e.slot, e.value) IN (
+                    SELECT DISTINCT scope, slot, value FROM ({_SLOT_PAIRS_SQL})
+                )
+            )
+            WHERE rn > ?
+        )
+        """,
+        (first_id, last_id, SLOT_EVIDENCE_PER_VALUE),
     )
-    rows = cur.fetchall()
-    conn.close()
 
-    # sqlite3.Row -> dict
-    return [dict(r) for r in rows]
+
+def fetch_slot_counts(scope: str = GLOBAL_SCOPE, top: Optional[int] = None) -> Dict[str, List[tuple]]:
+    """{slot: [(value, n), ...]} 빈도 내림차순(동률이면 최근 값 먼저)."""
+    rows = get_conn().execute(
+        """
+        SELECT slot, value, n FROM slot_counts
+        WHERE scope = ?
+        ORDER BY slot, n DESC, last_ts DESC
+        """,
+        (scope,),
+    ).fetchall()
+    out: Dict[str, List[tuple]] = {}
+    for r in rows:
+        vals = out.setdefault(r["slot"], [])
+        if top is None or len(vals) < top:
+            vals.append((r["value"], r["n"]))
+    return out
+
+
+def fetch_slot_evidence(scope: str, slot: str, value: str, n: int = 3) -> List[Dict[str, Any]]:
+    rows = get_conn().execute(
+        """
+        SELECT ts, message, slots_json FROM slot_evidence
+        WHERE scope = ? AND slot = ? AND value = ?
+        ORDER BY log_id DESC
+        LIMIT ?
+        """,
+        (scope, slot, value, int(n)),
+    ).fetchall()
+    out = []
+    for r in rows:
+        try:
+            slots = json.loads(r["slots_json"]) if r["slots_json"] else {}
+        except Exception:
+            slots = {}
+        out.append({"ts": r["ts"], "message": r["message"], "slots": slots})
+    return out
+
+# --- Radar report cache (content-addressed) ---
+def init_radar_cache() -> None:
+    conn = get_conn()
+    with conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS radar_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            reply TEXT NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_radar_cache_last_access ON radar_cache(last_access)")
+
+
+def radar_cache_get(key: str, ttl_s: float) -> Optional[str]:
+    """TTL 안의 항목이면 reply를 돌려주고 last_access/hits를 갱신. 만료 항목은 지운다."""
+    import time
+    now = time.time()
+    conn = get_conn()
+    row = conn.execute("SELECT created_at, reply FROM radar_cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    with conn:
+        if ttl_s > 0 and now - row["created_at"] > ttl_s:
+            conn.execute("DELETE FROM radar_cache WHERE key = ?", (key,))
+            return None
+        conn.execute(
+            "UPDATE radar_cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key)
+        )
+    return row["reply"]
+
+
+def radar_cache_put(key: str, model: str, reply: str, max_entries: int) -> None:
+    """저장 후 max_entries를 넘으면 가장 오래 안 쓰인 항목부터 지운다(LRU)."""
+    import time
+    now = time.time()
+    conn = get_conn()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO radar_cache (key, model, created_at, last_access, hits, reply)
+            VALUES (?, ?, ?, ?, 0, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                model = excluded.model, created_at = excluded.created_at,
+                last_access = excluded.last_access, reply = excluded.reply
+            """,
+            (key, model, now, now, reply),
+        )
+        n = conn.execute("SELECT count(*) FROM radar_cache").fetchone()[0]
+        if max_entries > 0 and n > max_entries:
+            conn.execute(
+                """
+                DELETE FROM radar_cache WHERE key IN (
+                    SELECT key FROM radar_cache ORDER BY last_access LIMIT ?
+                )
+                """,
+                (n - max_entries,),
+            )
+
+
+def radar_cache_size() -> int:
+    return get_conn().execute("SELECT count(*) FROM radar_cache").fetchone()[0]
+
+
+# --- 외부 fetch 결과 캐시(app.fetch_cache의 SQLite 백업, FETCH_CACHE_SQLITE=1일 때만 사용) ---
+def init_fetch_cache() -> None:
+    conn = get_conn()
+    with conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS fetch_cache (
+            key TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            ok INTEGER NOT NULL,
+            payload TEXT NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_cache_fetched_at ON fetch_cache(fetched_at)")
+
+
+def fetch_cache_get(key: str) -> Optional[Dict[str, Any]]:
+    row = get_conn().execute(
+        "SELECT fetched_at, ok, payload FROM fetch_cache WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"fetched_at": row["fetched_at"], "ok": bool(row["ok"]), "value": json.loads(row["payload"])}
+
+
+def fetch_cache_put(key: str, source: str, fetched_at: float, ok: bool, value: Any, max_entries: int) -> None:
+    """저장 후 max_entries를 넘으면 가장 오래전에 받은 항목부터 지운다."""
+    conn = get_conn()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO fetch_cache (key, source, fetched_at, ok, payload) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                fetched_at = excluded.fetched_at, ok = excluded.ok, payload = excluded.payload
+            """,
+            (key, source, fetched_at, 1 if ok else 0, json.dumps(value, ensure_ascii=False)),
+        )
+        n = conn.execute("SELECT count(*) FROM fetch_cache").fetchone()[0]
+        if max_entries > 0 and n > max_entries:
+            conn.execute(
+                """
+                DELETE FROM fetch_cache WHERE key IN (
+                    SELECT key FROM fetch_cache ORDER BY fetched_at LIMIT ?
+                )
+                """,
+                (n - max_entries,),
+            )
+
+
+
+# --- LLM usage (일별 집계) ---
+# (day, user_id, endpoint, intent, model)마다 한 행. 호출마다 upsert로 누적한다.
+def init_llm_usage() -> None:
+    conn = get_conn()
+    with conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_usage_daily (
+            day TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            intent TEXT NOT NULL,
+            model TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            input_tokens INTEGER NOT NULL DEFAULT 0,
+            cached_tokens INTEGER NOT NULL DEFAULT 0,
+            output_tokens INTEGER NOT NULL DEFAULT 0,
+            latency_ms_sum REAL NOT NULL DEFAULT 0,
+            latency_ms_max REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, user_id, endpoint, intent, model)
+        ) WITHOUT ROWID
+        """)
+
+
+def record_llm_usage(
+    user_id: str,
+    endpoint: str,
+    intent: str,
+    model: str,
+    input_tokens: int = 0,
+    cached_tokens: int = 0,
+    output_tokens: int = 0,
+    latency_ms: float = 0.0,
+    error: bool = False,
+    day: Optional[str] = None,
+) -> None:
+    from datetime import datetime
+    day = day or datetime.utcnow().strftime("%Y-%m-%d")
+    conn = get_conn()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO llm_usage_daily (day, user_id, endpoint, intent, model, calls, errors,
+                input_tokens, cached_tokens, output_tokens, latency_ms_sum, latency_ms_max)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(day, user_id, endpoint, intent, model) DO UPDATE SET
+                calls = calls + 1,
+                errors = errors + excluded.errors,
+                input_tokens = input_tokens + excluded.input_tokens,
+                cached_tokens = cached_tokens + excluded.cached_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+                latency_ms_max = max(latency_ms_max, excluded.latency_ms_max)
+            """,
+            (day, user_id, endpoint, intent, model, int(error),
+             int(input_tokens), int(cached_tokens), int(output_tokens), float(latency_ms), float(latency_ms)),
+        )
+
+
+def llm_tokens_on(day: str, user_id: Optional[str] = None) -> int:
+    """해당 날짜에 쓴 input+output 토큰 합(user_id 없으면 전체)."""
+    sql = "SELECT coalesce(sum(input_tokens + output_tokens), 0) FROM llm_usage_daily WHERE day = ?"
+    params: List[Any] = [day]
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    return get_conn().execute(sql, params).fetchone()[0]
+
+
+_USAGE_GROUPS = {"user_id", "endpoint", "intent", "model", "day"}
+
+
+def query_llm_usage(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    user_id: Optional[str] = None,
+    group_by: str = "day,endpoint,intent",
+) -> List[Dict[str, Any]]:
+    """
+    llm_usage_daily 집계 조회. since/until은 'YYYY-MM-DD'(포함).
+    group_by는 user_id/endpoint/intent/model/day 중 쉼표로 구분.
+    """
+    cols = [c.strip() for c in (group_by or "").split(",") if c.strip()]
+    bad = [c for c in cols if c not in _USAGE_GROUPS]
+    if bad:
+        raise ValueError(f"bad group_by: {', '.join(bad)}")
+
+    where, params = [], []
+    if since:
+        where.append("day >= ?")
+        params.append(since)
+    if until:
+        where.append("day <= ?")
+        params.append(until)
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+
+    select = ", ".join(cols + [
+        "sum(calls) AS calls",
+        "sum(errors) AS errors",
+        "sum(input_tokens) AS input_tokens",
+        "sum(cached_tokens) AS cached_tokens",
+        "sum(output_tokens) AS output_tokens",
+        "round(sum(latency_ms_sum) / max(sum(calls), 1), 1) AS latency_ms_avg",
+        "round(max(latency_ms_max), 1) AS latency_ms_max",
+    ])
+    sql = f"SELECT {select} FROM llm_usage_daily"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if cols:
+        sql += " GROUP BY " + ", ".join(cols) + " ORDER BY " + ", ".join(cols)
+    return [dict(r) for r in get_conn().execute(sql, params).fetchall()]
 
 # --- Signals snapshots (for trend + alerts) ---
+# 보존 기간(일). 0이면 무기한.
+# raw 행은 SIGNALS_RAW_DAYS가 지나면 시간 단위 rollup으로,
+# 시간 rollup은 SIGNALS_HOURLY_DAYS가 지나면 일 단위 rollup으로 합쳐진다.
+SIGNALS_RAW_DAYS = int(os.getenv("SIGNALS_RAW_DAYS", "14"))
+SIGNALS_HOURLY_DAYS = int(os.getenv("SIGNALS_HOURLY_DAYS", "90"))
+SIGNALS_DAILY_DAYS = int(os.getenv("SIGNALS_DAILY_DAYS", "0"))
+
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+
 def init_signals():
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS signals (
-        ts TEXT NOT NULL,
-        user_id TEXT NOT NULL,
-        kind TEXT NOT NULL,
-        payload_json TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
+    with conn:
+        cols = [r["name"] for r in conn.execute("PRAGMA table_info(signals)")]
+        if cols and "id" not in cols:
+            # 예전 스키마(PK/인덱스 없음) -> 새 스키마로 옮긴다
+            conn.execute("ALTER TABLE signals RENAME TO signals_old")
+            cols = []
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload_json TEXT
+        )
+        """)
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='signals_old'"
+        ).fetchone():
+            # 예전 행은 제약 없이 쌓였을 수 있다: user_id/kind 없는 행은 버리고,
+            # 못 읽는 ts는 지금 시각으로, 깨진 payload_json은 NULL로 옮긴다
+            conn.execute("""
+            INSERT INTO signals (ts, user_id, kind, payload_json)
+            SELECT COALESCE(strftime(:fmt, ts), strftime(:fmt, 'now')),
+                   user_id, kind,
+                   CASE WHEN json_valid(payload_json) THEN payload_json END
+            FROM signals_old
+            WHERE user_id IS NOT NULL AND kind IS NOT NULL
+            ORDER BY ts
+            """, {"fmt": _TS_FMT})
+            conn.execute("DROP TABLE signals_old")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_user_kind_ts ON signals(user_id, kind, ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_user_ts ON signals(user_id, ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals(ts)")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS signal_rollups (
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            bucket_ts TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            first_ts TEXT NOT NULL,
+            last_ts TEXT NOT NULL,
+            payload_json TEXT,
+            PRIMARY KEY (user_id, kind, bucket, bucket_ts)
+        ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_signal_rollups_bucket_ts ON signal_rollups(bucket, bucket_ts)")
 
-def insert_signal(user_id: str, kind: str, payload_json: str):
+def insert_signal(user_id: str, kind: str, payload_json: str, ts: Optional[str] = None):
     from datetime import datetime
     conn = get_conn()
-    cur = conn.cursor()
-    ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    cur.execute(
-        "INSERT INTO signals (ts, user_id, kind, payload_json) VALUES (?, ?, ?, ?)",
-        (ts, user_id, kind, payload_json),
-    )
-    conn.commit()
-    conn.close()
+    ts = ts or datetime.utcnow().strftime(_TS_FMT)
+    with conn:
+        conn.execute(
+            "INSERT INTO signals (ts, user_id, kind, payload_json) VALUES (?, ?, ?, ?)",
+            (ts, user_id, kind, payload_json),
+        )
+
+def _signal_cursor(ts: str, id_: int) -> str:
+    return f"{ts}|{id_}"
+
+def _parse_signal_cursor(cursor: str):
+    ts, _, id_ = (cursor or "").rpartition("|")
+    if not ts or not id_.isdigit():
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return ts, int(id_)
+
+def query_signals(
+    user_id: str,
+    kind: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """
+    시간 범위 조회(최신순). since <= ts < until, kind는 선택.
+    다음 페이지는 반환된 next_cursor를 cursor로 넘긴다(keyset, OFFSET 없음).
+    """
+    limit = max(1, min(int(limit), 1000))
+    where = ["user_id = ?"]
+    args: List[Any] = [user_id]
+    if kind:
+        where.append("kind = ?")
+        args.append(kind)
+    if since:
+        where.append("ts >= ?")
+        args.append(since)
+    if until:
+        where.append("ts < ?")
+        args.append(until)
+    if cursor:
+        c_ts, c_id = _parse_signal_cursor(cursor)
+        where.append("(ts < ? OR (ts = ? AND id < ?))")
+        args.extend([c_ts, c_ts, c_id])
+    args.append(limit + 1)
+
+    rows = get_conn().execute(
+        f"""
+        SELECT id, ts, kind, payload_json
+        FROM signals
+        WHERE {" AND ".join(where)}
+        ORDER BY ts DESC, id DESC
+        LIMIT ?
+        """,
+        args,
+    ).fetchall()
+
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _signal_cursor(last["ts"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
 
 def fetch_signals(user_id: str, limit: int = 20):
+    return query_signals(user_id, limit=limit)["items"]
+
+def query_signal_rollups(
+    user_id: str,
+    bucket: str = "hour",
+    kind: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """보존 기간이 지나 합쳐진 구간(bucket='hour'|'day') 조회(최신순)."""
+    where = ["user_id = ?", "bucket = ?"]
+    args: List[Any] = [user_id, bucket]
+    if kind:
+        where.append("kind = ?")
+        args.append(kind)
+    if since:
+        where.append("bucket_ts >= ?")
+        args.append(since)
+    if until:
+        where.append("bucket_ts < ?")
+        args.append(until)
+    args.append(max(1, min(int(limit), 5000)))
+    rows = get_conn().execute(
+        f"""
+        SELECT kind, bucket, bucket_ts, n, first_ts, last_ts, payload_json
+        FROM signal_rollups
+        WHERE {" AND ".join(where)}
+        ORDER BY bucket_ts DESC
+        LIMIT ?
+        """,
+        args,
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+# rollup upsert: 같은 구간이 이미 있으면 개수를 더하고, payload는 더 최신 것을 남긴다
+_ROLLUP_UPSERT = """
+INSERT INTO signal_rollups (user_id, kind, bucket, bucket_ts, n, first_ts, last_ts, payload_json)
+{select}
+ON CONFLICT(user_id, kind, bucket, bucket_ts) DO UPDATE SET
+    n = n + excluded.n,
+    first_ts = min(first_ts, excluded.first_ts),
+    payload_json = CASE WHEN excluded.last_ts >= last_ts THEN excluded.payload_json ELSE payload_json END,
+    last_ts = max(last_ts, excluded.last_ts)
+"""
+
+def apply_signal_retention(now=None) -> Dict[str, int]:
+    """
+    오래된 signals를 downsample 한다.
+    raw -> hour rollup -> day rollup -> (SIGNALS_DAILY_DAYS > 0 이면) 삭제.
+    각 구간의 payload는 그 구간의 마지막 스냅샷, n은 합쳐진 원본 행 수.
+    """
+    from datetime import datetime, timedelta
+    now = now or datetime.utcnow()
+    out = {"raw_rolled": 0, "hourly_rolled": 0, "daily_deleted": 0}
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT ts, kind, payload_json FROM signals WHERE user_id=? ORDER BY ts DESC LIMIT ?",
-        (user_id, limit),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with conn:
+        if SIGNALS_RAW_DAYS > 0:
+            cutoff = (now - timedelta(days=SIGNALS_RAW_DAYS)).strftime(_TS_FMT)
+            conn.execute(_ROLLUP_UPSERT.format(select="""
+                SELECT g.user_id, g.kind, 'hour', g.bucket_ts, g.n, g.first_ts, g.last_ts, s.payload_json
+                FROM (
+                    SELECT user_id, kind, strftime('%Y-%m-%d %H:00:00', ts) AS bucket_ts,
+                           count(*) AS n, min(ts) AS first_ts, max(ts) AS last_ts, max(id) AS last_id
+                    FROM signals
+                    WHERE ts < ?
+                    GROUP BY user_id, kind, bucket_ts
+                ) g
+                JOIN signals s ON s.id = g.last_id
+                WHERE true
+            """), (cutoff,))
+            out["raw_rolled"] = conn.execute("DELETE FROM signals WHERE ts < ?", (cutoff,)).rowcount
+
+        if SIGNALS_HOURLY_DAYS > 0:
+            cutoff = (now - timedelta(days=SIGNALS_HOURLY_DAYS)).strftime(_TS_FMT)
+            conn.execute(_ROLLUP_UPSERT.format(select="""
+                SELECT g.user_id, g.kind, 'day', g.day_ts, g.n, g.first_ts, g.last_ts, r.payload_json
+                FROM (
+                    SELECT user_id, kind, strftime('%Y-%m-%d 00:00:00', bucket_ts) AS day_ts,
+                           sum(n) AS n, min(first_ts) AS first_ts, max(last_ts) AS last_ts,
+                           max(bucket_ts) AS last_bucket
+                    FROM signal_rollups
+                    WHERE bucket = 'hour' AND bucket_ts < ?
+                    GROUP BY user_id, kind, day_ts
+                ) g
+                JOIN signal_rollups r
+                  ON r.user_id = g.user_id AND r.kind = g.kind
+                 AND r.bucket = 'hour' AND r.bucket_ts = g.last_bucket
+                WHERE true
+            """), (cutoff,))
+            out["hourly_rolled"] = conn.execute(
+                "DELETE FROM signal_rollups WHERE bucket = 'hour' AND bucket_ts < ?", (cutoff,)
+            ).rowcount
 
+        if SIGNALS_DAILY_DAYS > 0:
+            cutoff = (now - timedelta(days=SIGNALS_DAILY_DAYS)).strftime(_TS_FMT)
+            out["daily_deleted"] = conn.execute(
+                "DELETE FROM signal_rollups WHERE bucket = 'day' AND bucket_ts < ?", (cutoff,)
+            ).rowcount
+    return out
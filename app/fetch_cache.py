@@ -0,0 +1,234 @@
+"""
+외부 signal fetch(fetch_reddit 등) 결과 캐시: TTL + stale-while-revalidate + 실패 캐시.
+
+키 = (source, 정규화한 query, limit). 항목 상태:
+- fresh (나이 < TTL): 바로 돌려준다.
+- stale (TTL <= 나이 < TTL + FETCH_CACHE_STALE_S): 바로 돌려주고 백그라운드에서 한 번 새로 받는다.
+- 없음/너무 오래됨: 그 자리에서 받는다(같은 키 동시 요청은 single-flight로 한 번만).
+upstream이 실패하면 빈 결과를 FETCH_CACHE_NEGATIVE_TTL_S 동안 캐시해서
+실패하는 upstream이 매 요청에 타임아웃(15초)을 더하지 않게 한다.
+stale 항목을 갱신하다 실패하면 stale 값을 계속 쓰고, 같은 시간 동안 재시도하지 않는다.
+
+설정(환경변수):
+- FETCH_CACHE_ENABLED(기본 1), FETCH_CACHE_MAX(메모리 항목 수, 기본 500)
+- FETCH_CACHE_TTL_S(기본 300), 소스별 FETCH_CACHE_TTL_<SOURCE>_S (예: FETCH_CACHE_TTL_REDDIT_S)
+- FETCH_CACHE_STALE_S(기본 3600), FETCH_CACHE_NEGATIVE_TTL_S(기본 30)
+- FETCH_CACHE_SQLITE(기본 0): 1이면 fetch_cache 테이블에도 저장해서 재시작 후에도 쓴다
+- FETCH_CACHE_REFRESH_WORKERS(기본 4): 백그라운드 갱신 전용 스레드 수
+- FETCH_CACHE_REFRESH_MAX_PENDING(기본 64): 갱신 대기/실행 중 키가 이만큼이면 새 갱신은 건너뛴다(stale 값 응답, 다음 hit에서 다시 시도)
+
+    fetch_reddit = cached_fetcher("reddit", _fetch_reddit_core)
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.singleflight import Group
+
+FETCH_CACHE_ENABLED = os.getenv("FETCH_CACHE_ENABLED", "1") != "0"
+FETCH_CACHE_MAX = int(os.getenv("FETCH_CACHE_MAX", "500"))
+FETCH_CACHE_TTL_S = float(os.getenv("FETCH_CACHE_TTL_S", "300"))
+FETCH_CACHE_STALE_S = float(os.getenv("FETCH_CACHE_STALE_S", "3600"))
+FETCH_CACHE_NEGATIVE_TTL_S = float(os.getenv("FETCH_CACHE_NEGATIVE_TTL_S", "30"))
+FETCH_CACHE_SQLITE = os.getenv("FETCH_CACHE_SQLITE", "0") == "1"
+FETCH_CACHE_REFRESH_WORKERS = int(os.getenv("FETCH_CACHE_REFRESH_WORKERS", "4"))
+FETCH_CACHE_REFRESH_MAX_PENDING = int(os.getenv("FETCH_CACHE_REFRESH_MAX_PENDING", "64"))
+
+_WS = re.compile(r"\s+")
+
+
+def source_ttl(source: str) -> float:
+    env = "FETCH_CACHE_TTL_" + re.sub(r"[^A-Z0-9]+", "_", source.upper()) + "_S"
+    return float(os.getenv(env, str(FETCH_CACHE_TTL_S)))
+
+
+def normalize_query(query: str) -> str:
+    return _WS.sub(" ", (query or "").strip().lower())
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "ok", "retry_at")
+
+    def __init__(self, value: List[Any], fetched_at: float, ok: bool):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.ok = ok
+        self.retry_at = 0.0  # stale 갱신 실패 후 이 시각까지 재시도하지 않음
+
+
+class FetchCache:
+    def __init__(self, max_entries: int = FETCH_CACHE_MAX, stale_s: float = FETCH_CACHE_STALE_S,
+                 negative_ttl_s: float = FETCH_CACHE_NEGATIVE_TTL_S, sqlite: bool = FETCH_CACHE_SQLITE,
+                 refresh_workers: int = FETCH_CACHE_REFRESH_WORKERS,
+                 refresh_max_pending: int = FETCH_CACHE_REFRESH_MAX_PENDING):
+        self.max_entries = max_entries
+        self.stale_s = stale_s
+        self.negative_ttl_s = negative_ttl_s
+        self.sqlite = sqlite
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._refreshing: set = set()
+        self.refresh_max_pending = max(1, refresh_max_pending)
+        # stale 키마다 스레드를 만들지 않고 작은 전용 풀에서 돌린다(첫 갱신 때 스레드가 생긴다)
+        self._refresh_pool = ThreadPoolExecutor(max_workers=max(1, refresh_workers),
+                                                thread_name_prefix="fetch-refresh")
+        self._flight = Group("fetch_cache")
+        self._counters = {"hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0,
+                          "fetch_errors": 0, "refreshes": 0, "refresh_errors": 0, "refresh_skipped": 0,
+                          "sqlite_hits": 0, "sqlite_errors": 0}
+
+    # --- 내부 ---
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def key(source: str, query: str, limit: int) -> str:
+        return f"{source}|{int(limit or 0)}|{normalize_query(query)}"
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None:
+                self._entries.move_to_end(key)
+                return e
+        if not self.sqlite:
+            return None
+        try:
+            from app.db import fetch_cache_get
+            row = fetch_cache_get(key)
+        except Exception:
+            self._bump("sqlite_errors")
+            return None
+        if row is None:
+            return None
+        self._bump("sqlite_hits")
+        e = _Entry(row["value"], row["fetched_at"], row["ok"])
+        self._set(key, e, persist=False)
+        return e
+
+    def _set(self, key: str, e: _Entry, persist: bool = True, source: str = "") -> None:
+        with self._lock:
+            self._entries[key] = e
+            self._entries.move_to_end(key)
+            while self.max_entries > 0 and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if persist and self.sqlite:
+            try:
+                from app.db import fetch_cache_put
+                fetch_cache_put(key, source, e.fetched_at, e.ok, e.value, self.max_entries)
+            except Exception:
+                self._bump("sqlite_errors")
+
+    def _fetch(self, source: str, key: str, fn: Callable, query: str, limit: int) -> _Entry:
+        """upstream 호출 후 결과(실패면 빈 negative 항목)를 저장."""
+        try:
+            value = list(fn(query, limit) or [])
+            e = _Entry(value, time.time(), True)
+        except Exception:
+            self._bump("fetch_errors")
+            e = _Entry([], time.time(), False)
+        self._set(key, e, source=source)
+        return e
+
+    def _refresh(self, source: str, key: str, fn: Callable, query: str, limit: int, stale: _Entry) -> None:
+        try:
+            self._bump("refreshes")
+            try:
+                value = list(fn(query, limit) or [])
+            except Exception:
+                # 실패: stale 값을 계속 쓰고 negative TTL 동안 재시도하지 않는다
+                self._bump("refresh_errors")
+                stale.retry_at = time.time() + self.negative_ttl_s
+                return
+            self._set(key, _Entry(value, time.time(), True), source=source)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _start_refresh(self, source: str, key: str, fn: Callable, query: str, limit: int, stale: _Entry) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if len(self._refreshing) >= self.refresh_max_pending:
+                self._counters["refresh_skipped"] += 1
+                return
+            self._refreshing.add(key)
+        try:
+            self._refresh_pool.submit(self._refresh, source, key, fn, query, limit, stale)
+        except RuntimeError:
+            # 풀이 이미 닫힘(종료 중)
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # --- 공개 ---
+    def get(self, source: str, fn: Callable[[str, int], List[Any]], query: str, limit: int,
+            ttl_s: Optional[float] = None) -> Tuple[List[Any], str]:
+        """
+        (결과, 상태). 상태: hit | stale | negative | miss | error.
+        결과 리스트는 호출자 것(복사본)이라 고쳐도 된다.
+        """
+        ttl = source_ttl(source) if ttl_s is None else ttl_s
+        key = self.key(source, query, limit)
+        now = time.time()
+        e = self._get(key)
+        if e is not None:
+            age = now - e.fetched_at
+            if not e.ok and age < self.negative_ttl_s:
+                self._bump("negative_hits")
+                return [], "negative"
+            if e.ok and age < ttl:
+                self._bump("hits")
+                return list(e.value), "hit"
+            if e.ok and age < ttl + self.stale_s:
+                self._bump("stale_hits")
+                if now >= e.retry_at:
+                    self._start_refresh(source, key, fn, query, limit, e)
+                return list(e.value), "stale"
+
+        self._bump("misses")
+        e = self._flight.do(key, self._fetch, source, key, fn, query, limit)
+        return list(e.value), ("miss" if e.ok else "error")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": FETCH_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "refreshing": len(self._refreshing),
+                "sqlite": self.sqlite,
+                **self._counters,
+            }
+
+
+fetch_cache = FetchCache()
+
+
+def cached_fetcher(source: str, fn: Callable[[str, int], List[Any]], default_limit: int = 25) -> Callable:
+    """
+    fn(query, limit)(실패하면 예외)을 캐시된 fetch 함수로 감싼다.
+    반환 함수는 기존 fetch_* 처럼 실패해도 예외 없이 리스트를 돌려준다.
+    """
+    def fetch(query: str, limit: int = default_limit) -> List[Any]:
+        if not FETCH_CACHE_ENABLED:
+            try:
+                return list(fn(query, limit) or [])
+            except Exception:
+                return []
+        return fetch_cache.get(source, fn, query, limit)[0]
+
+    fetch.source = source
+    return fetch
+
+
+def fetch_cache_stats() -> Dict[str, Any]:
+    return fetch_cache.stats()
@@ -0,0 +1,164 @@
+"""
+프로세스 전역 HTTP 클라이언트 풀(signal fetcher용).
+
+fetch_reddit/fetch_google_news_rss가 요청마다 httpx.Client를 새로 열면 매번 DNS/TCP/TLS를 다시 한다.
+여기서 클라이언트를 한 번만 만들고 keep-alive 연결을 재사용한다.
+(signal fan-out은 동기 fetcher를 스레드 풀에서 돌리므로 async 클라이언트는 두지 않는다)
+- 전체 연결 수: HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE, 유휴 연결 유지 HTTP_KEEPALIVE_EXPIRY_S
+- 호스트별 동시 요청 수: HTTP_PER_HOST_CONNECTIONS (httpx Limits는 전체 기준이라 세마포어로 따로 건다)
+- HTTP/2: HTTP2=auto(기본)면 h2 패키지가 설치돼 있을 때만 켠다(1/0으로 강제)
+- 기본 timeout: HTTP_TIMEOUT_S / HTTP_CONNECT_TIMEOUT_S (요청별 timeout=으로 덮어쓸 수 있음)
+연결 재사용 통계는 httpcore trace 이벤트로 센다(requests 중 새 TCP 연결을 연 횟수).
+errors는 요청을 보내고 응답을 받는 동안 난 httpx.HTTPError(연결/timeout/프로토콜 오류)만 센다.
+stream()은 응답 헤더까지만 세고, 블록 안의 raise_for_status()/본문 파싱 예외는 호출자 몫이라 세지 않는다.
+FastAPI lifespan 종료 시 http_pool.close()로 닫는다.
+
+    r = http_pool.get(url, params=params, headers=headers)
+    with http_pool.stream("GET", url, params=params) as r: ...
+"""
+import importlib.util
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+HTTP_PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "6"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "15"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+_HTTP2 = os.getenv("HTTP2", "auto").lower()
+HTTP2_ENABLED = (importlib.util.find_spec("h2") is not None) if _HTTP2 == "auto" else _HTTP2 not in ("0", "false")
+
+
+def _host(url: str) -> str:
+    return urlsplit(str(url)).netloc.lower()
+
+
+class HTTPPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._host_sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._counters = {"requests": 0, "errors": 0, "new_connections": 0, "tls_handshakes": 0}
+        self._by_host: Dict[str, Dict[str, int]] = {}
+
+    # --- clients ---
+    def _kwargs(self) -> Dict[str, Any]:
+        return {
+            "limits": httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                   max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                                   keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S),
+            "timeout": httpx.Timeout(HTTP_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+            "follow_redirects": True,
+            "http2": HTTP2_ENABLED,
+        }
+
+    def sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(**self._kwargs())
+            return self._http
+
+    def close(self) -> None:
+        with self._lock:
+            http, self._http = self._http, None
+        if http is not None:
+            http.close()
+
+    # --- 계측 ---
+    @contextmanager
+    def _counted(self, host: str):
+        self._count(host, "requests")
+        try:
+            yield
+        except httpx.HTTPError:
+            self._count(host, "errors")
+            raise
+
+    def _count(self, host: str, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+            h = self._by_host.setdefault(host, {"requests": 0, "errors": 0, "new_connections": 0, "tls_handshakes": 0})
+            h[name] += 1
+
+    def _trace_event(self, host: str, event: str) -> None:
+        if event == "connection.connect_tcp.complete":
+            self._count(host, "new_connections")
+        elif event == "connection.start_tls.complete":
+            self._count(host, "tls_handshakes")
+
+    def _trace(self, host: str):
+        def trace(event: str, info: dict) -> None:
+            self._trace_event(host, event)
+        return trace
+
+    # --- 호스트별 동시성 ---
+    @contextmanager
+    def _host_slot(self, host: str):
+        with self._lock:
+            sem = self._host_sems.get(host)
+            if sem is None:
+                sem = self._host_sems[host] = threading.BoundedSemaphore(max(1, HTTP_PER_HOST_CONNECTIONS))
+        with sem:
+            yield
+
+    # --- 요청 ---
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = _host(url)
+        client = self.sync_client()
+        kwargs.setdefault("extensions", {})["trace"] = self._trace(host)
+        with self._host_slot(host), self._counted(host):
+            return client.request(method, url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs) -> Iterator[httpx.Response]:
+        """본문을 조각으로 읽는 요청. 블록을 일찍 빠져나오면 남은 본문을 읽지 않고 응답을 닫는다."""
+        host = _host(url)
+        client = self.sync_client()
+        kwargs.setdefault("extensions", {})["trace"] = self._trace(host)
+        with self._host_slot(host):
+            # client.stream()과 같지만 에러는 응답 헤더를 받을 때까지만 센다(request()와 같은 기준)
+            with self._counted(host):
+                r = client.send(client.build_request(method, url, **kwargs), stream=True)
+            try:
+                yield r
+            finally:
+                r.close()
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self._counters)
+            by_host = {h: dict(v) for h, v in self._by_host.items()}
+        reused = max(0, c["requests"] - c["errors"] - c["new_connections"])
+        pools = {}
+        try:
+            # httpcore 내부 풀 상태(최선 노력)
+            conns = self._http._transport._pool.connections if self._http else []
+            pools["sync"] = {"connections": len(conns), "idle": sum(1 for x in conns if x.is_idle())}
+        except Exception:
+            pools["sync"] = None
+        return {
+            "http2": HTTP2_ENABLED,
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "per_host_connections": HTTP_PER_HOST_CONNECTIONS,
+            **c,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / c["requests"], 3) if c["requests"] else None,
+            "by_host": by_host,
+            "pool": pools,
+        }
+
+
+http_pool = HTTPPool()
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    return http_pool.stats()
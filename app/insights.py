@@ -24,8 +24,9 @@ def _extract_slots(row):
 
 def make_pulse(rows):
     """최근 로그(launch brief/brief 답변)를 기반으로 트렌드 요약 + 근거를 생성"""
-    slots = [_extract_slots(r) for r in rows]
-    slots = [s for s in slots if s]
+    # slots_json은 행마다 한 번만 파싱해서 카운트/근거에 같이 쓴다
+    parsed = [(r, _extract_slots(r)) for r in rows]
+    slots = [s for _, s in parsed if s]
 
     c_country = Counter([s.get("country") for s in slots if s.get("country")])
     c_cat     = Counter([s.get("category") for s in slots if s.get("category")])
@@ -36,8 +37,7 @@ def make_pulse(rows):
     # 근거(evidence): 상위 항목이 실제로 어떤 메시지/브리프에서 나왔는지 샘플 3개
     def evidence_for(key, value, n=3):
         out = []
-        for r in rows:
-            s = _extract_slots(r)
+        for r, s in parsed:
             if s.get(key) == value:
                 d = _row_to_dict(r)
                 out.append({"ts": d.get("ts"), "message": d.get("message"), "slots": s})
@@ -51,8 +51,11 @@ def make_pulse(rows):
     top_price   = c_price.most_common(3)
     top_channel = c_channel.most_common(5)
 
+    return _pulse_out({"logs_count": len(rows)}, top_country, top_cat, top_need, top_price, top_channel, evidence_for)
+
+def _pulse_out(window, top_country, top_cat, top_need, top_price, top_channel, evidence_for):
     return {
-        "window": {"logs_count": len(rows)},
+        "window": window,
         "signals": {
             "top_country": top_country,
             "top_category": top_cat,
@@ -74,6 +77,63 @@ def make_pulse(rows):
         ]
     }
 
+def make_pulse_from_aggregates(user_id=None):
+    """
+    make_pulse와 같은 모양이지만 insert_log가 갱신하는 slot_counts/slot_evidence에서 읽는다.
+    로그 행 수와 무관하게 (slot, value) 개수만큼만 읽는다. user_id가 없으면 전체 집계.
+    """
+    from app.db import GLOBAL_SCOPE, fetch_slot_counts, fetch_slot_evidence
+    scope = user_id or GLOBAL_SCOPE
+    counts = fetch_slot_counts(scope, top=5)
+
+    def evidence_for(key, value, n=3):
+        return fetch_slot_evidence(scope, key, value, n=n)
+
+    return _pulse_out(
+        {"source": "aggregates", "scope": scope},
+        counts.get("country", [])[:3],
+        counts.get("category", [])[:3],
+        counts.get("need", [])[:5],
+        counts.get("price", [])[:3],
+        counts.get("channel", [])[:5],
+        evidence_for,
+    )
+
+def _alert_rules(need):
+    """need 값 -> 해당되는 알림 템플릿 목록(예시 룰, 추후 실제 리뷰 데이터 기반으로 정교화)"""
+    out = []
+    if "백탁" in need or "white cast" in need.lower():
+        out.append({
+            "type": "review_risk",
+            "title": "백탁(white cast) 관련 불만 위험",
+            "why": "선케어에서 가장 빠르게 악평이 쌓이는 전형적 포인트.",
+            "action": ["텍스처/흡수/톤업 여부 명확히 표기", "전/후 사진 가이드", "피부톤별 테스트 문구"]
+        })
+    if "민감" in need or "sensitive" in need.lower():
+        out.append({
+            "type": "claims_risk",
+            "title": "민감피부 타겟 → 성분/자극 관련 검증 요구 증가",
+            "why": "‘진정/저자극’ 클레임은 근거(테스트/성분) 요구가 강함.",
+            "action": ["민감피부 패널 테스트/인체적용시험", "향료/알러젠 표시", "전성분 FAQ 준비"]
+        })
+    return out
+
+def make_alerts_from_aggregates(user_id=None):
+    """make_alerts와 같은 모양. need 값별 집계 + 최근 근거 1건으로 판단."""
+    from app.db import GLOBAL_SCOPE, fetch_slot_counts, fetch_slot_evidence
+    scope = user_id or GLOBAL_SCOPE
+    uniq = {}
+    for need, count in fetch_slot_counts(scope).get("need", []):
+        for rule in _alert_rules(need):
+            if rule["title"] in uniq:
+                continue
+            ev = fetch_slot_evidence(scope, "need", need, n=1)
+            uniq[rule["title"]] = {**rule, "count": count, "evidence": ev[0] if ev else None}
+    return {
+        "alerts_count": len(uniq),
+        "alerts": list(uniq.values())[:10]
+    }
+
 def make_alerts(rows):
     """리스크/이슈 키워드(불만 가능) 기반 간단 알림 + 근거"""
     alerts = []
@@ -83,23 +143,8 @@ def make_alerts(rows):
         need = (s.get("need") or "")
         msg = (d.get("message") or "")
 
-        # 예시 룰(추후 실제 리뷰 데이터 기반으로 정교화)
-        if "백탁" in need or "white cast" in need.lower():
-            alerts.append({
-                "type": "review_risk",
-                "title": "백탁(white cast) 관련 불만 위험",
-                "why": "선케어에서 가장 빠르게 악평이 쌓이는 전형적 포인트.",
-                "evidence": {"ts": d.get("ts"), "message": msg, "slots": s},
-                "action": ["텍스처/흡수/톤업 여부 명확히 표기", "전/후 사진 가이드", "피부톤별 테스트 문구"]
-            })
-        if "민감" in need or "sensitive" in need.lower():
-            alerts.append({
-                "type": "claims_risk",
-                "title": "민감피부 타겟 → 성분/자극 관련 검증 요구 증가",
-                "why": "‘진정/저자극’ 클레임은 근거(테스트/성분) 요구가 강함.",
-                "evidence": {"ts": d.get("ts"), "message": msg, "slots": s},
-                "action": ["민감피부 패널 테스트/인체적용시험", "향료/알러젠 표시", "전성분 FAQ 준비"]
-            })
+        for rule in _alert_rules(need):
+            alerts.append({**rule, "evidence": {"ts": d.get("ts"), "message": msg, "slots": s}})
 
     # 중복 줄이기(같은 title은 1개만)
     uniq = {}
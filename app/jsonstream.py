@@ -0,0 +1,199 @@
+"""
+LLM 스트림용 증분 JSON 파서.
+
+모델이 내보내는 JSON 객체 텍스트를 조각 단위로 받으면서
+최상위 필드가 완성되는 즉시 (key, value)를 알려준다.
+SYSTEM 스키마 순서상 intent/need_question/slot/question이 긴 reply보다 먼저 오므로,
+라우팅 결정을 reply가 끝나기 전에 내릴 수 있다.
+
+- 완성된 값은 그 값의 텍스트 조각만 jiter로 파싱한다(전체 재파싱 없음).
+- partial로 지정한 문자열 필드(reply)는 늘어난 만큼만 delta로 돌려준다.
+- 객체 앞뒤의 잡음(코드블록 등)은 무시한다.
+- JSON으로 파싱되지 않는 값(False 등)은 그 필드를 빼고 skipped에 키만 남긴다.
+
+    js = LLMJSONStream()
+    for chunk in stream:
+        for kind, key, value in js.feed(chunk):
+            ...   # ("field", "intent", "LAUNCH") / ("partial", "reply", "안녕")
+    data = js.result()
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+import jiter
+
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}")
+
+
+def _safe_end(raw: str, start: int) -> int:
+    """
+    raw[start:]에서 이스케이프가 중간에 끊기지 않는 마지막 위치.
+    \\uXXXX 서로게이트 쌍은 뒤 절반까지 와야 끊을 수 있다.
+    """
+    i = safe = start
+    n = len(raw)
+    while i < n:
+        if raw[i] != "\\":
+            i += 1
+        elif i + 1 >= n:
+            break
+        elif raw[i + 1] != "u":
+            i += 2
+        elif i + 6 > n:
+            break
+        elif _HIGH_SURROGATE.fullmatch(raw[i:i + 6]):
+            if i + 12 > n:
+                break
+            i += 12
+        else:
+            i += 6
+        safe = i
+    return safe
+
+
+Event = Tuple[str, str, Any]
+
+
+class LLMJSONStream:
+    def __init__(self, partial: Iterable[str] = ("reply",)):
+        self.partial = set(partial)
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self.skipped: List[str] = []
+        self.done = False
+        self._pos = 0          # 다음에 볼 self.text 위치
+        self._started = False  # 최상위 '{'를 봤는지
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._expect = "key"   # key | colon | value | string | container | scalar | comma
+        self._key_start = -1
+        self._key = ""
+        self._val_start = -1
+        self._sent = 0         # partial 문자열 값에서 이미 디코딩해 보낸 원문 길이
+
+    def feed(self, chunk: str) -> List[Event]:
+        if self.done or not chunk:
+            self.text += chunk or ""
+            return []
+        self.text += chunk
+        out: List[Event] = []
+        t = self.text
+        i = self._pos
+        n = len(t)
+        while i < n and not self.done:
+            c = t[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._close_string(i, out)
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_str = True
+                if self._depth == 1:
+                    if self._expect == "key":
+                        self._key_start = i
+                    elif self._expect == "value":
+                        self._val_start = i
+                        self._sent = 0
+                        self._expect = "string"
+            elif c in "{[":
+                if self._depth == 1 and self._expect == "value":
+                    self._val_start = i
+                    self._expect = "container"
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "container":
+                    self._emit(t[self._val_start:i + 1], out)
+                elif self._depth == 0:
+                    if self._expect == "scalar":
+                        self._emit(t[self._val_start:i], out)
+                    self.done = True
+            elif self._depth == 1:
+                if c == ":" and self._expect == "colon":
+                    self._expect = "value"
+                elif c == "," and self._expect in ("scalar", "comma"):
+                    if self._expect == "scalar":
+                        self._emit(t[self._val_start:i], out)
+                    self._expect = "key"
+                elif self._expect == "value" and not c.isspace():
+                    self._val_start = i
+                    self._expect = "scalar"
+            i += 1
+        self._pos = i
+
+        # 진행 중인 partial 문자열 값: 디코딩 가능한 만큼만 delta로
+        if self._in_str and self._depth == 1 and self._expect == "string" and self._key in self.partial:
+            delta = self._string_delta(t[self._val_start + 1:self._pos], final=False)
+            if delta:
+                out.append(("partial", self._key, delta))
+        return out
+
+    def _close_string(self, i: int, out: List[Event]) -> None:
+        if self._expect == "key":
+            self._key = json.loads(self.text[self._key_start:i + 1])
+            self._expect = "colon"
+        elif self._expect == "string":
+            if self._key in self.partial:
+                delta = self._string_delta(self.text[self._val_start + 1:i], final=True)
+                if delta:
+                    out.append(("partial", self._key, delta))
+            self._emit(self.text[self._val_start:i + 1], out)
+
+    def _string_delta(self, raw: str, final: bool) -> str:
+        end = len(raw) if final else _safe_end(raw, self._sent)
+        if end <= self._sent:
+            return ""
+        seg = raw[self._sent:end]
+        self._sent = end
+        return json.loads('"' + seg + '"')
+
+    def _emit(self, raw: str, out: List[Event]) -> None:
+        raw = raw.strip()
+        self._expect = "comma"
+        try:
+            value = jiter.from_json(raw.encode("utf-8"))
+        except ValueError:
+            # JSON이 아닌 값(False, undefined 등): 원문 문자열로 두면 truthy가 되므로 필드를 버린다
+            self.skipped.append(self._key)
+            return
+        self.fields[self._key] = value
+        out.append(("field", self._key, value))
+
+    def result(self) -> Dict[str, Any]:
+        """완성된 객체. 스트림이 객체를 끝내지 못했으면 전체 텍스트로 한 번 더 시도한다."""
+        if self.done:
+            return dict(self.fields)
+        try:
+            obj = jiter.from_json(self.text.strip().encode("utf-8"), partial_mode="trailing-strings")
+        except ValueError:
+            start = self.text.find("{")
+            if start == -1:
+                raise ValueError("LLM output is not JSON")
+            obj = jiter.from_json(self.text[start:].encode("utf-8"), partial_mode="trailing-strings")
+        if not isinstance(obj, dict):
+            raise ValueError("LLM output is not a JSON object")
+        return obj
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """한 번에 받은 LLM 텍스트에서 첫 최상위 JSON 객체를 꺼낸다(앞뒤 잡음 무시)."""
+    js = LLMJSONStream(partial=())
+    js.feed(text or "")
+    return js.result()
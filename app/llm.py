@@ -1,6 +1,15 @@
 ﻿import os
 import json
-from openai import OpenAI
+import hashlib
+import threading
+import unicodedata
+from contextlib import closing
+from typing import Iterator, Optional
+
+from app.jsonstream import LLMJSONStream, parse_json_object
+from app.llm_client import llm_clients
+from app.llm_usage import Meter, check_budget, metered
+from app.singleflight import Group
 
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
@@ -28,69 +37,214 @@ SYSTEM = """너는 K-Beauty 글로벌 트렌드/런칭 기획 AI 에이전트다
 - RADAR면 레이다 요약 형태로 reply에 출력.
 - 항상 JSON만 출력.\n- Country/Region이 없으면 final=true로 끝내지 말고 slot="country" 질문을 우선하라.\n"""
 
-def call_llm(user_message: str, brief_answers: list[str]) -> dict:
-    api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set")
+def _llm_input(user_message: str, brief_answers: list[str]) -> list:
+    payload = {"user_message": user_message, "known_slots": brief_answers}
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
 
-    client = OpenAI(api_key=api_key)
 
-    payload = {"user_message": user_message, "known_slots": brief_answers}
+def parse_llm_json(text: str) -> dict:
+    # 첫 최상위 JSON 객체만 한 번에 스캔(앞뒤 잡음/코드블록 무시, 재파싱 없음)
+    return parse_json_object(text)
 
-    resp = client.responses.create(
-        model=MODEL,
-        input=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
-        ],
-    )
 
-    text = resp.output_text.strip()
+def call_llm(user_message: str, brief_answers: list[str],
+             user_id: Optional[str] = None, endpoint: str = "chat") -> dict:
+    """예산을 넘었으면 LLMBudgetExceeded(호출 안 함). 사용량은 llm_usage_daily에 기록."""
+    check_budget(user_id)
+    with metered(user_id, endpoint, MODEL) as m:
+        # 공유 클라이언트(연결 풀 재사용 + 동시 호출 제한 + 재시도 예산)
+        resp = llm_clients.responses_create(model=MODEL, input=_llm_input(user_message, brief_answers))
+        m.set_usage(getattr(resp, "usage", None))
+        data = parse_llm_json(resp.output_text)
+        m.intent = str(data.get("intent") or "")
+        return data
+
+
+def _text_deltas(events, meter: Optional[Meter] = None) -> Iterator[str]:
+    # Responses API 스트림 이벤트 중 텍스트 조각만. 마지막 completed 이벤트의 usage는 meter로
+    for ev in events:
+        kind = getattr(ev, "type", "")
+        if kind == "response.output_text.delta":
+            delta = getattr(ev, "delta", "")
+            if delta:
+                yield delta
+        elif kind == "response.completed" and meter is not None:
+            meter.set_usage(getattr(getattr(ev, "response", None), "usage", None))
+
+
+def stream_llm(user_message: str, brief_answers: list[str],
+               user_id: Optional[str] = None, endpoint: str = "chat") -> Iterator[str]:
+    """call_llm의 스트리밍 버전: 모델이 내보내는 JSON 텍스트 조각을 도착하는 대로 흘려준다."""
+    check_budget(user_id)
+    messages = _llm_input(user_message, brief_answers)
+    with metered(user_id, endpoint, MODEL) as m:
+        parts = []
+        try:
+            # 소비자가 일찍 멈추면(early_stop, SSE 연결 끊김) LLM 슬롯/HTTP 스트림을 바로 돌려준다
+            with closing(llm_clients.responses_stream(model=MODEL, input=messages)) as events:
+                for delta in _text_deltas(events, m):
+                    parts.append(delta)
+                    yield delta
+        finally:
+            text = "".join(parts)
+            if not (m.input_tokens or m.output_tokens):
+                # 중간에 닫혀서 completed(usage)를 못 받았으면 글자 수로 추정
+                m.estimate(sum(len(x["content"]) for x in messages), text)
+            try:
+                m.intent = str(parse_llm_json(text).get("intent") or "")
+            except ValueError:
+                pass
+
+
+def _question_ready(fields: dict) -> bool:
+    return fields.get("need_question") is True and "slot" in fields and "question" in fields
+
 
+def stream_llm_fields(user_message: str, brief_answers: list[str], user_id: Optional[str] = None,
+                      endpoint: str = "chat", early_stop: bool = True) -> Iterator[tuple]:
+    """
+    stream_llm을 증분 JSON 파서에 흘려서 이벤트로 내보낸다.
+    ("field", key, value): 최상위 필드가 완성될 때마다(intent/need_question/slot이 reply보다 먼저)
+    ("partial", "reply", delta): reply 문자열이 늘어날 때마다
+    ("result", "", dict): 마지막 한 번
+    early_stop이면 need_question=true이고 slot/question까지 왔을 때 reply를 기다리지 않고 스트림을 닫는다.
+    """
+    js = LLMJSONStream()
+    chunks = stream_llm(user_message, brief_answers, user_id=user_id, endpoint=endpoint)
+    stopped = False
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            return json.loads(text[start:end+1])
-        raise
+        for chunk in chunks:
+            yield from js.feed(chunk)
+            if early_stop and _question_ready(js.fields):
+                stopped = True
+                break
+    finally:
+        chunks.close()
+    yield ("result", "", dict(js.fields) if stopped else js.result())
 
 
+def route_llm(user_message: str, brief_answers: list[str],
+              user_id: Optional[str] = None, endpoint: str = "chat") -> dict:
+    """call_llm과 같은 dict를 돌려주지만, 질문 턴이면 reply가 끝나기 전에 라우팅을 확정하고 반환한다."""
+    data: dict = {}
+    for kind, _key, value in stream_llm_fields(user_message, brief_answers, user_id=user_id, endpoint=endpoint):
+        if kind == "result":
+            data = value
+    return data
 
 
+# Radar: (1) 핵심 인사이트 (2) 리뷰/FAQ 리스크 (3) 차별화 각도 (4) 다음 리서치 액션
+RADAR_SYSTEM = (
+    "You are a K-Beauty product/marketing strategist. "
+    "Given a Launch Brief, create a concise 'Radar' report: "
+    "1) Key insights (3 bullets), "
+    "2) Likely review/FAQ risks & objections (3 bullets), "
+    "3) Differentiation angles (3 bullets), "
+    "4) Next research actions (3 bullets). "
+    "Write in Korean. Keep it practical and specific."
+)
 
-def call_radar(launch_brief: str, extra_notes: str = "") -> dict:
-    # Radar: (1) 핵심 인사이트 (2) 리뷰/FAQ 리스크 (3) 차별화 각도 (4) 다음 리서치 액션
-    system = (
-        "You are a K-Beauty product/marketing strategist. "
-        "Given a Launch Brief, create a concise 'Radar' report: "
-        "1) Key insights (3 bullets), "
-        "2) Likely review/FAQ risks & objections (3 bullets), "
-        "3) Differentiation angles (3 bullets), "
-        "4) Next research actions (3 bullets). "
-        "Write in Korean. Keep it practical and specific."
+# Radar 결과 캐시(SQLite): 같은 brief+notes+model이면 TTL 동안 LLM을 다시 부르지 않는다
+RADAR_CACHE_ENABLED = os.getenv("RADAR_CACHE_ENABLED", "1") != "0"
+RADAR_CACHE_TTL_S = float(os.getenv("RADAR_CACHE_TTL_S", str(24 * 3600)))
+RADAR_CACHE_MAX = int(os.getenv("RADAR_CACHE_MAX", "1000"))
+_radar_cache_counters = {"hits": 0, "misses": 0, "bypass": 0, "errors": 0}
+_radar_cache_lock = threading.Lock()
+
+
+def _radar_cache_bump(name: str) -> None:
+    # /radar/batch 스레드와 single-flight 호출자가 동시에 센다
+    with _radar_cache_lock:
+        _radar_cache_counters[name] += 1
+
+
+def _normalize_text(t: str) -> str:
+    # 줄 단위 공백 정리 + 빈 줄 제거 + NFC (복붙/IME 차이로 키가 갈리지 않게)
+    t = unicodedata.normalize("NFC", t or "")
+    lines = (" ".join(line.split()) for line in t.replace("\r\n", "\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def radar_cache_key(launch_brief: str, extra_notes: str, model: str) -> str:
+    raw = json.dumps(
+        [_normalize_text(launch_brief), _normalize_text(extra_notes), model, RADAR_SYSTEM],
+        ensure_ascii=False,
     )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def radar_cache_stats() -> dict:
+    from app.db import radar_cache_size
+    try:
+        entries = radar_cache_size()
+    except Exception:
+        entries = None
+    with _radar_cache_lock:
+        counters = dict(_radar_cache_counters)
+    return {
+        "enabled": RADAR_CACHE_ENABLED,
+        "ttl_s": RADAR_CACHE_TTL_S,
+        "max_entries": RADAR_CACHE_MAX,
+        "entries": entries,
+        **counters,
+    }
+
 
+def _radar_input(launch_brief: str, extra_notes: str) -> list:
     user = f"""[Launch Brief]
 {launch_brief}
 
 [Extra Notes]
 {extra_notes}
 """
+    return [
+        {"role": "system", "content": RADAR_SYSTEM},
+        {"role": "user", "content": user},
+    ]
 
-    api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
 
-    client = OpenAI(api_key=api_key)
-    resp = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-        temperature=0.4,
-    )
+def _radar_cache_lookup(key: str, refresh: bool) -> Optional[str]:
+    from app.db import radar_cache_get
+
+    if not RADAR_CACHE_ENABLED:
+        return None
+    if refresh:
+        _radar_cache_bump("bypass")
+        return None
+    try:
+        cached = radar_cache_get(key, RADAR_CACHE_TTL_S)
+    except Exception:
+        cached = None
+        _radar_cache_bump("errors")
+    if cached is not None:
+        _radar_cache_bump("hits")
+        return cached
+    _radar_cache_bump("misses")
+    return None
+
+
+def _radar_cache_store(key: str, model: str, reply: str) -> None:
+    from app.db import radar_cache_put
+
+    if RADAR_CACHE_ENABLED and reply:
+        try:
+            radar_cache_put(key, model, reply, RADAR_CACHE_MAX)
+        except Exception:
+            _radar_cache_bump("errors")
+
+
+def _generate_radar(key: str, model: str, launch_brief: str, extra_notes: str,
+                    user_id: Optional[str], endpoint: str) -> str:
+    with metered(user_id, endpoint, model, intent="RADAR") as m:
+        resp = llm_clients.responses_create(
+            model=model,
+            input=_radar_input(launch_brief, extra_notes),
+            temperature=0.4,
+        )
+        m.set_usage(getattr(resp, "usage", None))
 
     text = ""
     try:
@@ -98,5 +252,64 @@ def call_radar(launch_brief: str, extra_notes: str = "") -> dict:
     except Exception:
         text = str(resp)
 
-    return {"reply": (text or "").strip()}
+    reply = (text or "").strip()
+    _radar_cache_store(key, model, reply)
+    return reply
+
+
+# 같은 brief(캐시 키)로 동시에 들어온 radar 생성은 LLM 호출 하나를 같이 기다린다.
+# 사용량은 실제로 호출한 요청(leader)의 user_id로 기록된다.
+_radar_flight = Group("call_radar")
+
+
+def call_radar(launch_brief: str, extra_notes: str = "", refresh: bool = False,
+               user_id: Optional[str] = None, endpoint: str = "radar") -> dict:
+    """
+    Radar 리포트 생성. 캐시에 있으면 바로 반환(cached=True).
+    refresh=True면 캐시를 건너뛰고 새로 생성한 결과로 캐시를 덮어쓴다.
+    캐시 미스인데 예산을 넘었으면 LLMBudgetExceeded.
+    """
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
+    key = radar_cache_key(launch_brief, extra_notes, model)
+
+    cached = _radar_cache_lookup(key, refresh)
+    if cached is not None:
+        return {"reply": cached, "cached": True}
+
+    check_budget(user_id)
+    reply = _radar_flight.do((key, refresh), _generate_radar,
+                             key, model, launch_brief, extra_notes, user_id, endpoint)
+    return {"reply": reply, "cached": False}
+
+
+def stream_radar(launch_brief: str, extra_notes: str = "", refresh: bool = False,
+                 user_id: Optional[str] = None, endpoint: str = "radar") -> Iterator[dict]:
+    """
+    call_radar의 스트리밍 버전.
+    {"delta": str}을 도착하는 대로 내보내고 마지막에 {"done": True, "reply", "cached"}.
+    캐시 히트면 전체 리포트를 delta 한 번으로 보낸다. 스트림이 끝까지 온 경우에만 캐시에 저장.
+    """
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
+    key = radar_cache_key(launch_brief, extra_notes, model)
+
+    cached = _radar_cache_lookup(key, refresh)
+    if cached is not None:
+        yield {"delta": cached}
+        yield {"done": True, "reply": cached, "cached": True}
+        return
+
+    check_budget(user_id)
+    parts = []
+    with metered(user_id, endpoint, model, intent="RADAR") as m:
+        with closing(llm_clients.responses_stream(
+            model=model,
+            input=_radar_input(launch_brief, extra_notes),
+            temperature=0.4,
+        )) as events:
+            for delta in _text_deltas(events, m):
+                parts.append(delta)
+                yield {"delta": delta}
 
+    reply = "".join(parts).strip()
+    _radar_cache_store(key, model, reply)
+    yield {"done": True, "reply": reply, "cached": False}
@@ -0,0 +1,253 @@
+"""
+LLM 백엔드 선택(LLM_BACKEND).
+
+- openai: 실제 OpenAI API (OPENAI_API_KEY 필요)
+- fake:   로컬 가짜 모델. 네트워크/토큰 비용 없이 /chat, /radar 전체 경로를 부하 테스트할 때 쓴다.
+
+백엔드는 OpenAI 클라이언트와 같은 모양(client.responses.create(...))만 맞추면 되고,
+llm_clients가 그 위에 동시 호출 제한/재시도 예산/계측을 그대로 건다.
+
+fake 설정:
+- LLM_FAKE_LATENCY_DIST: fixed | uniform | normal | lognormal (기본 lognormal)
+- LLM_FAKE_LATENCY_MS: 지연 중앙값(ms). uniform이면 [ms*(1-jitter), ms*(1+jitter)]
+- LLM_FAKE_LATENCY_JITTER: normal이면 표준편차 비율, lognormal이면 sigma
+- LLM_FAKE_TTFT_RATIO: 스트리밍에서 첫 토큰까지 쓰는 지연 비율(나머지는 토큰 사이에 나눠 씀)
+- LLM_FAKE_ERROR_RATE: 호출당 에러 확률(0~1)
+- LLM_FAKE_ERROR_KIND: 500 | 429 | timeout | connection
+- LLM_FAKE_SEED: 난수 시드(재현용)
+"""
+import json
+import math
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import openai
+from openai import OpenAI
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").strip().lower()
+
+LLM_FAKE_LATENCY_DIST = os.getenv("LLM_FAKE_LATENCY_DIST", "lognormal").strip().lower()
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", "800"))
+LLM_FAKE_LATENCY_JITTER = float(os.getenv("LLM_FAKE_LATENCY_JITTER", "0.5"))
+LLM_FAKE_TTFT_RATIO = float(os.getenv("LLM_FAKE_TTFT_RATIO", "0.3"))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+LLM_FAKE_ERROR_KIND = os.getenv("LLM_FAKE_ERROR_KIND", "500").strip().lower()
+LLM_FAKE_SEED = os.getenv("LLM_FAKE_SEED")
+
+_FAKE_URL = "https://fake.llm.local/v1/responses"
+
+
+# --- openai ---
+def _api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY", "").strip()
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    return api_key
+
+
+def _openai_sync(http: httpx.Client) -> OpenAI:
+    return OpenAI(api_key=_api_key(), http_client=http, max_retries=0)
+
+
+# --- fake ---
+class FakeModel:
+    """SYSTEM 계약(intent/need_question/slot/question/final/reply)을 따르는 결정적 응답 + 지연/에러 샘플링."""
+
+    def __init__(self, dist: str = LLM_FAKE_LATENCY_DIST, latency_ms: float = LLM_FAKE_LATENCY_MS,
+                 jitter: float = LLM_FAKE_LATENCY_JITTER, ttft_ratio: float = LLM_FAKE_TTFT_RATIO,
+                 error_rate: float = LLM_FAKE_ERROR_RATE, error_kind: str = LLM_FAKE_ERROR_KIND,
+                 seed: Optional[str] = LLM_FAKE_SEED):
+        if dist not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown LLM_FAKE_LATENCY_DIST: {dist}")
+        self.dist = dist
+        self.latency_ms = max(0.0, latency_ms)
+        self.jitter = max(0.0, jitter)
+        self.ttft_ratio = min(1.0, max(0.0, ttft_ratio))
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.error_kind = error_kind
+        self.rng = random.Random(seed)
+
+    # 지연/에러
+    def sample_latency_s(self) -> float:
+        m, j = self.latency_ms, self.jitter
+        if self.dist == "fixed":
+            ms = m
+        elif self.dist == "uniform":
+            ms = self.rng.uniform(m * (1 - j), m * (1 + j))
+        elif self.dist == "normal":
+            ms = self.rng.gauss(m, m * j)
+        else:
+            ms = m * math.exp(self.rng.gauss(0.0, j))
+        return max(0.0, ms) / 1000.0
+
+    def maybe_error(self, timeout: Optional[float]) -> Optional[Exception]:
+        if self.error_rate <= 0 or self.rng.random() >= self.error_rate:
+            return None
+        req = httpx.Request("POST", _FAKE_URL)
+        if self.error_kind == "timeout":
+            return openai.APITimeoutError(request=req)
+        if self.error_kind == "connection":
+            return openai.APIConnectionError(request=req)
+        if self.error_kind == "429":
+            return openai.RateLimitError("fake rate limit", response=httpx.Response(429, request=req), body=None)
+        return openai.InternalServerError("fake server error", response=httpx.Response(500, request=req), body=None)
+
+    # 응답 내용
+    def reply_for(self, kwargs: Dict[str, Any]) -> str:
+        messages = kwargs.get("input") or []
+        system = messages[0].get("content", "") if messages else ""
+        user = messages[-1].get("content", "") if messages else ""
+        if "Radar" in system:
+            return _fake_radar(user)
+        try:
+            payload = json.loads(user)
+        except (TypeError, json.JSONDecodeError):
+            payload = {"user_message": str(user), "known_slots": []}
+        return json.dumps(_fake_chat(payload.get("user_message") or "", payload.get("known_slots") or []),
+                          ensure_ascii=False)
+
+    def usage(self, kwargs: Dict[str, Any], text: str) -> SimpleNamespace:
+        # 대략 3글자당 1토큰
+        prompt = sum(len(str(m.get("content", ""))) for m in (kwargs.get("input") or []))
+        return SimpleNamespace(
+            input_tokens=prompt // 3 + 1,
+            output_tokens=len(text) // 3 + 1,
+            input_tokens_details=SimpleNamespace(cached_tokens=0),
+        )
+
+
+_LAUNCH_WORDS = ("런칭", "출시", "기획", "launch")
+_RADAR_WORDS = ("트렌드", "리뷰", "랭킹", "바이럴", "trend", "review")
+
+
+def _fake_chat(user_message: str, known_slots: List[str]) -> Dict[str, Any]:
+    from app.slots import extract_slots_from_text, plan_question, render_launch_brief
+
+    brief = user_message.startswith("(brief 답변)")
+    msg = user_message.replace("(brief 답변)", "", 1).strip()
+    low = msg.lower()
+    if brief or any(w in low for w in _LAUNCH_WORDS):
+        slots = dict(a.split(":", 1) for a in known_slots if ":" in a)
+        slots.update(extract_slots_from_text(msg))
+        question, bundle = plan_question(slots)
+        if bundle:
+            return {"intent": "LAUNCH", "need_question": True, "slot": bundle[0],
+                    "question": question, "final": False, "reply": question}
+        return {"intent": "LAUNCH", "need_question": False, "slot": None, "question": None,
+                "final": True, "reply": render_launch_brief(slots)}
+    if any(w in low for w in _RADAR_WORDS):
+        return {"intent": "RADAR", "need_question": False, "slot": None, "question": None, "final": False,
+                "reply": f"[Radar]\n- 요청: {msg}\n- 반복 니즈: 가벼운 텍스처, 백탁 적음\n- 리스크: 눈 시림, 밀림"}
+    return {"intent": "CHAT", "need_question": False, "slot": None, "question": None, "final": False,
+            "reply": f"(fake) {msg}"}
+
+
+def _fake_radar(user: str) -> str:
+    first = next((line for line in str(user).splitlines() if line.startswith("- ")), "- (brief)")
+    return "\n".join([
+        "1) 핵심 인사이트",
+        f"- {first[2:]} 기준으로 경쟁 제품 리뷰 재확인",
+        "- 가벼운 텍스처/백탁 적음 니즈 반복",
+        "- 민감 피부용 진정 클레임 수요",
+        "2) 리뷰/FAQ 리스크",
+        "- 눈 시림", "- 밀림", "- 건조함",
+        "3) 차별화 각도",
+        "- 무기자차 톤업 없이 투명 마무리", "- 덧바르기 쉬운 제형", "- 민감 테스트 완료 표기",
+        "4) 다음 리서치 액션",
+        "- 아마존 상위 10개 리뷰 분류", "- 가격대별 용량 비교", "- 채널별 프로모션 캘린더 확인",
+    ])
+
+
+def _chunks(text: str, n: int = 8) -> List[str]:
+    return [text[i:i + n] for i in range(0, len(text), n)] or [""]
+
+
+def _stream_plan(model: FakeModel, text: str, total_s: float) -> List[Tuple[float, str]]:
+    # (이 조각 전에 쉴 시간, 조각): 첫 조각 전에 TTFT, 나머지는 균등
+    parts = _chunks(text)
+    ttft = total_s * model.ttft_ratio
+    per = (total_s - ttft) / max(1, len(parts) - 1) if len(parts) > 1 else 0.0
+    return [(ttft if i == 0 else per, p) for i, p in enumerate(parts)]
+
+
+def _delta_event(i: int, text: str) -> SimpleNamespace:
+    return SimpleNamespace(type="response.output_text.delta", delta=text, sequence_number=i)
+
+
+def _completed_event(i: int, usage: SimpleNamespace) -> SimpleNamespace:
+    return SimpleNamespace(type="response.completed", sequence_number=i, response=SimpleNamespace(usage=usage))
+
+
+class FakeStream:
+    def __init__(self, events: Iterator[SimpleNamespace]):
+        self._events = events
+
+    def __iter__(self):
+        return self._events
+
+    def close(self) -> None:
+        close = getattr(self._events, "close", None)
+        if close:
+            close()
+
+
+class _FakeResponses:
+    def __init__(self, model: FakeModel):
+        self.model = model
+
+    def _prepare(self, kwargs: Dict[str, Any]) -> Tuple[float, Optional[float], Optional[Exception]]:
+        timeout = kwargs.get("timeout")
+        total = self.model.sample_latency_s()
+        return total, timeout, self.model.maybe_error(timeout)
+
+    def create(self, stream: bool = False, **kwargs):
+        total, timeout, err = self._prepare(kwargs)
+        if timeout is not None and total > timeout:
+            time.sleep(timeout)
+            raise openai.APITimeoutError(request=httpx.Request("POST", _FAKE_URL))
+        if err is not None:
+            time.sleep(total * self.model.ttft_ratio)
+            raise err
+        text = self.model.reply_for(kwargs)
+        usage = self.model.usage(kwargs, text)
+        if not stream:
+            time.sleep(total)
+            return SimpleNamespace(output_text=text, usage=usage)
+
+        def events():
+            plan = _stream_plan(self.model, text, total)
+            for i, (wait, part) in enumerate(plan):
+                time.sleep(wait)
+                yield _delta_event(i, part)
+            yield _completed_event(len(plan), usage)
+        return FakeStream(events())
+
+
+class FakeOpenAI:
+    """OpenAI 클라이언트 중 llm_clients가 쓰는 부분(responses.create)만 흉내낸다."""
+
+    def __init__(self, model: Optional[FakeModel] = None):
+        self.responses = _FakeResponses(model or FakeModel())
+
+
+# --- registry ---
+# name -> 클라이언트 팩토리(httpx.Client)
+BACKENDS: Dict[str, Callable[[httpx.Client], Any]] = {
+    "openai": _openai_sync,
+    "fake": lambda http: FakeOpenAI(),
+}
+
+
+def register_backend(name: str, factory: Callable[[httpx.Client], Any]) -> None:
+    BACKENDS[name.strip().lower()] = factory
+
+
+def get_backend(name: str) -> Callable[[httpx.Client], Any]:
+    try:
+        return BACKENDS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"unknown LLM_BACKEND: {name} (choices: {', '.join(sorted(BACKENDS))})")
@@ -0,0 +1,211 @@
+"""
+프로세스 전역 OpenAI 클라이언트 관리.
+
+call_llm/call_radar가 매번 OpenAI(...)를 새로 만들면 호출마다 TLS 연결과 httpx 풀을 새로 잡는다.
+여기서 클라이언트를 한 번만 만들고(keep-alive 풀 공유),
+- 동시 호출 수 제한(LLM_MAX_IN_FLIGHT, 초과분은 대기열에서 LLM_QUEUE_TIMEOUT_S까지 대기)
+- 호출별 timeout(LLM_TIMEOUT_S)
+- 재시도 예산: 지수 backoff + full jitter, 전체 재시도 수는 성공 호출 수의 LLM_RETRY_BUDGET_RATIO 이내
+를 건다.
+실제 클라이언트는 LLM_BACKEND(app.llm_backends)로 고른다(openai | fake).
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+import openai
+
+from app.llm_backends import LLM_BACKEND, get_backend
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "30"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BASE_MS = int(os.getenv("LLM_RETRY_BASE_MS", "250"))
+LLM_RETRY_MAX_MS = int(os.getenv("LLM_RETRY_MAX_MS", "4000"))
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code >= 500
+    return False
+
+
+class RetryBudget:
+    """
+    재시도 토큰 버킷. 성공한 호출마다 ratio만큼 채워지고 재시도마다 1 소모.
+    업스트림이 계속 실패할 때 재시도가 트래픽을 몇 배로 불리지 않게 한다.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+def _backoff_s(attempt: int) -> float:
+    cap = min(LLM_RETRY_MAX_MS, LLM_RETRY_BASE_MS * (2 ** attempt))
+    return random.uniform(0, cap) / 1000.0
+
+
+class LLMClientManager:
+    def __init__(self, backend: str = LLM_BACKEND):
+        self._lock = threading.Lock()
+        self.backend = backend
+        self._sync: Optional[Any] = None
+        self._http: Optional[httpx.Client] = None
+        self._sem = threading.BoundedSemaphore(max(1, LLM_MAX_IN_FLIGHT))
+        self.budget = RetryBudget(LLM_RETRY_BUDGET_RATIO)
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.queue_timeouts = 0
+
+    # --- clients ---
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(LLM_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S)
+
+    def sync_client(self) -> Any:
+        with self._lock:
+            if self._sync is None:
+                factory = get_backend(self.backend)
+                self._http = httpx.Client(limits=self._limits(), timeout=self._timeout())
+                self._sync = factory(self._http)
+            return self._sync
+
+    def use_backend(self, name: str) -> None:
+        """백엔드 교체(벤치마크/리플레이용). 기존 클라이언트는 닫고 다음 호출에서 새로 만든다."""
+        get_backend(name)
+        self.close()
+        self.backend = name
+
+    def close(self) -> None:
+        with self._lock:
+            http, self._http, self._sync = self._http, None, None
+        if http is not None:
+            http.close()
+
+    # --- concurrency ---
+    def _count(self, attr: str, delta: int) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + delta)
+
+    @contextmanager
+    def slot(self):
+        """동시 호출 제한 슬롯(sync)."""
+        self._count("waiting", 1)
+        ok = self._sem.acquire(timeout=LLM_QUEUE_TIMEOUT_S)
+        self._count("waiting", -1)
+        if not ok:
+            self._count("queue_timeouts", 1)
+            raise RuntimeError("LLM queue timeout")
+        self._count("in_flight", 1)
+        try:
+            yield
+        finally:
+            self._count("in_flight", -1)
+            self._sem.release()
+
+    # --- calls ---
+    def responses_create(self, **kwargs) -> Any:
+        kwargs.setdefault("timeout", LLM_TIMEOUT_S)
+        client = self.sync_client()
+        with self.slot():
+            attempt = 0
+            while True:
+                self._count("calls", 1)
+                try:
+                    resp = client.responses.create(**kwargs)
+                    self.budget.deposit()
+                    return resp
+                except Exception as e:
+                    self._count("errors", 1)
+                    if attempt >= LLM_MAX_RETRIES or not _retryable(e) or not self.budget.withdraw():
+                        raise
+                    self._count("retries", 1)
+                    time.sleep(_backoff_s(attempt))
+                    attempt += 1
+
+    def responses_stream(self, **kwargs) -> Iterator[Any]:
+        """
+        responses.create(stream=True)의 이벤트를 흘려준다. 스트림이 끝날 때까지 슬롯을 잡고 있는다.
+        재시도는 스트림을 열 때까지만(이미 토큰을 내보낸 뒤에는 재시도하지 않는다).
+        """
+        kwargs.setdefault("timeout", LLM_TIMEOUT_S)
+        client = self.sync_client()
+        with self.slot():
+            attempt = 0
+            while True:
+                self._count("calls", 1)
+                try:
+                    stream = client.responses.create(stream=True, **kwargs)
+                    break
+                except Exception as e:
+                    self._count("errors", 1)
+                    if attempt >= LLM_MAX_RETRIES or not _retryable(e) or not self.budget.withdraw():
+                        raise
+                    self._count("retries", 1)
+                    time.sleep(_backoff_s(attempt))
+                    attempt += 1
+            try:
+                yield from stream
+                self.budget.deposit()
+            except Exception:
+                self._count("errors", 1)
+                raise
+            finally:
+                stream.close()
+
+    def stats(self) -> Dict[str, Any]:
+        pool = None
+        try:
+            # httpcore 내부 풀 상태(최선 노력)
+            conns = self._http._transport._pool.connections if self._http else []
+            pool = {
+                "connections": len(conns),
+                "idle": sum(1 for c in conns if c.is_idle()),
+            }
+        except Exception:
+            pass
+        return {
+            "backend": self.backend,
+            "max_in_flight": LLM_MAX_IN_FLIGHT,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "errors": self.errors,
+            "queue_timeouts": self.queue_timeouts,
+            "retry_budget_tokens": round(self.budget.tokens, 2),
+            "pool": pool,
+        }
+
+
+llm_clients = LLMClientManager()
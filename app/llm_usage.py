@@ -0,0 +1,134 @@
+"""
+LLM 호출 사용량/지연 계측 + 일일 토큰 예산.
+
+call_llm/call_radar(및 스트리밍 버전)가 호출마다 metered()로 감싸서
+input/cached/output 토큰과 지연(ms)을 llm_usage_daily에 (day, user_id, endpoint, intent, model)별로 누적한다.
+
+예산(0이면 무제한, 하루 = UTC 날짜):
+- LLM_BUDGET_USER_DAILY_TOKENS: 사용자별 input+output 토큰
+- LLM_BUDGET_GLOBAL_DAILY_TOKENS: 전체 input+output 토큰
+넘으면 LLM 호출 전에 LLMBudgetExceeded를 던지고, 호출하는 쪽(main)이 로컬 경로로 대체한다.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+LLM_USAGE_ENABLED = os.getenv("LLM_USAGE_ENABLED", "1") != "0"
+LLM_BUDGET_USER_DAILY_TOKENS = int(os.getenv("LLM_BUDGET_USER_DAILY_TOKENS", "0"))
+LLM_BUDGET_GLOBAL_DAILY_TOKENS = int(os.getenv("LLM_BUDGET_GLOBAL_DAILY_TOKENS", "0"))
+
+ANON_USER = "-"
+
+_lock = threading.Lock()
+_counters = {"recorded": 0, "record_errors": 0, "budget_denied_user": 0, "budget_denied_global": 0}
+
+
+class LLMBudgetExceeded(RuntimeError):
+    def __init__(self, scope: str, used: int, limit: int):
+        super().__init__(f"LLM {scope} daily token budget exceeded ({used}/{limit})")
+        self.scope = scope
+        self.used = used
+        self.limit = limit
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _bump(name: str) -> None:
+    with _lock:
+        _counters[name] += 1
+
+
+def check_budget(user_id: Optional[str]) -> None:
+    """예산을 넘었으면 LLMBudgetExceeded. 예산이 꺼져 있으면 DB를 읽지 않는다."""
+    if not (LLM_BUDGET_USER_DAILY_TOKENS or LLM_BUDGET_GLOBAL_DAILY_TOKENS):
+        return
+    from app.db import llm_tokens_on
+
+    day = _today()
+    if LLM_BUDGET_USER_DAILY_TOKENS and user_id:
+        used = llm_tokens_on(day, user_id)
+        if used >= LLM_BUDGET_USER_DAILY_TOKENS:
+            _bump("budget_denied_user")
+            raise LLMBudgetExceeded("user", used, LLM_BUDGET_USER_DAILY_TOKENS)
+    if LLM_BUDGET_GLOBAL_DAILY_TOKENS:
+        used = llm_tokens_on(day)
+        if used >= LLM_BUDGET_GLOBAL_DAILY_TOKENS:
+            _bump("budget_denied_global")
+            raise LLMBudgetExceeded("global", used, LLM_BUDGET_GLOBAL_DAILY_TOKENS)
+
+
+class Meter:
+    """metered() 블록 안에서 호출 결과(usage/intent)를 채워 넣는 그릇."""
+
+    def __init__(self, intent: str = ""):
+        self.intent = intent
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+
+    def set_usage(self, usage: Any) -> None:
+        # Responses API usage: input_tokens, output_tokens, input_tokens_details.cached_tokens
+        if usage is None:
+            return
+        self.input_tokens = getattr(usage, "input_tokens", 0) or 0
+        self.output_tokens = getattr(usage, "output_tokens", 0) or 0
+        details = getattr(usage, "input_tokens_details", None)
+        self.cached_tokens = getattr(details, "cached_tokens", 0) or 0
+
+    def estimate(self, prompt_chars: int, output_text: str) -> None:
+        # usage를 못 받은 경우(스트림을 중간에 닫음)의 대략치: 3글자당 1토큰
+        self.input_tokens = prompt_chars // 3 + 1
+        self.output_tokens = len(output_text) // 3 + 1
+
+
+@contextmanager
+def metered(user_id: Optional[str], endpoint: str, model: str, intent: str = ""):
+    """블록 실행 시간을 재고 끝나면(예외 포함) llm_usage_daily에 한 번 기록한다."""
+    m = Meter(intent)
+    t0 = time.perf_counter()
+    error = False
+    try:
+        yield m
+    except GeneratorExit:
+        # 스트림을 클라이언트가 중간에 끊은 경우: 에러로 세지 않는다
+        raise
+    except BaseException:
+        error = True
+        raise
+    finally:
+        if LLM_USAGE_ENABLED:
+            try:
+                from app.db import record_llm_usage
+                record_llm_usage(
+                    user_id or ANON_USER, endpoint, (m.intent or "-").upper(), model,
+                    input_tokens=m.input_tokens, cached_tokens=m.cached_tokens,
+                    output_tokens=m.output_tokens,
+                    latency_ms=(time.perf_counter() - t0) * 1000.0, error=error,
+                )
+                _bump("recorded")
+            except Exception:
+                _bump("record_errors")
+
+
+def budget_status(user_id: Optional[str] = None) -> Dict[str, Any]:
+    from app.db import llm_tokens_on
+
+    day = _today()
+    out: Dict[str, Any] = {
+        "day": day,
+        "global": {"used": llm_tokens_on(day), "limit": LLM_BUDGET_GLOBAL_DAILY_TOKENS or None},
+    }
+    if user_id:
+        out["user"] = {"user_id": user_id, "used": llm_tokens_on(day, user_id),
+                       "limit": LLM_BUDGET_USER_DAILY_TOKENS or None}
+    return out
+
+
+def usage_stats() -> Dict[str, Any]:
+    with _lock:
+        return {"enabled": LLM_USAGE_ENABLED, **_counters}
@@ -0,0 +1,237 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.db import insert_log, insert_logs
+
+# 환경변수 설정
+# - LOG_WRITER_ENABLED=0 이면 기존처럼 요청 경로에서 바로 insert_log
+# - LOG_WRITER_BATCH: 이 개수가 모이면 바로 flush
+# - LOG_WRITER_INTERVAL_MS: 첫 행이 들어온 뒤 이 시간이 지나면 flush
+# - LOG_WRITER_QUEUE_MAX: 큐가 가득 차면 새 행은 버리고 dropped로 센다
+LOG_WRITER_ENABLED = os.getenv("LOG_WRITER_ENABLED", "1") != "0"
+LOG_WRITER_BATCH = int(os.getenv("LOG_WRITER_BATCH", "200"))
+LOG_WRITER_INTERVAL_MS = int(os.getenv("LOG_WRITER_INTERVAL_MS", "200"))
+LOG_WRITER_QUEUE_MAX = int(os.getenv("LOG_WRITER_QUEUE_MAX", "10000"))
+# - LOG_WRITER_RETRIES / LOG_WRITER_RETRY_BASE_MS: "database is locked" 같은 일시 오류는 backoff로 재시도
+# - LOG_WRITER_READ_WAIT_MS: wait_for_user()가 그 사용자의 대기 행 저장을 기다리는 최대 시간
+LOG_WRITER_RETRIES = int(os.getenv("LOG_WRITER_RETRIES", "4"))
+LOG_WRITER_RETRY_BASE_MS = int(os.getenv("LOG_WRITER_RETRY_BASE_MS", "50"))
+LOG_WRITER_READ_WAIT_MS = int(os.getenv("LOG_WRITER_READ_WAIT_MS", "2000"))
+
+# 큐에 넣으면 writer가 모으던 배치를 바로 저장한다(wait_for_user용)
+_FLUSH = ("__flush__",)
+
+
+class LogWriter:
+    """
+    write-behind 로그 writer.
+    respond()는 submit()으로 큐에 넣기만 하고, 백그라운드 스레드가
+    N행 또는 M밀리초마다 insert_logs(executemany 1회 + COMMIT 1회)로 저장한다.
+    stop()은 큐를 끝까지 비운 뒤 종료하므로 정상 종료 시 유실이 없다.
+    사용자별 대기 행 수를 세어 두므로, 방금 쓴 행을 바로 읽어야 하는 경로(예: 최근 Launch Brief)는
+    wait_for_user()로 그 사용자의 행이 저장될 때까지 기다린다.
+    """
+
+    def __init__(self, batch_size: int = 200, interval_ms: int = 200, queue_max: int = 10000):
+        self.batch_size = max(1, int(batch_size))
+        self.interval_s = max(1, int(interval_ms)) / 1000.0
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, int(queue_max)))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._saved = threading.Condition(self._lock)
+        self._pending: Dict[str, int] = {}
+        self.written = 0
+        self.retries = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """남은 행을 모두 저장하고 스레드를 종료한다."""
+        with self._lock:
+            t, self._thread = self._thread, None
+        if t is None:
+            return
+        self._q.put(None)  # sentinel (큐가 가득 차 있으면 자리가 날 때까지 기다린다)
+        t.join(timeout)
+
+    def submit(
+        self,
+        user_id: str,
+        state: str,
+        message: str,
+        reply: str,
+        slots_json: Optional[str] = None,
+    ) -> bool:
+        row = (user_id, state, message, reply, slots_json)
+        if not self.running:
+            # writer가 안 떠 있으면(스크립트/비활성화) 동기 저장
+            insert_log(*row)
+            with self._lock:
+                self.written += 1
+            return True
+        with self._lock:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        try:
+            self._q.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._done_user(user_id)
+            return False
+
+    def _done_user(self, user_id: str) -> None:
+        # self._lock을 잡은 상태에서 호출
+        n = self._pending.get(user_id, 0) - 1
+        if n > 0:
+            self._pending[user_id] = n
+        else:
+            self._pending.pop(user_id, None)
+            self._saved.notify_all()
+
+    def wait_for_user(self, user_id: str, timeout_ms: int = LOG_WRITER_READ_WAIT_MS) -> bool:
+        """
+        user_id의 submit된 행이 모두 저장(또는 최종 실패)될 때까지 기다린다. 기다리는 동안 바로 flush시킨다.
+        대기 행이 없으면 즉시 True, timeout이면 False.
+        """
+        with self._lock:
+            if not self._pending.get(user_id):
+                return True
+        try:
+            self._q.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+        with self._lock:
+            return self._saved.wait_for(lambda: not self._pending.get(user_id), timeout_ms / 1000.0)
+
+    def flush(self) -> None:
+        """지금까지 submit된 행이 모두 저장될 때까지 기다린다."""
+        if self.running:
+            self._q.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self._q.qsize(),
+            "queue_max": self._q.maxsize,
+            "batch_size": self.batch_size,
+            "interval_ms": int(self.interval_s * 1000),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors,
+            "retries": self.retries,
+            "last_error": self.last_error,
+            "pending_users": len(self._pending),
+        }
+
+    def _write(self, batch: List[tuple]) -> None:
+        attempt = 0
+        while True:
+            try:
+                insert_logs(batch)
+                with self._lock:
+                    self.written += len(batch)
+                    self.batches += 1
+                break
+            except sqlite3.OperationalError as e:
+                # locked/busy 등 일시 오류: backoff 후 재시도, 다 쓰면 버린다
+                if attempt < LOG_WRITER_RETRIES:
+                    attempt += 1
+                    with self._lock:
+                        self.retries += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                    time.sleep(LOG_WRITER_RETRY_BASE_MS * (2 ** (attempt - 1)) / 1000.0)
+                    continue
+                self._fail(batch, e)
+                break
+            except Exception as e:
+                self._fail(batch, e)
+                break
+        with self._lock:
+            for row in batch:
+                self._done_user(row[0])
+
+    def _fail(self, batch: List[tuple], e: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+            self.dropped += len(batch)
+            self.last_error = f"{type(e).__name__}: {e}"
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._q.get()
+            if first is None:
+                self._q.task_done()
+                break
+            if first is _FLUSH:
+                self._q.task_done()
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.interval_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None or item is _FLUSH:
+                    stopping = item is None
+                    self._q.task_done()
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in batch:
+                self._q.task_done()
+
+        # 종료 중: sentinel 뒤에 남은 행까지 비운다
+        rest: List[tuple] = []
+        taken = 0
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            taken += 1
+            if item is not None and item is not _FLUSH:
+                rest.append(item)
+        for i in range(0, len(rest), self.batch_size):
+            self._write(rest[i:i + self.batch_size])
+        for _ in range(taken):
+            self._q.task_done()
+
+
+log_writer = LogWriter(
+    batch_size=LOG_WRITER_BATCH,
+    interval_ms=LOG_WRITER_INTERVAL_MS,
+    queue_max=LOG_WRITER_QUEUE_MAX,
+)
+
+
+def start_log_writer() -> None:
+    if LOG_WRITER_ENABLED:
+        log_writer.start()
+
+
+def stop_log_writer() -> None:
+    log_writer.stop()
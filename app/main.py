@@ -1,8 +1,10 @@
-﻿from fastapi import FastAPI
+﻿from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, StreamingResponse
 import traceback
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, field_validator
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict
@@ -11,14 +13,26 @@ import os
 import re
 import re
 import json
-from app.db import init_db, insert_log, fetch_logs
+import time
+import zlib
+from urllib.parse import quote
+import asyncio
+from functools import partial
+
+import anyio
+import anyio.to_thread
+from app.db import init_db, fetch_logs, db_stats, close_all_conns, apply_signal_retention, query_llm_usage
+from app.db import GLOBAL_SCOPE, fetch_latest_launch_brief
+from app import adb
+from app.logwriter import log_writer, start_log_writer, stop_log_writer
+from app.archive import archive_logs, archive_stats
 from app.signals import fetch_reddit, build_pulse_from_signals, build_alerts_from_signals, fetch_social_signals
-from app.insights import make_pulse, make_alerts
+from app.insights import make_pulse, make_pulse_from_aggregates, make_alerts_from_aggregates
 
 def respond(session, state, message, reply):
     """
     공통 응답 헬퍼:
-    - 로그 저장(insert_log)
+    - 로그 저장(write-behind 큐에 넣기만 함, 실제 INSERT는 log_writer 스레드)
     - ChatOut 반환
     """
     try:
@@ -29,13 +43,21 @@ def respond(session, state, message, reply):
         slots_json = None
 
     try:
-        insert_log(session.user_id, state, message, reply, slots_json)
+        log_writer.submit(session.user_id, state, message, reply, slots_json)
     except Exception:
         pass
 
     return ChatOut(user_id=session.user_id, state=state, reply=reply)
-from app.llm import call_llm, call_radar
-from app.slots import extract_slots_from_text, infer_slot, has_required_slots, render_launch_brief
+from app.llm import call_llm, call_radar, radar_cache_stats
+from app.llm import route_llm, stream_llm_fields, stream_radar
+from app.llm_client import llm_clients
+from app.llm_usage import LLMBudgetExceeded, budget_status, usage_stats
+from app.singleflight import singleflight_stats
+from app.signals import lexicon_stats, afetch_social_signals
+from app.fetch_cache import fetch_cache_stats
+from app.http_pool import http_pool, http_pool_stats
+from app.slots import extract_slots_from_text, infer_slots, has_required_slots, render_launch_brief
+from app.slots import REQUIRED_SLOTS, missing_slots, plan_question, split_answer
 from app.slots import extract_slots_from_text
 
 # --- AUTO PATCH: social pulse (do not edit by hand) ---
@@ -83,7 +105,25 @@ def normalize_log_row(row):
     return {"ts": None, "state": None, "message": None, "reply": str(row), "slots_json": None}
 
 
-app = FastAPI(title="Beauty Agent", version="0.3.3")
+@asynccontextmanager
+async def lifespan(app):
+    start_log_writer()
+    try:
+        apply_signal_retention()
+    except Exception:
+        pass
+    try:
+        yield
+    finally:
+        # 정상 종료 시 큐에 남은 로그를 모두 저장한 뒤 연결을 닫는다
+        stop_log_writer()
+        adb.shutdown()
+        llm_clients.close()
+        http_pool.close()
+        close_all_conns()
+
+
+app = FastAPI(title="Beauty Agent", version="0.3.3", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 @app.exception_handler(Exception)
@@ -106,15 +146,28 @@ class Session:
     state: State = State.CHAT
     # LLM이 요구하는 정보들을 슬롯으로 저장
     slots: Dict[str, str] = field(default_factory=dict)
-    # 지금 질문 중인 슬롯
-    pending_slot: str | None = None
+    # 지금 질문 중인 슬롯들(묶음 질문이면 질문에 나온 순서대로). ["misc"] = 자유 질문
+    pending_slots: list[str] = field(default_factory=list)
 
 SESSIONS: Dict[str, Session] = {}
 
+# BRIEF 중 다음 질문을 로컬 템플릿으로 만들지(0이면 항상 LLM에게 질문 생성 요청)
+BRIEF_LOCAL_QUESTIONS = os.getenv("BRIEF_LOCAL_QUESTIONS", "1") != "0"
+# /chat도 LLM 출력을 스트림으로 받아 필드 단위로 파싱(질문 턴은 reply를 기다리지 않고 라우팅 확정)
+LLM_EARLY_ROUTING = os.getenv("LLM_EARLY_ROUTING", "1") != "0"
+
 class ChatIn(BaseModel):
     user_id: str
     message: str
 
+    @field_validator("user_id")
+    @classmethod
+    def _not_global_scope(cls, v: str) -> str:
+        # slot 집계에서 GLOBAL_SCOPE("*")는 전체 집계 scope라 user_id로 쓰면 섞인다
+        if v == GLOBAL_SCOPE:
+            raise ValueError(f"user_id {GLOBAL_SCOPE!r} is reserved")
+        return v
+
 class ChatOut(BaseModel):
     user_id: str
     state: str
@@ -124,94 +177,196 @@ class RadarIn(BaseModel):
     user_id: str
     brief: str | None = None
     notes: str | None = None
+    # True면 radar 캐시를 건너뛰고 새로 생성
+    refresh: bool = False
 
 class RadarOut(BaseModel):
     user_id: str
     reply: str
 
+class RadarBatchItem(BaseModel):
+    user_id: str | None = None
+    brief: str | None = None
+    notes: str | None = None
+
+class RadarBatchIn(BaseModel):
+    # items: brief를 직접 주거나 user_id만 주면 그 사용자의 최근 Launch Brief
+    items: list[RadarBatchItem] = []
+    # user_ids: items에 {"user_id": ...}로 추가하는 축약형
+    user_ids: list[str] = []
+    notes: str | None = None
+    refresh: bool = False
+    concurrency: int | None = None
+
 @app.get("/health")
 def health():
     return {"ok": True, "version": "0.3.3"}
 
-@app.post("/chat", response_model=ChatOut)
-def chat(payload: ChatIn):
-    session = SESSIONS.get(payload.user_id)
+def _get_session(user_id: str) -> Session:
+    session = SESSIONS.get(user_id)
     if session is None:
-        session = Session(user_id=payload.user_id)
-        SESSIONS[payload.user_id] = session
-
-    msg = payload.message.strip()
+        session = Session(user_id=user_id)
+        SESSIONS[user_id] = session
+    return session
 
+def _chat_local(session: Session, msg: str):
+    """
+    LLM 없이 처리할 수 있는 턴이면 ChatOut, LLM이 필요하면 (user_message, brief_answers).
+    /chat과 /chat/stream이 같이 쓴다.
+    """
     # reset
     if msg in ["리셋", "reset", "/reset", "취소", "그만"]:
         session.state = State.CHAT
         session.slots = {}
-        session.pending_slot = None
+        session.pending_slots = []
         return respond(session, "CHAT", msg, "초기화했어. 다시 말해줘.")
 
-    # BRIEF: 사용자가 답하면 pending_slot에 저장 후 다음 행동을 LLM에 요청
+    # BRIEF: 사용자가 답하면 pending_slots에 나눠 저장 후 다음 행동을 LLM에 요청
     if session.state == State.BRIEF:
-        if session.pending_slot:
-            session.slots[session.pending_slot] = msg
-
-            # BRIEF 답변에서도 자동 슬롯 추출(가격/채널/니즈 등)
-
-            auto = extract_slots_from_text(msg)
-
-            session.slots.update(auto)
-# 슬롯이 충분하면 LLM 추가 질문 없이 바로 종료
-
-
+        if session.pending_slots:
+            # 묶음 질문의 답을 슬롯별로 나눈다(자동 추출 슬롯 포함). 이미 값이 있는 슬롯은 덮어쓰지 않는다
+            session.slots.update(split_answer(msg, session.pending_slots, known=session.slots))
+            # misc 등 자유 항목은 답 원문 그대로
+            for k in session.pending_slots:
+                if k not in REQUIRED_SLOTS:
+                    session.slots[k] = msg
+
+        # 슬롯이 충분하면 LLM 추가 질문 없이 바로 종료
         if has_required_slots(session.slots):
-
-
             session.state = State.CHAT
-
-
-            session.pending_slot = None
-
-
+            session.pending_slots = []
             return respond(session, "CHAT", msg, render_launch_brief(session.slots))
 
+        # 특정 슬롯 질문에 대한 답이었으면 다음 질문은 로컬에서 만든다(LLM 왕복 생략).
+        # pending_slots가 없거나 misc(자유 질문)일 때만 LLM에게 넘긴다.
+        if BRIEF_LOCAL_QUESTIONS and session.pending_slots and all(k in REQUIRED_SLOTS for k in session.pending_slots):
+            question, bundle = plan_question(session.slots)
+            session.pending_slots = bundle
+            return respond(session, "BRIEF", msg, question)
 
+        return "(brief 답변) " + msg, [f"{k}:{v}" for k, v in session.slots.items()]
 
-        data = call_llm(user_message="(brief 답변) " + msg, brief_answers=[f"{k}:{v}" for k, v in session.slots.items()])
+    # CHAT: LLM이 라우팅
+    # 자동 슬롯 추출(초기 메시지에서 country/price/channel/category 등)
+    auto = extract_slots_from_text(msg)
+    session.slots.update(auto)
+    return msg, [f"{k}:{v}" for k, v in session.slots.items()]
 
+def _chat_budget_fallback(session: Session, msg: str) -> ChatOut:
+    """LLM 예산 초과 시: 남은 슬롯은 로컬 질문으로, 다 모였으면 render_launch_brief로."""
+    if has_required_slots(session.slots):
+        session.state = State.CHAT
+        session.pending_slots = []
+        return respond(session, "CHAT", msg, render_launch_brief(session.slots))
+    question, bundle = plan_question(session.slots)
+    session.state = State.BRIEF
+    session.pending_slots = bundle
+    return respond(session, "BRIEF", msg, question)
+
+def _question_slots(data: dict, filled: dict | None = None) -> list[str]:
+    """
+    LLM 질문이 묻는 슬롯들: 질문 문구에서 읽은 순서가 우선, 못 읽으면 LLM의 slot 필드
+    (문자열, "a, b" 또는 리스트), 그것도 없으면 ["misc"].
+    필수 슬롯은 아직 비어 있는 것(missing_slots(filled))만 남긴다
+    ("선크림 타겟 고객..."처럼 이미 채운 슬롯의 단서어가 질문에 들어 있어도 pending이 되지 않게).
+    """
+    missing = set(missing_slots(filled or {}))
+
+    def keep(slots):
+        return [k for k in slots if k not in REQUIRED_SLOTS or k in missing]
+
+    slots = keep(infer_slots(data.get("question") or ""))
+    if slots:
+        return slots
+    slot = data.get("slot")
+    if isinstance(slot, str):
+        slot = re.split(r"[,/|\s]+", slot)
+    slots = keep(k for k in dict.fromkeys(slot or []) if isinstance(k, str) and k)
+    return slots or ["misc"]
+
+def _chat_apply(session: Session, msg: str, data: dict) -> ChatOut:
+    """LLM 응답(JSON)을 상태머신에 반영하고 응답/로그를 만든다."""
+    if session.state == State.BRIEF:
         # final이면 종료
         if data.get("final"):
             session.state = State.CHAT
-            session.pending_slot = None
+            session.pending_slots = []
             return respond(session, "CHAT", msg, data.get("reply", ""))
 
         # 계속 질문
-        q = data.get("question") or ""
-
-        inferred = infer_slot(q)
-
-        slot = data.get("slot")
-
-        session.pending_slot = inferred if inferred != "misc" else (slot or "misc")
+        session.pending_slots = _question_slots(data, session.slots)
         return respond(session, "BRIEF", msg, data.get("question") or "한 가지만 더 알려줘.")
 
-    # CHAT: LLM이 라우팅
-    # 자동 슬롯 추출(초기 메시지에서 country/price/channel/category 등)
-
-    auto = extract_slots_from_text(msg)
-
-    session.slots.update(auto)
-    data = call_llm(user_message=msg, brief_answers=[f"{k}:{v}" for k, v in session.slots.items()])
     if data.get("need_question"):
         session.state = State.BRIEF
-        q = data.get("question") or ""
+        session.pending_slots = _question_slots(data, session.slots)
+        return respond(session, "BRIEF", msg, data.get("question") or "몇 가지만 물어볼게.")
+
+    return respond(session, "CHAT", msg, data.get("reply", ""))
+
+@app.post("/chat", response_model=ChatOut)
+def chat(payload: ChatIn):
+    session = _get_session(payload.user_id)
+    msg = payload.message.strip()
 
-        inferred = infer_slot(q)
+    out = _chat_local(session, msg)
+    if isinstance(out, ChatOut):
+        return out
+    user_message, brief_answers = out
+    llm = route_llm if LLM_EARLY_ROUTING else call_llm
+    try:
+        data = llm(user_message=user_message, brief_answers=brief_answers,
+                   user_id=session.user_id, endpoint="chat")
+    except LLMBudgetExceeded:
+        return _chat_budget_fallback(session, msg)
+    return _chat_apply(session, msg, data)
 
-        slot = data.get("slot")
+def _sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
-        session.pending_slot = inferred if inferred != "misc" else (slot or "misc")
-        return respond(session, "BRIEF", msg, data.get("question") or "몇 가지만 물어볼게.")
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-    return respond(session, "CHAT", msg, data.get("reply", ""))
+def _chat_events(session: Session, msg: str):
+    try:
+        out = _chat_local(session, msg)
+        if isinstance(out, ChatOut):
+            yield _sse("delta", {"text": out.reply})
+            yield _sse("done", out.model_dump())
+            return
+        user_message, brief_answers = out
+        data: dict = {}
+        fields: dict = {}
+        try:
+            for kind, key, value in stream_llm_fields(user_message=user_message, brief_answers=brief_answers,
+                                                      user_id=session.user_id, endpoint="chat/stream"):
+                if kind == "partial":
+                    yield _sse("delta", {"text": value})
+                elif kind == "field":
+                    fields[key] = value
+                    # slot은 스키마상 intent/need_question 다음 -> 여기서 라우팅을 먼저 알린다
+                    if key == "slot":
+                        yield _sse("route", {k: fields.get(k) for k in ("intent", "need_question", "slot")})
+                else:
+                    data = value
+        except LLMBudgetExceeded:
+            yield _sse("done", _chat_budget_fallback(session, msg).model_dump())
+            return
+        # 로그는 스트림이 끝난 뒤 한 번만(respond -> log_writer)
+        yield _sse("done", _chat_apply(session, msg, data).model_dump())
+    except Exception as e:
+        yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+
+@app.post("/chat/stream")
+def chat_stream(payload: ChatIn):
+    """
+    /chat의 SSE 버전. LLM이 만드는 reply를 토큰 단위로 delta 이벤트로 보내고,
+    마지막 done 이벤트에 ChatOut(state/최종 reply)을 담는다.
+    route 이벤트({intent, need_question, slot})는 reply보다 먼저 온다.
+    질문 턴(need_question)이면 done의 reply가 delta로 보낸 내용을 대체한다.
+    """
+    session = _get_session(payload.user_id)
+    return StreamingResponse(_chat_events(session, payload.message.strip()),
+                             media_type="text/event-stream", headers=_SSE_HEADERS)
 
 @app.get("/", include_in_schema=False)
 def home():
@@ -221,36 +376,229 @@ def home():
 
 @app.get("/api", include_in_schema=False)
 def api_meta():
-    return {"name":"Beauty Agent","status":"ok","endpoints":["/health","/chat","/history","/radar"]}
+    return {"name":"Beauty Agent","status":"ok","endpoints":["/health","/chat","/chat/stream","/history","/history/page","/history/export","/search","/radar","/radar/stream","/radar/batch","/signals","/usage"]}
 @app.get("/history")
-def history(user_id: str, limit: int = 20):
-    return fetch_logs(user_id=user_id, limit=limit)
+async def history(user_id: str, limit: int = 20, before_id: int | None = None):
+    return await adb.fetch_logs(user_id=user_id, limit=limit, before_id=before_id)
+
+@app.get("/history/page")
+async def history_page(user_id: str, limit: int = 20, before_id: int | None = None):
+    """
+    keyset 페이지네이션: 응답의 next_before_id를 before_id로 넘기면 더 과거 페이지.
+    """
+    return await adb.fetch_logs_page(user_id=user_id, limit=limit, before_id=before_id)
+
+async def _ndjson_lines(rows):
+    async for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def _gzip_chunks(chunks, flush_bytes: int = 64 * 1024):
+    # 스트림 단위로 압축: 압축기 버퍼만 유지하므로 전체 크기와 무관하게 메모리 일정
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    async for chunk in chunks:
+        out = z.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += z.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield z.flush()
+
+_UNSAFE_FILENAME = re.compile(r'[\x00-\x1f\x7f/\\"]')
+_NON_TOKEN = re.compile(r"[^A-Za-z0-9._-]")
+
+def _attachment_disposition(filename: str) -> str:
+    # user_id가 그대로 들어가는 파일명: 따옴표/경로/제어문자 제거, ASCII 대체 이름 + RFC 5987 UTF-8 이름
+    name = _UNSAFE_FILENAME.sub("_", filename)[:200]
+    return f"attachment; filename=\"{_NON_TOKEN.sub('_', name)}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+@app.get("/history/export")
+async def history_export(request: Request, user_id: str, before_id: int | None = None):
+    """
+    사용자의 전체 히스토리를 최신순 NDJSON으로 스트리밍.
+    Accept-Encoding에 gzip이 있으면 gzip으로 압축해서 보낸다.
+    """
+    body = _ndjson_lines(adb.iter_logs(user_id, before_id=before_id))
+    headers = {"Content-Disposition": _attachment_disposition(f"history-{user_id}.ndjson")}
+    if "gzip" in (request.headers.get("accept-encoding") or "").lower():
+        body = _gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
 
 
+@app.get("/search")
+async def search(q: str, user_id: str | None = None, limit: int = 20, brief_only: bool = False, raw: bool = False):
+    """
+    로그 전문 검색(FTS5). 결과는 관련도(bm25) 순, 매칭 부분은 « »로 표시된 snippet.
+    예) /search?q=백탁 선크림&brief_only=true
+    """
+    try:
+        return {"q": q, "items": await adb.search_logs(q, user_id=user_id, limit=limit, brief_only=brief_only, raw=raw)}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except RuntimeError as e:
+        return JSONResponse(status_code=501, content={"error": str(e)})
+
+@app.get("/signals")
+async def signals(user_id: str, kind: str | None = None, since: str | None = None,
+            until: str | None = None, cursor: str | None = None, limit: int = 100):
+    """
+    signals 시간 범위 조회. since/until은 'YYYY-MM-DD HH:MM:SS'(UTC) 문자열.
+    응답의 next_cursor를 cursor로 넘기면 이어서 과거 페이지를 받는다.
+    """
+    try:
+        return await adb.query_signals(user_id, kind=kind, since=since, until=until, cursor=cursor, limit=limit)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/signals/rollups")
+async def signals_rollups(user_id: str, bucket: str = "hour", kind: str | None = None,
+                    since: str | None = None, until: str | None = None, limit: int = 500):
+    return await adb.query_signal_rollups(user_id, bucket=bucket, kind=kind, since=since, until=until, limit=limit)
 
 
 
+
+
+def _find_launch_brief(user_id: str) -> str:
+    # brief가 없으면 DB history에서 최근 Launch Brief를 찾아 사용
+    # 로그는 write-behind라 방금 끝난 /chat 턴이 아직 큐에 있을 수 있다: 그 사용자 행이 저장될 때까지 기다린다
+    log_writer.wait_for_user(user_id)
+    return fetch_latest_launch_brief(user_id) or ""
+
+_NO_BRIEF_REPLY = "최근 Launch Brief를 찾지 못했어. 먼저 /chat으로 Launch Brief를 만들어줘."
+
+def _radar_budget_reply(brief: str) -> str:
+    return "오늘 LLM 사용 한도를 넘어서 Radar 분석은 건너뛰었어. 대신 Launch Brief를 그대로 보여줄게.\n\n" + brief
+
 @app.post("/radar", response_model=RadarOut)
 def radar(payload: RadarIn):
     user_id = payload.user_id
-    brief = (payload.brief or "").strip()
+    brief = (payload.brief or "").strip() or _find_launch_brief(user_id)
     notes = (payload.notes or "").strip()
 
-    # brief가 없으면 DB history에서 최근 Launch Brief를 찾아 사용
-    if not brief:
-        logs = fetch_logs(user_id=user_id, limit=20)
-        for row in logs:
-            r = row.get("reply") or ""
-            if r.startswith("[Launch Brief]"):
-                brief = r
-                break
-
     if not brief:
-        return RadarOut(user_id=user_id, reply="최근 Launch Brief를 찾지 못했어. 먼저 /chat으로 Launch Brief를 만들어줘.")
+        return RadarOut(user_id=user_id, reply=_NO_BRIEF_REPLY)
 
-    data = call_radar(launch_brief=brief, extra_notes=notes)
+    try:
+        data = call_radar(launch_brief=brief, extra_notes=notes, refresh=payload.refresh,
+                          user_id=user_id, endpoint="radar")
+    except LLMBudgetExceeded:
+        return RadarOut(user_id=user_id, reply=_radar_budget_reply(brief))
     return RadarOut(user_id=user_id, reply=data.get("reply", ""))
 
+def _radar_events(user_id: str, brief: str, notes: str, refresh: bool):
+    try:
+        if not brief:
+            yield _sse("delta", {"text": _NO_BRIEF_REPLY})
+            yield _sse("done", {"user_id": user_id, "reply": _NO_BRIEF_REPLY, "cached": False})
+            return
+        for ev in stream_radar(launch_brief=brief, extra_notes=notes, refresh=refresh,
+                               user_id=user_id, endpoint="radar/stream"):
+            if ev.get("done"):
+                yield _sse("done", {"user_id": user_id, "reply": ev["reply"], "cached": ev["cached"]})
+            else:
+                yield _sse("delta", {"text": ev["delta"]})
+    except LLMBudgetExceeded:
+        reply = _radar_budget_reply(brief)
+        yield _sse("done", {"user_id": user_id, "reply": reply, "cached": False})
+    except Exception as e:
+        yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+
+@app.post("/radar/stream")
+def radar_stream(payload: RadarIn):
+    """/radar의 SSE 버전: delta 이벤트로 토큰을, done 이벤트로 전체 리포트를 보낸다."""
+    brief = (payload.brief or "").strip() or _find_launch_brief(payload.user_id)
+    notes = (payload.notes or "").strip()
+    return StreamingResponse(_radar_events(payload.user_id, brief, notes, payload.refresh),
+                             media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+# 동시에 돌릴 radar 생성 수(기본 LLM_MAX_IN_FLIGHT와 같게), 한 요청당 최대 항목 수
+RADAR_BATCH_CONCURRENCY = int(os.getenv("RADAR_BATCH_CONCURRENCY", "8"))
+RADAR_BATCH_MAX_ITEMS = int(os.getenv("RADAR_BATCH_MAX_ITEMS", "200"))
+
+def _pct_ms(xs, p):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(len(xs) * p))], 1)
+
+async def _radar_batch_item(index: int, item: RadarBatchItem, notes: str, refresh: bool, limiter) -> dict:
+    t = time.perf_counter()
+    user_id = (item.user_id or "").strip()
+    out = {"index": index, "user_id": user_id or None}
+    try:
+        brief = (item.brief or "").strip()
+        if not brief and user_id:
+            await anyio.to_thread.run_sync(log_writer.wait_for_user, user_id)
+            brief = await adb.fetch_latest_launch_brief(user_id) or ""
+        if not brief:
+            raise LookupError("no launch brief")
+        item_notes = (item.notes or "").strip() or notes
+        data = await anyio.to_thread.run_sync(
+            partial(call_radar, launch_brief=brief, extra_notes=item_notes, refresh=refresh,
+                    user_id=user_id or None, endpoint="radar/batch"),
+            limiter=limiter,
+        )
+        out.update(ok=True, reply=data.get("reply", ""), cached=bool(data.get("cached")))
+    except Exception as e:
+        # 항목별 격리: 한 항목 실패가 배치 전체를 멈추지 않는다
+        out.update(ok=False, error=f"{type(e).__name__}: {e}")
+    out["ms"] = round((time.perf_counter() - t) * 1000.0, 1)
+    return out
+
+async def _radar_batch_lines(items: list, notes: str, refresh: bool, concurrency: int):
+    limiter = anyio.CapacityLimiter(concurrency)
+    t0 = time.perf_counter()
+    tasks = [asyncio.ensure_future(_radar_batch_item(i, it, notes, refresh, limiter)) for i, it in enumerate(items)]
+    done_ms, ok, cached = [], 0, 0
+    try:
+        # 끝나는 순서대로 한 줄씩
+        for fut in asyncio.as_completed(tasks):
+            r = await fut
+            done_ms.append(r["ms"])
+            ok += 1 if r["ok"] else 0
+            cached += 1 if r.get("cached") else 0
+            yield (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    summary = {
+        "items": len(items),
+        "ok": ok,
+        "errors": len(items) - ok,
+        "cached": cached,
+        "concurrency": concurrency,
+        "wall_ms": round(wall_ms, 1),
+        "sum_item_ms": round(sum(done_ms), 1),
+        "speedup": round(sum(done_ms) / wall_ms, 2) if wall_ms else None,
+        "item_ms": {"p50": _pct_ms(done_ms, 0.5), "p95": _pct_ms(done_ms, 0.95), "max": _pct_ms(done_ms, 1.0)},
+        "items_per_sec": round(len(items) / (wall_ms / 1000.0), 2) if wall_ms else None,
+    }
+    yield (json.dumps({"summary": summary}, ensure_ascii=False) + "\n").encode("utf-8")
+
+@app.post("/radar/batch")
+async def radar_batch(payload: RadarBatchIn):
+    """
+    여러 brief/user_id의 radar를 동시에(최대 concurrency개) 생성해서 끝나는 순서대로 NDJSON으로 보낸다.
+    각 줄: {"index", "user_id", "ok", "reply", "cached", "ms"} 또는 {"index", "ok": false, "error"}
+    마지막 줄: {"summary": {...처리량 통계}}
+    """
+    items = list(payload.items) + [RadarBatchItem(user_id=u) for u in payload.user_ids]
+    if not items:
+        return JSONResponse(status_code=400, content={"error": "items or user_ids required"})
+    if len(items) > RADAR_BATCH_MAX_ITEMS:
+        return JSONResponse(status_code=400, content={"error": f"too many items (max {RADAR_BATCH_MAX_ITEMS})"})
+    concurrency = max(1, min(int(payload.concurrency or RADAR_BATCH_CONCURRENCY), RADAR_BATCH_CONCURRENCY))
+    body = _radar_batch_lines(items, (payload.notes or "").strip(), payload.refresh, concurrency)
+    return StreamingResponse(body, media_type="application/x-ndjson")
+
 
 # ---- DEBUG ENDPOINTS (temporary) ----
 from fastapi import Request
@@ -263,8 +611,9 @@ async def debug_radar(req: Request):
         body = await req.json()
         user_id = (body.get("user_id") or "").strip()
         extra_notes = body.get("extra_notes") or ""
+        refresh = bool(body.get("refresh"))
 
-        logs = [normalize_log_row(r) for r in fetch_logs(user_id=user_id, limit=50)]
+        logs = [normalize_log_row(r) for r in await adb.fetch_logs(user_id=user_id, limit=50)]
 
         launch = None
         for row in logs:
@@ -276,13 +625,45 @@ async def debug_radar(req: Request):
         if not launch:
             return {"user_id": user_id, "reply": "no launch brief found", "logs_count": len(logs)}
 
-        radar = call_radar(launch_brief=launch, extra_notes=extra_notes)
+        # async 핸들러라서 블로킹 LLM 호출은 threadpool로
+        radar = await run_in_threadpool(call_radar, launch_brief=launch, extra_notes=extra_notes, refresh=refresh,
+                                        user_id=user_id, endpoint="debug/radar")
         return {"user_id": user_id, **radar}
 
     except Exception as e:
         return {"error": f"{type(e).__name__}: {e}", "trace": traceback.format_exc()}
 
 
+@app.get("/usage")
+async def usage(user_id: str | None = None, since: str | None = None, until: str | None = None,
+                group_by: str = "day,endpoint,intent"):
+    """
+    LLM 토큰/지연 집계. since/until은 'YYYY-MM-DD'(UTC, 포함).
+    group_by: user_id,endpoint,intent,model,day 중 쉼표 구분. budget은 오늘 사용량/한도.
+    """
+    try:
+        rows = await adb.run_read(query_llm_usage, since=since, until=until, user_id=user_id, group_by=group_by)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {"items": rows, "budget": await adb.run_read(budget_status, user_id)}
+
+
+@app.post("/debug/signals/retention")
+def debug_signals_retention():
+    return apply_signal_retention()
+
+
+@app.post("/debug/archive")
+def debug_archive(older_than_days: int | None = None):
+    """older_than_days(기본 ARCHIVE_AFTER_DAYS)보다 오래된 로그를 아카이브 세그먼트로 옮긴다."""
+    return archive_logs(older_than_days)
+
+
+@app.get("/debug/stats")
+def debug_stats():
+    return {"db": db_stats(), "adb": adb.stats(), "log_writer": log_writer.stats(), "archive": archive_stats(), "llm": llm_clients.stats(), "radar_cache": radar_cache_stats(), "llm_usage": usage_stats(), "singleflight": singleflight_stats(), "lexicon": lexicon_stats(), "fetch_cache": fetch_cache_stats(), "http_pool": http_pool_stats()}
+
+
 
 
 
@@ -294,10 +675,11 @@ async def debug_radar(req: Request):
 
 
 @app.get('/pulse')
-def pulse(user_id: str, query: str = '', limit: int = 25):
+async def pulse(user_id: str, query: str = '', limit: int = 25):
   q = (query or '').strip()
   lim = max(1, min(int(limit or 25), 200))
-  signals = fetch_social_signals(q, limit=lim) if q else []
+  fetched = await afetch_social_signals(q, limit=lim)
+  signals = fetched["signals"]
   pulse = build_pulse_from_signals(signals)
   evidence = []
   for s in (signals or [])[:8]:
@@ -310,7 +692,10 @@ def pulse(user_id: str, query: str = '', limit: int = 25):
     })
   pulse['signals_count'] = len(signals)
   pulse['evidence'] = evidence
-  return pulse@app.post("/pulse")
+  pulse['sources'] = fetched["sources"]
+  return pulse
+
+# (POST /pulse는 아래 BEGIN_PULSE_POST_ALIAS_V2가 등록한다)
 def pulse_post(payload: dict):
     user_id = (payload.get("user_id") or "").strip()
     query = (payload.get("query") or "").strip()
@@ -323,8 +708,20 @@ def pulse_post(payload: dict):
 
 @app.get("/alerts")
 def alerts(user_id: str, limit: int = 50):
-    rows = fetch_logs(user_id=user_id, limit=limit)
-    return make_alerts(rows)
+    """
+    need 슬롯 집계(slot_counts/slot_evidence) 기반 알림. 로그를 다시 읽거나 slots_json을 파싱하지 않는다.
+    집계는 사용자의 전체 로그 기준이라 limit는 쓰지 않는다(기존 클라이언트 호환용으로만 받는다).
+    """
+    return make_alerts_from_aggregates(user_id)
+
+@app.get("/insights/pulse")
+async def insights_pulse(user_id: str | None = None):
+    """슬롯 집계 기반 pulse(user_id 없으면 전체). 로그를 다시 읽거나 파싱하지 않는다."""
+    return await adb.run_read(make_pulse_from_aggregates, user_id)
+
+@app.get("/insights/alerts")
+async def insights_alerts(user_id: str | None = None):
+    return await adb.run_read(make_alerts_from_aggregates, user_id)
 
 @app.post("/alerts")
 def alerts_post(payload: dict):
@@ -347,10 +744,11 @@ def alerts_post(payload: dict):
 
 
 @app.get('/report')
-def report(user_id: str, query: str, limit: int = 25):
+async def report(user_id: str, query: str, limit: int = 25):
   q = (query or '').strip()
   lim = max(1, min(int(limit or 25), 200))
-  signals = fetch_social_signals(q, limit=lim) if q else []
+  fetched = await afetch_social_signals(q, limit=lim)
+  signals = fetched["signals"]
   pulse = build_pulse_from_signals(signals)
 
   evidence = []
@@ -368,6 +766,7 @@ def report(user_id: str, query: str, limit: int = 25):
     'signals_count': len(signals),
     'insights': pulse.get('insights') or [],
     'core_evidence': evidence,
+    'sources': fetched["sources"],
   }
 
 # ===== BEGIN_REPORT_CARDS_V1 =====
@@ -416,11 +815,11 @@ def _pick_needs_and_risks(pulse: dict):
   return needs, risks
 
 @app.get("/report/cards", response_class=HTMLResponse)
-def report_cards(user_id: str, query: str, limit: int = 25):
+async def report_cards(user_id: str, query: str, limit: int = 25):
   q = (query or "").strip()
   lim = max(1, min(int(limit or 25), 200))
 
-  signals = fetch_social_signals(q, limit=lim) if q else []
+  signals = (await afetch_social_signals(q, limit=lim))["signals"]
   pulse = build_pulse_from_signals(signals) if "build_pulse_from_signals" in globals() else {"insights": []}
 
   needs_top, risks_top = _pick_needs_and_risks(pulse)
@@ -636,13 +1035,15 @@ def health():
 # ===== END_HEALTH_V2 =====
 # ===== BEGIN_PULSE_POST_ALIAS_V2 =====
 @app.post("/pulse")
-def pulse_post(payload: dict):
+async def pulse_post(payload: dict):
     query = (payload.get("query") or "").strip()
     limit = int(payload.get("limit") or 25)
     limit = max(1, min(limit, 200))
-    signals = fetch_social_signals(query, limit=limit) if query else []
+    fetched = await afetch_social_signals(query, limit=limit)
+    signals = fetched["signals"]
     pulse = build_pulse_from_signals(signals)
     pulse["signals_count"] = len(signals)
+    pulse["sources"] = fetched["sources"]
     pulse["evidence"] = [
       {
         "platform": s.get("platform") or s.get("source") or "reddit",
@@ -5,7 +5,7 @@ import json
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 
-import httpx
+from app.http_pool import http_pool
 
 # -------------------------
 # Utilities
@@ -38,6 +38,13 @@ def fetch_reddit(query: str, limit: int = 25) -> List[Dict[str, Any]]:
     """
     Public reddit search JSON. (No login / no bypass)
     """
+    try:
+        return _fetch_reddit_core(query, limit)
+    except Exception:
+        return []
+
+def _fetch_reddit_core(query: str, limit: int = 25) -> List[Dict[str, Any]]:
+    # fetch_reddit 본체: 실패하면 예외를 올린다(캐시가 빈 결과와 실패를 구분하도록)
     q = (query or "").strip()
     if not q:
         return []
@@ -46,35 +53,38 @@ def fetch_reddit(query: str, limit: int = 25) -> List[Dict[str, Any]]:
     headers = {"User-Agent": "beauty-agent/0.1 (by u/yourteam)"}  # required-ish
     params = {"q": q, "limit": lim, "sort": "new"}
     out = []
-    try:
-        with httpx.Client(timeout=15.0, headers=headers, follow_redirects=True) as c:
-            r = c.get(url, params=params)
-            r.raise_for_status()
-            data = r.json()
-        for ch in (data.get("data", {}).get("children", []) or []):
-            d = ch.get("data", {}) or {}
-            permalink = d.get("permalink") or ""
-            out.append({
-                "source": "reddit",
-                "platform": "reddit",
-                "created_at": normalize_created_at(str(d.get("created_utc") or "")),
-                "url": ("https://www.reddit.com" + permalink) if permalink else (d.get("url") or ""),
-                "title": d.get("title") or "",
-                "text": _truncate(d.get("selftext") or ""),
-                "metrics": {
-                    "score": d.get("score") or 0,
-                    "comments": d.get("num_comments") or 0,
-                    "subreddit": d.get("subreddit") or ""
-                }
-            })
-    except Exception:
-        return []
+    r = http_pool.get(url, params=params, headers=headers, timeout=15.0)
+    r.raise_for_status()
+    data = r.json()
+    for ch in (data.get("data", {}).get("children", []) or []):
+        d = ch.get("data", {}) or {}
+        permalink = d.get("permalink") or ""
+        out.append({
+            "source": "reddit",
+            "platform": "reddit",
+            "created_at": normalize_created_at(str(d.get("created_utc") or "")),
+            "url": ("https://www.reddit.com" + permalink) if permalink else (d.get("url") or ""),
+            "title": d.get("title") or "",
+            "text": _truncate(d.get("selftext") or ""),
+            "metrics": {
+                "score": d.get("score") or 0,
+                "comments": d.get("num_comments") or 0,
+                "subreddit": d.get("subreddit") or ""
+            }
+        })
     return out
 
 def fetch_google_news_rss(query: str, limit: int = 25) -> List[Dict[str, Any]]:
     """
     Public Google News RSS search (no key). Good for 'retail/news chatter' signals.
     """
+    try:
+        return _fetch_google_news_rss_core(query, limit)
+    except Exception:
+        return []
+
+def _fetch_google_news_rss_core(query: str, limit: int = 25) -> List[Dict[str, Any]]:
+    # fetch_google_news_rss 본체: 실패하면 예외를 올린다
     q = (query or "").strip()
     if not q:
         return []
@@ -83,33 +93,50 @@ def fetch_google_news_rss(query: str, limit: int = 25) -> List[Dict[str, Any]]:
     url = "https://news.google.com/rss/search"
     params = {"q": q, "hl": "en-US", "gl": "US", "ceid": "US:en"}
     headers = {"User-Agent": "beauty-agent/0.1"}
-    out = []
-    try:
-        with httpx.Client(timeout=15.0, headers=headers, follow_redirects=True) as c:
-            r = c.get(url, params=params)
-            r.raise_for_status()
-            xml = r.text
-        # minimal xml parsing without extra deps
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(xml)
-        items = root.findall(".//item")[:lim]
-        for it in items:
-            title = (it.findtext("title") or "").strip()
-            link = (it.findtext("link") or "").strip()
-            pub = (it.findtext("pubDate") or "").strip()
-            desc = (it.findtext("description") or "").strip()
-            out.append({
-                "source": "google_news_rss",
-                "platform": "news",
-                "created_at": normalize_created_at(pub),
-                "url": link,
-                "title": title,
-                "text": _truncate(desc),
-                "metrics": {}
-            })
-    except Exception:
-        return []
-    return out
+    # 응답 조각을 바로 XML 파서에 넣고 lim개가 차면 나머지 본문은 받지 않고 연결을 닫는다
+    with http_pool.stream("GET", url, params=params, headers=headers, timeout=15.0) as r:
+        r.raise_for_status()
+        return list(iter_rss_signals(r.iter_bytes(), lim))
+
+def _rss_item_signal(it) -> Dict[str, Any]:
+    title = (it.findtext("title") or "").strip()
+    link = (it.findtext("link") or "").strip()
+    pub = (it.findtext("pubDate") or "").strip()
+    desc = (it.findtext("description") or "").strip()
+    return {
+        "source": "google_news_rss",
+        "platform": "news",
+        "created_at": normalize_created_at(pub),
+        "url": link,
+        "title": title,
+        "text": _truncate(desc),
+        "metrics": {}
+    }
+
+def iter_rss_signals(chunks, limit: int):
+    """
+    RSS 바이트 조각들을 XMLPullParser로 증분 파싱하면서 <item>이 닫힐 때마다 signal dict를 낸다.
+    limit개를 내면 멈춘다(남은 조각은 읽지 않음). 처리한 item은 비워서 메모리를 일정하게 유지한다.
+    """
+    # minimal xml parsing without extra deps
+    import xml.etree.ElementTree as ET
+    parser = ET.XMLPullParser(events=("end",))
+    n = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _event, el in parser.read_events():
+            if el.tag.rsplit("}", 1)[-1] != "item":
+                continue
+            yield _rss_item_signal(el)
+            el.clear()
+            n += 1
+            if n >= limit:
+                return
+    parser.close()
+    for _event, el in parser.read_events():
+        if n < limit and el.tag.rsplit("}", 1)[-1] == "item":
+            yield _rss_item_signal(el)
+            n += 1
 
 def fetch_serper_search(*args, **kwargs):
     return []
@@ -192,24 +219,6 @@ def build_alerts_from_signals(signals: List[Dict[str, Any]], threshold: int = 4)
     return {"alerts": alerts, "signals_count": len(signals or [])}
 
 
-# --- Added: unified social signals fetcher (alias) ---
-def fetch_social_signals(query: str, limit: int = 25):
-    """
-    Unified social signals fetcher.
-    Currently uses Reddit as the primary signal source.
-    Future: TikTok/Instagram/RED(Xiaohongshu)/YouTube/OliveYoung Global can be added here.
-    """
-    q = (query or "").strip()
-    lim = max(1, min(int(limit or 25), 200))
-
-    # Prefer existing fetch_reddit if available
-    if "fetch_reddit" in globals() and callable(globals().get("fetch_reddit")):
-        return fetch_reddit(q, limit=lim)
-
-    # Fallback: empty list (prevents server crash)
-    return []
-
-
 # --- Lexicons (added to prevent NameError) ---
 # risk lexicon: 키 = 리스크 타입, 값 = 매칭할 키워드 리스트
 RISK_LEX = {
@@ -394,16 +403,6 @@ def clean_signals(signals: list, query: str):
     out.append(s)
   return out, dropped
 
-def fetch_social_signals(query: str, limit: int = 25):
-  """
-  Unified signals fetcher: Reddit -> clean_signals (V2 strict)
-  """
-  q = (query or "").strip()
-  lim = max(1, min(int(limit or 25), 200))
-  raw = fetch_reddit(q, limit=lim) if "fetch_reddit" in globals() and callable(globals().get("fetch_reddit")) else []
-  cleaned, _dropped = clean_signals(raw, q)
-  return cleaned
-
 # Fix mojibake: override titles/summaries to ASCII (stable in any encoding)
 try:
   _build_pulse_from_signals_old = build_pulse_from_signals
@@ -492,13 +491,6 @@ def clean_signals(signals: list, query: str):
         out.append(s)
     return out, dropped
 
-def fetch_social_signals(query: str, limit: int = 25):
-    q = (query or "").strip()
-    lim = max(1, min(int(limit or 25), 200))
-    raw = fetch_reddit(q, limit=lim) if "fetch_reddit" in globals() and callable(globals().get("fetch_reddit")) else []
-    cleaned, _d = clean_signals(raw, q) if "clean_signals" in globals() else (raw, 0)
-    return cleaned
-
 # 안정적인 pulse 출력(Need/Risk 2장)
 def build_pulse_from_signals(signals: list):
     def _count_lex(signals, lex):
@@ -520,3 +512,274 @@ def build_pulse_from_signals(signals: list):
       {"kind":"risks","title":"Top Risks","summary":"Repeated complaint/risk mentions.","top":risks_top,"evidence":[]},
     ]}
 # ===== END_SIGNALS_STABILITY_V2 =====
+
+
+# ===== BEGIN_LEXICON_AUTOMATON_V1 =====
+# NEED_LEX/RISK_LEX를 정규식 하나(접두사 트리 모양)로 컴파일해서 문서당 한 번만 훑는다.
+# pulse/alerts/report가 같은 매처를 쓰고, lexicon 내용이 바뀌면 다음 호출에서 다시 컴파일한다.
+# 매칭 의미는 기존과 같다: 소문자 부분 문자열, 문서 하나당 키마다 최대 1회.
+import threading as _threading
+
+class LexiconMatcher:
+    def __init__(self, lexicons: Dict[str, Dict[str, List[str]]]):
+        # lexicons: {"need": NEED_LEX, "risk": RISK_LEX}
+        self.keys: Dict[str, List[tuple]] = {}  # kind -> [(key, bit)] (lexicon 순서)
+        term_bits: Dict[str, int] = {}
+        n = 0
+        for kind, lex in lexicons.items():
+            self.keys[kind] = []
+            for key, terms in (lex or {}).items():
+                bit = 1 << n
+                n += 1
+                self.keys[kind].append((key, bit))
+                for t in terms:
+                    t = (t or "").lower()
+                    if t:
+                        term_bits[t] = term_bits.get(t, 0) | bit
+        # 긴 키워드가 매치되면 그 안에 든 짧은 키워드도 매치된 것(같은 위치에서 시작하는 짧은 키워드는
+        # alternation이 건너뛰므로 미리 합쳐 둔다)
+        self._mask = {t: self._or_substrings(t, term_bits) for t in term_bits}
+        self._re = _re.compile(_trie_pattern(term_bits)) if term_bits else None
+
+    @staticmethod
+    def _or_substrings(t: str, term_bits: Dict[str, int]) -> int:
+        mask = 0
+        for u, b in term_bits.items():
+            if u in t:
+                mask |= b
+        return mask
+
+    def scan_mask(self, text: str) -> int:
+        """소문자 텍스트 하나에서 걸린 키들의 비트마스크(한 번 스캔, 겹치는 매치 포함)."""
+        if self._re is None:
+            return 0
+        mask = 0
+        masks = self._mask
+        search = self._re.search
+        m = search(text)
+        while m:
+            mask |= masks[m.group()]
+            m = search(text, m.start() + 1)
+        return mask
+
+    def hits(self, text: str) -> Dict[str, List[str]]:
+        """{kind: [걸린 키, lexicon 순서]}"""
+        mask = self.scan_mask((text or "").lower())
+        return {kind: [k for k, b in keys if mask & b] for kind, keys in self.keys.items()}
+
+    def count(self, signals: list) -> Dict[str, Dict[str, int]]:
+        """
+        {kind: {key: 걸린 문서 수}}. 키 순서는 처음 걸린 문서 순(같은 문서 안에서는 lexicon 순),
+        즉 기존 _count_lex와 같아서 정렬 시 동점 순서도 같다.
+        """
+        out: Dict[str, Dict[str, int]] = {kind: {} for kind in self.keys}
+        for s in (signals or []):
+            if not isinstance(s, dict):
+                continue
+            mask = self.scan_mask(_signal_hay(s))
+            if not mask:
+                continue
+            for kind, keys in self.keys.items():
+                cnt = out[kind]
+                for k, b in keys:
+                    if mask & b:
+                        cnt[k] = cnt.get(k, 0) + 1
+        return out
+
+def _trie_pattern(terms) -> str:
+    """
+    키워드들을 접두사 트리 모양 정규식으로("dry", "drying" -> "dry(?:ing)?").
+    평범한 alternation은 위치마다 키워드를 하나씩 시도하지만 트리는 첫 글자에서 갈라져서 훨씬 빠르다.
+    ?가 greedy라 같은 위치에서는 가장 긴 키워드가 매치된다.
+    """
+    trie: Dict[str, dict] = {}
+    for t in terms:
+        node = trie
+        for ch in t:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [_re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = ("(?:" + body + ")?") if len(alts) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+def _signal_hay(s: dict) -> str:
+    return ((s.get("title") or "") + " " + (s.get("text") or s.get("body") or "")).lower()
+
+_lex_lock = _threading.Lock()
+_lex_cache: Dict[str, Any] = {"sig": None, "matcher": None, "builds": 0}
+
+def lexicon_matcher() -> LexiconMatcher:
+    """현재 NEED_LEX/RISK_LEX로 컴파일된 매처. 내용이 바뀌었을 때만 다시 컴파일한다."""
+    lexicons = {"need": NEED_LEX, "risk": globals().get("RISK_LEX", DEFAULT_RISK_LEX)}
+    sig = tuple((kind, tuple((k, tuple(v)) for k, v in lex.items())) for kind, lex in lexicons.items())
+    with _lex_lock:
+        if _lex_cache["sig"] != sig:
+            _lex_cache["matcher"] = LexiconMatcher(lexicons)
+            _lex_cache["sig"] = sig
+            _lex_cache["builds"] += 1
+        return _lex_cache["matcher"]
+
+def lexicon_stats() -> Dict[str, Any]:
+    m = _lex_cache["matcher"]
+    return {"builds": _lex_cache["builds"],
+            "keys": {kind: len(keys) for kind, keys in m.keys.items()} if m else {}}
+
+def count_lex_hits(signals: list) -> Dict[str, Dict[str, int]]:
+    return lexicon_matcher().count(signals)
+
+def _top(counts: Dict[str, int], n: int) -> list:
+    return sorted(counts.items(), key=lambda x: x[1], reverse=True)[:n]
+
+lexicon_matcher()
+
+def build_pulse_from_signals(signals: list):
+    counts = count_lex_hits(signals)
+    return {"insights":[
+      {"kind":"needs","title":"Top Needs","summary":"Repeated expectations from social signals.","top":_top(counts["need"], 10),"evidence":[]},
+      {"kind":"risks","title":"Top Risks","summary":"Repeated complaint/risk mentions.","top":_top(counts["risk"], 10),"evidence":[]},
+    ]}
+
+# 원래 build_alerts_from_signals(위쪽 정의)는 모듈 전역 _count_lex를 부르므로 이것만 바꿔 끼운다
+# (원래처럼 0건 키는 빼고, 키 순서는 lexicon 순서)
+def _count_lex(signals: list, lex: Dict[str, List[str]]) -> Dict[str, int]:
+    counts = None
+    for kind, cur in (("risk", globals().get("RISK_LEX", DEFAULT_RISK_LEX)), ("need", NEED_LEX)):
+        if lex is cur:
+            counts = lexicon_matcher().count(signals)[kind]
+            break
+    if counts is None:
+        counts = LexiconMatcher({"lex": lex}).count(signals)["lex"]
+    return {k: counts[k] for k in lex if k in counts}
+# ===== END_LEXICON_AUTOMATON_V1 =====
+
+
+# ===== BEGIN_FETCH_CACHE_V1 =====
+# 사용자들이 같은 query를 반복하고 Reddit은 rate limit을 건다 -> (source, query, limit) 결과를 캐시.
+# TTL/stale-while-revalidate/실패 캐시는 app.fetch_cache 참고. 캐시 miss는 거기서 single-flight로 합쳐진다.
+from app.fetch_cache import cached_fetcher as _cached_fetcher
+
+fetch_reddit = _cached_fetcher("reddit", _fetch_reddit_core)
+fetch_google_news_rss = _cached_fetcher("google_news_rss", _fetch_google_news_rss_core)
+# ===== END_FETCH_CACHE_V1 =====
+
+
+# ===== BEGIN_SOURCES_FANOUT_V1 =====
+# signal 소스 레지스트리 + asyncio fan-out.
+# 켜진 소스(SIGNAL_SOURCES, 쉼표 구분)를 동시에 부르고, 소스마다 timeout(SIGNAL_SOURCE_TIMEOUT_S,
+# 소스별 SIGNAL_TIMEOUT_<NAME>_S), 전체에는 마감(SIGNAL_FANOUT_DEADLINE_S)을 건다.
+# 마감까지 끝난 소스 결과만 섞어서(round-robin) clean_signals로 중복/잡음을 거르고, 소스별 상태를 같이 돌려준다.
+# 소스 fetch는 캐시(app.fetch_cache) + 공유 HTTP 풀을 쓰는 동기 함수라 전용 스레드 풀(SIGNAL_FANOUT_WORKERS)에서 돌린다.
+# timeout으로 버린 호출도 스레드에서는 끝까지 돌아서 결과가 캐시에 들어가므로 다음 요청에서 쓰인다.
+# single-flight: 같은 (소스, query, limit) 동시 호출은 upstream 한 번(캐시가 켜져 있으면 캐시 miss에서,
+# 꺼져 있으면 _source_flight에서), 동기 fetch_social_signals는 fan-out 전체를 한 번으로 합친다.
+import asyncio as _asyncio
+import time as _time
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from app.fetch_cache import FETCH_CACHE_ENABLED as _FETCH_CACHE_ENABLED, fetch_cache as _fetch_cache, normalize_query as _normalize_query
+from app.singleflight import Group as _Group, coalesce as _coalesce
+
+SIGNAL_SOURCE_TIMEOUT_S = float(os.getenv("SIGNAL_SOURCE_TIMEOUT_S", "8"))
+SIGNAL_FANOUT_DEADLINE_S = float(os.getenv("SIGNAL_FANOUT_DEADLINE_S", "10"))
+SIGNAL_FANOUT_WORKERS = int(os.getenv("SIGNAL_FANOUT_WORKERS", "16"))
+ENABLED_SIGNAL_SOURCES = [x.strip() for x in os.getenv("SIGNAL_SOURCES", "reddit,google_news_rss").split(",") if x.strip()]
+
+# name -> {"fetch": fn(query, limit) (실패하면 예외), "timeout_s": float}
+SIGNAL_SOURCES: Dict[str, Dict[str, Any]] = {}
+# 기본 executor가 아닌 전용 풀: asyncio.run(동기 래퍼)이 끝날 때 timeout으로 버린 호출을 기다리지 않게
+_source_pool = _ThreadPoolExecutor(max_workers=SIGNAL_FANOUT_WORKERS, thread_name_prefix="signal-source")
+_source_flight = _Group("signal_source")
+
+def _signals_key(query: str, limit: int = 25):
+    return (_normalize_query(query), int(limit or 25))
+
+def register_source(name: str, fetch, timeout_s: Optional[float] = None) -> None:
+    env = "SIGNAL_TIMEOUT_" + _re.sub(r"[^A-Z0-9]+", "_", name.upper()) + "_S"
+    if timeout_s is None:
+        timeout_s = float(os.getenv(env, str(SIGNAL_SOURCE_TIMEOUT_S)))
+    SIGNAL_SOURCES[name] = {"fetch": fetch, "timeout_s": timeout_s}
+
+def _fetch_source(name: str, fn, query: str, limit: int):
+    """(결과, 캐시 상태). 캐시를 거쳐 부르고, 실패는 예외로 올린다."""
+    if not _FETCH_CACHE_ENABLED:
+        value = _source_flight.do((name,) + _signals_key(query, limit), fn, query, limit)
+        return list(value or []), "live"
+    value, state = _fetch_cache.get(name, fn, query, limit)
+    if state in ("error", "negative"):
+        raise RuntimeError(f"{name} upstream failed ({state})")
+    return value, state
+
+def _interleave(lists: List[list]) -> list:
+    out = []
+    for i in range(max((len(x) for x in lists), default=0)):
+        out.extend(x[i] for x in lists if i < len(x))
+    return out
+
+async def afetch_social_signals(query: str, limit: int = 25, sources: Optional[List[str]] = None,
+                                deadline_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    {"signals": [...], "sources": {name: {"status", "count", "ms", ["cache"], ["error"]}}}
+    status: ok | timeout | error | deadline(전체 마감에 걸려 취소) | unknown(등록 안 된 이름)
+    """
+    q = (query or "").strip()
+    lim = max(1, min(int(limit or 25), 200))
+    names = list(sources if sources is not None else ENABLED_SIGNAL_SOURCES)
+    status: Dict[str, Dict[str, Any]] = {}
+    if not q:
+        return {"signals": [], "sources": status}
+    deadline = SIGNAL_FANOUT_DEADLINE_S if deadline_s is None else deadline_s
+
+    results: Dict[str, list] = {}
+    loop = _asyncio.get_running_loop()
+    t0 = _time.perf_counter()
+
+    async def run(name: str) -> None:
+        src = SIGNAL_SOURCES[name]
+        try:
+            value, state = await _asyncio.wait_for(
+                loop.run_in_executor(_source_pool, _fetch_source, name, src["fetch"], q, lim),
+                timeout=src["timeout_s"])
+            results[name] = value
+            status[name] = {"status": "ok", "count": len(value), "cache": state}
+        except _asyncio.TimeoutError:
+            status[name] = {"status": "timeout", "count": 0}
+        except Exception as e:
+            status[name] = {"status": "error", "count": 0, "error": f"{type(e).__name__}: {e}"}
+        status[name]["ms"] = round((_time.perf_counter() - t0) * 1000.0, 1)
+
+    tasks = {}
+    for name in names:
+        if name in SIGNAL_SOURCES:
+            tasks[name] = _asyncio.ensure_future(run(name))
+        else:
+            status[name] = {"status": "unknown", "count": 0, "ms": 0.0}
+    if tasks:
+        _done, pending = await _asyncio.wait(tasks.values(), timeout=deadline)
+        for name, task in tasks.items():
+            if task in pending:
+                task.cancel()
+                status[name] = {"status": "deadline", "count": 0, "ms": round(deadline * 1000.0, 1)}
+
+    # 소스 등록 순서대로 번갈아 섞어서 한 소스가 limit를 다 차지하지 않게
+    merged = _interleave([results[n] for n in names if n in results])
+    cleaned, _dropped = clean_signals(merged, q)
+    return {"signals": cleaned[:lim], "sources": {n: status[n] for n in names if n in status}}
+
+def _fetch_social_signals_fanout(query: str, limit: int = 25):
+    return _asyncio.run(afetch_social_signals(query, limit))["signals"]
+
+register_source("reddit", _fetch_reddit_core)
+register_source("google_news_rss", _fetch_google_news_rss_core)
+
+# 통합 signal fetcher(모듈의 유일한 fetch_social_signals): 켜진 소스 fan-out -> clean_signals.
+# 동기 호출자용(스레드풀의 sync 엔드포인트 등). 이벤트 루프 안에서는 afetch_social_signals를 쓴다
+fetch_social_signals = _coalesce("fetch_social_signals", _fetch_social_signals_fanout,
+                                 key=_signals_key, copy=list)
+# ===== END_SOURCES_FANOUT_V1 =====
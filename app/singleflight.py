@@ -0,0 +1,102 @@
+"""
+single-flight: 같은 키로 동시에 들어온 호출은 upstream 호출 하나만 실행하고 결과(또는 예외)를 같이 받는다.
+캐시가 아니라서 호출이 끝나면 키는 바로 지워진다(다음 호출은 다시 upstream으로).
+
+    reddit_flight = Group("reddit")
+    reddit_flight.do(("k-beauty", 25), fetch, "k-beauty", 25)
+
+    fetch_reddit = coalesce("reddit", fetch_reddit, copy=list)   # 함수 래퍼
+"""
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_registry_lock = threading.Lock()
+_groups: Dict[str, "Group"] = {}
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+        with _registry_lock:
+            _groups[name] = self
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.followers += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn(*args, **kwargs)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(c.waiters for c in self._calls.values()),
+                "leaders": self.leaders,
+                "followers": self.followers,
+            }
+
+
+def _default_key(args: tuple, kwargs: dict) -> Hashable:
+    return (args, tuple(sorted(kwargs.items())))
+
+
+def coalesce(name: str, fn: Callable, key: Optional[Callable[..., Hashable]] = None,
+             copy: Optional[Callable[[Any], Any]] = None) -> Callable:
+    """
+    fn을 single-flight로 감싼다. key(*args, **kwargs)가 없으면 인자 전체가 키.
+    결과 객체는 호출자들이 공유하므로, 호출자가 결과를 고칠 수 있으면 copy(예: list)로 복사본을 돌려준다.
+    """
+    group = Group(name)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        k = key(*args, **kwargs) if key else _default_key(args, kwargs)
+        out = group.do(k, fn, *args, **kwargs)
+        return copy(out) if copy is not None else out
+
+    wrapper.group = group
+    return wrapper
+
+
+def singleflight_stats() -> Dict[str, Any]:
+    with _registry_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
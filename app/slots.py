@@ -2,25 +2,57 @@
 
 REQUIRED_SLOTS = ["country", "category", "target", "need", "price", "channel"]
 
+# 질문 문구에서 "어떤 슬롯을 묻는지" 알아보는 단서(소문자). 한 질문에 여러 슬롯이 묶여 있을 수 있다.
+SLOT_CUES: dict[str, list[str]] = {
+    "country": ["국가", "지역", "country", "region"],
+    "category": ["카테고리", "선크림", "선스틱", "category"],
+    "price": ["가격", "price", "만원"],
+    "channel": ["채널", "유통", "amazon", "올리브영", "channel"],
+    "target": ["타겟", "고객", "target"],
+    "need": ["니즈", "문제", "need"],
+}
+_CUE_SLOT = {cue: slot for slot, cues in SLOT_CUES.items() for cue in cues}
+_CUES_RE = re.compile("|".join(re.escape(c) for c in sorted(_CUE_SLOT, key=len, reverse=True)))
+
+def infer_slots(question: str) -> list[str]:
+    """질문이 묻는 슬롯들을 질문에 나온 순서대로(중복 없이). 단서가 없으면 []."""
+    out: dict[str, None] = {}
+    for m in _CUES_RE.finditer((question or "").lower()):
+        out.setdefault(_CUE_SLOT[m.group()])
+    return list(out)
+
 def infer_slot(question: str) -> str:
-    q = (question or "").lower()
-    if ("국가" in question) or ("지역" in question) or ("country" in q) or ("region" in q):
-        return "country"
-    if ("카테고리" in question) or ("선크림" in question) or ("선스틱" in question) or ("category" in q):
-        return "category"
-    if ("가격" in question) or ("price" in q) or ("만원" in question):
-        return "price"
-    if ("채널" in question) or ("유통" in question) or ("amazon" in q) or ("올리브영" in question) or ("channel" in q):
-        return "channel"
-    if ("타겟" in question) or ("고객" in question) or ("target" in q):
-        return "target"
-    if ("니즈" in question) or ("문제" in question) or ("need" in q):
-        return "need"
-    return "misc"
+    """질문이 묻는 첫 슬롯(없으면 "misc")."""
+    slots = infer_slots(question)
+    return slots[0] if slots else "misc"
 
 def has_required_slots(slots: dict) -> bool:
     return all(slots.get(k) for k in REQUIRED_SLOTS)
 
+# 슬롯별 질문 문구(BRIEF 중 로컬 질문 생성용). REQUIRED_SLOTS 순서 = 질문 우선순위(국가 먼저)
+SLOT_QUESTIONS = {
+    "country": "어느 국가/지역",
+    "category": "카테고리(선크림/선스틱 등)",
+    "target": "타겟 고객(예: 20~30대 여성)",
+    "need": "핵심 니즈(예: 민감 진정, 백탁 적음)",
+    "price": "가격대(예: 2~3만원대)",
+    "channel": "판매 채널(예: 아마존, 올리브영글로벌)",
+}
+
+def missing_slots(slots: dict) -> list[str]:
+    return [k for k in REQUIRED_SLOTS if not slots.get(k)]
+
+def plan_question(slots: dict, max_slots: int = 3) -> tuple[str, list[str]]:
+    """
+    SYSTEM 규칙과 같은 방식으로 질문을 만든다:
+    누락 슬롯을 계산하고 그 중 앞의 2~3개를 한 문장으로 묶어서 묻는다.
+    반환: (질문, 질문에 포함된 슬롯 목록). 누락이 없으면 ("", []).
+    """
+    bundle = missing_slots(slots)[:max(1, max_slots)]
+    if not bundle:
+        return "", []
+    return ", ".join(SLOT_QUESTIONS[k] for k in bundle) + " 알려줘.", bundle
+
 def render_launch_brief(slots: dict) -> str:
     country = slots.get("country", "N/A")
     category = slots.get("category", "N/A")
@@ -44,66 +76,186 @@ def render_launch_brief(slots: dict) -> str:
         f"- Next Action (1개): {next_action}\n"
     )
 
+# --- 슬롯 lexicon (extract_slots_from_text용) ---
+# 슬롯마다 [(값, [키워드...])]. 리스트 순서 = 우선순위(country/category는 첫 값만, channel/need는 이 순서로 나열).
+# 키워드는 소문자로 쓴다(소문자로 바꾼 텍스트에서 찾음).
+SLOT_LEXICON: dict[str, list[tuple[str, list[str]]]] = {
+    "country": [
+        ("미국", ["미국", "usa", "u.s", "united states"]),
+        ("일본", ["일본", "japan"]),
+        ("동남아", ["동남아"]),
+    ],
+    "category": [
+        ("선크림", ["선크림"]),
+        ("선스틱", ["선스틱"]),
+        ("선케어", ["선케어"]),
+    ],
+    "channel": [
+        ("아마존", ["아마존", "amazon"]),
+        ("올리브영", ["올리브영", "olive young", "올영"]),
+        ("큐텐", ["qoo10", "큐텐"]),
+    ],
+    "need": [(k, [k]) for k in ["민감", "진정", "백탁", "보습", "유분", "트러블", "톤업", "끈적", "가벼움"]],
+    # 다른 슬롯 값을 꾸미는 보조 키워드
+    "_global": [("글로벌", ["글로벌", "global"])],
+    "_age": [("20대", ["20대"]), ("30대", ["30대"])],
+    "_gender": [("여성", ["여성"]), ("남성", ["남성"])],
+}
+
+_PRICE_RANGE = re.compile(r'(\d+)\s*~\s*(\d+)\s*만원대')
+_PRICE_ONE = re.compile(r'(\d+)\s*만원대')
+_TARGET_RANGE = re.compile(r'(\d+)\s*~\s*(\d+)\s*대\s*(여성|남성)?')
+
+
+class SlotMatcher:
+    """
+    SLOT_LEXICON 키워드를 정규식 하나(리터럴 alternation)로 묶어서 텍스트를 한 번 훑는다.
+    가격/나이 패턴은 모두 "대"로 끝나므로 텍스트에 "대"가 있을 때만 따로 본다.
+    매치 다음 검색을 끝 위치가 아니라 시작+1에서 이어가므로 겹치는 매치(예: "동남아마존")도 놓치지 않는다.
+    키워드별 (슬롯, 값) 비트마스크를 미리 만들어 두고 매치마다 OR만 한다.
+    """
+
+    def __init__(self, lexicon: dict[str, list[tuple[str, list[str]]]] = SLOT_LEXICON):
+        self.lexicon = lexicon
+        self._bits: dict[tuple[str, str], int] = {}
+        self._term_hits: dict[str, list[tuple[str, str]]] = {}
+        for slot, entries in lexicon.items():
+            for value, terms in entries:
+                self._bits.setdefault((slot, value), 1 << len(self._bits))
+                for term in terms:
+                    self._term_hits.setdefault(term.lower(), []).append((slot, value))
+        self._term_mask = {
+            term: sum({self._bits[h] for h in hits}) for term, hits in self._term_hits.items()
+        }
+        # 슬롯별 (값, 비트) — lexicon 순서 = 우선순위/나열 순서
+        self._values = {
+            slot: [(value, self._bits[(slot, value)]) for value, _ in entries]
+            for slot, entries in lexicon.items()
+        }
+        # 긴 키워드 먼저(같은 위치에서 짧은 키워드가 긴 키워드를 가리지 않게)
+        terms = sorted(self._term_hits, key=len, reverse=True)
+        self._terms_re = re.compile("|".join(re.escape(t) for t in terms))
+        # hits()용. extract()는 패턴별 첫 매치만 필요해서 개별 정규식이 더 빠르다
+        self._num_re = re.compile(
+            "(?P<price_range>" + _PRICE_RANGE.pattern + ")"
+            "|(?P<price_one>" + _PRICE_ONE.pattern + ")"
+            "|(?P<target_range>" + _TARGET_RANGE.pattern + ")"
+        )
+
+    def _bit(self, slot: str, value: str) -> int:
+        return self._bits.get((slot, value), 0)
+
+    def hits(self, text: str) -> list[tuple[str, str, int]]:
+        """(슬롯, 값, 위치) 목록. 가격/나이 패턴은 슬롯 "price_range"/"price_one"/"target_range"에 매치 원문이 값."""
+        tl = (text or "").lower()
+        out = []
+        search = self._terms_re.search
+        m = search(tl)
+        while m:
+            out.extend((slot, value, m.start()) for slot, value in self._term_hits[m.group()])
+            m = search(tl, m.start() + 1)
+        if "대" in tl:
+            search = self._num_re.search
+            m = search(tl)
+            while m:
+                out.append((m.lastgroup, m.group(m.lastgroup), m.start()))
+                m = search(tl, m.start() + 1)
+        return out
+
+    def extract(self, text: str) -> dict:
+        t = (text or "").strip()
+        tl = t.lower()
+
+        mask = 0
+        term_mask = self._term_mask
+        search = self._terms_re.search
+        m = search(tl)
+        while m:
+            mask |= term_mask[m.group()]
+            m = search(tl, m.start() + 1)
+
+        # 가격/나이: 텍스트에 "대"가 있을 때만, 패턴별 첫 매치 하나씩
+        pm = tm = None
+        if "대" in tl:
+            pm = _PRICE_RANGE.search(tl) or _PRICE_ONE.search(tl)
+            tm = _TARGET_RANGE.search(tl)
+
+        slots: dict[str, str] = {}
+        if mask:
+            for slot in ("country", "category"):
+                for value, bit in self._values[slot]:
+                    if mask & bit:
+                        slots[slot] = value
+                        break
+
+        # price: 범위가 어디에든 있으면 범위 우선
+        if pm is not None:
+            slots["price"] = (f'{pm.group(1)}~{pm.group(2)}만원대' if pm.re is _PRICE_RANGE
+                              else f'{pm.group(1)}만원대')
+
+        if not mask and tm is None:
+            return slots
+
+        chans = []
+        for value, bit in self._values["channel"]:
+            if mask & bit:
+                if value == "올리브영" and mask & self._bit("_global", "글로벌"):
+                    value = "올리브영글로벌"
+                chans.append(value)
+        if chans:
+            slots["channel"] = " + ".join(dict.fromkeys(chans))
+
+        if tm is not None:
+            age = f"{tm.group(1)}~{tm.group(2)}대"
+            gender = (tm.group(3) or "").strip()
+            slots["target"] = (age + (" " + gender if gender else "")).strip()
+        elif mask & self._bit("_age", "20대") and mask & self._bit("_age", "30대"):
+            g = "여성" if mask & self._bit("_gender", "여성") else ("남성" if mask & self._bit("_gender", "남성") else "")
+            slots["target"] = (("20~30대") + (" " + g if g else "")).strip()
+
+        need_keys = [value for value, bit in self._values["need"] if mask & bit]
+        if need_keys:
+            slots["need"] = " / ".join(dict.fromkeys(need_keys))
+
+        return slots
+
+
+_slot_matcher = SlotMatcher()
+
+
 def extract_slots_from_text(text: str) -> dict:
-    t = (text or "").strip()
-    tl = t.lower()
-    slots: dict[str, str] = {}
-
-    # country
-    if "미국" in t or "usa" in tl or "u.s" in tl or "united states" in tl:
-        slots["country"] = "미국"
-    elif "일본" in t or "japan" in tl:
-        slots["country"] = "일본"
-    elif "동남아" in t:
-        slots["country"] = "동남아"
-
-    # category
-    if "선크림" in t:
-        slots["category"] = "선크림"
-    elif "선스틱" in t:
-        slots["category"] = "선스틱"
-    elif "선케어" in t:
-        slots["category"] = "선케어"
-
-    # price
-    m = re.search(r'(\d+)\s*~\s*(\d+)\s*만원대', t)
-    if m:
-        slots["price"] = f'{m.group(1)}~{m.group(2)}만원대'
-    else:
-        m2 = re.search(r'(\d+)\s*만원대', t)
-        if m2:
-            slots["price"] = f'{m2.group(1)}만원대'
-
-    # channel
-    chans = []
-    if "아마존" in t or "amazon" in tl:
-        chans.append("아마존")
-    if "올리브영" in t or "olive young" in tl or "올영" in t:
-        if "글로벌" in t or "global" in tl:
-            chans.append("올리브영글로벌")
-        else:
-            chans.append("올리브영")
-    if "qoo10" in tl or "큐텐" in t:
-        chans.append("큐텐")
-    if chans:
-        slots["channel"] = " + ".join(dict.fromkeys(chans))
-
-    # target
-    m = re.search(r'(\d+)\s*~\s*(\d+)\s*대\s*(여성|남성)?', t)
-    if m:
-        age = f"{m.group(1)}~{m.group(2)}대"
-        gender = (m.group(3) or "").strip()
-        slots["target"] = (age + (" " + gender if gender else "")).strip()
-    elif "20대" in t and "30대" in t:
-        g = "여성" if "여성" in t else ("남성" if "남성" in t else "")
-        slots["target"] = (("20~30대") + (" " + g if g else "")).strip()
-
-    # need
-    need_keys = []
-    for k in ["민감", "진정", "백탁", "보습", "유분", "트러블", "톤업", "끈적", "가벼움"]:
-        if k in t:
-            need_keys.append(k)
-    if need_keys:
-        slots["need"] = " / ".join(dict.fromkeys(need_keys))
-
-    return slots
+    """텍스트에서 슬롯 값을 뽑는다(SLOT_LEXICON + 가격/나이 패턴, 한 번의 스캔)."""
+    return _slot_matcher.extract(text)
+
+# 묶음 질문에 대한 답을 항목별로 나누는 구분자("미국, 선크림 / 20대" 등)
+_ANSWER_SPLIT = re.compile(r"\s*(?:[,\n;·]|/|\s그리고\s)\s*")
+
+def split_answer(answer: str, pending: list[str], known: dict | None = None) -> dict:
+    """
+    묶음 질문(pending 슬롯들)에 대한 답을 슬롯별로 나눈다.
+    known(이미 모은 슬롯)에 값이 있는 슬롯은 조각을 받지도, 반환값에 들어가지도 않는다
+    (LLM 질문에 이미 채운 슬롯의 단서어가 섞여 있어도 덮어쓰지 않도록).
+    1) extract_slots_from_text로 알아볼 수 있는 슬롯은 그 값으로 채운다.
+    2) 남은 슬롯은 추출에 쓰이지 않은 조각을 질문 순서대로 하나씩 받는다.
+       남은 슬롯이 하나면 남은 조각 전체, 아무것도 추출되지 않았으면 답 원문을 받는다(기존 단일 슬롯 동작).
+    조각이 모자라면 그 슬롯은 비워 둔다(다음 질문에서 다시 묻는다).
+    반환값에는 pending 밖의 자동 추출 슬롯도 들어 있다.
+    """
+    known = known or {}
+    msg = (answer or "").strip()
+    out = {k: v for k, v in extract_slots_from_text(msg).items() if not known.get(k)}
+    todo = [k for k in pending if k in REQUIRED_SLOTS and k not in out and not known.get(k)]
+    if not todo or not msg:
+        return out
+
+    parts = [p for p in _ANSWER_SPLIT.split(msg) if p]
+    left = [p for p in parts if not extract_slots_from_text(p)]
+    if len(todo) == 1:
+        if len(left) == len(parts):
+            out[todo[0]] = msg
+        elif left:
+            out[todo[0]] = ", ".join(left)
+        return out
+    for k, p in zip(todo, left):
+        out[k] = p
+    return out
@@ -9,6 +9,7 @@ function bubble(text, who="bot") {
   row.appendChild(b);
   $("chat").appendChild(row);
   $("chat").scrollTop = $("chat").scrollHeight;
+  return b;
 }
 
 async function postJSON(url, body) {
@@ -27,14 +28,57 @@ async function getJSON(url) {
   try { return JSON.parse(t); } catch { return { error: t }; }
 }
 
+// SSE(POST) 스트림 읽기: "event: x\ndata: {...}\n\n" 단위로 handlers[x](data) 호출
+async function postSSE(url, body, handlers) {
+  const r = await fetch(url, {
+    method: "POST",
+    headers: {"Content-Type":"application/json; charset=utf-8", "Accept":"text/event-stream"},
+    body: JSON.stringify(body)
+  });
+  if (!r.ok || !r.body) {
+    const t = await r.text();
+    (handlers.error || (()=>{}))({ error: t || r.statusText });
+    return;
+  }
+  const reader = r.body.getReader();
+  const dec = new TextDecoder();
+  let buf = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += dec.decode(value, { stream: true });
+    let i;
+    while ((i = buf.indexOf("\n\n")) >= 0) {
+      const block = buf.slice(0, i);
+      buf = buf.slice(i + 2);
+      let ev = "message", data = "";
+      block.split("\n").forEach(line => {
+        if (line.startsWith("event:")) ev = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      let d; try { d = JSON.parse(data); } catch { d = { text: data }; }
+      if (handlers[ev]) handlers[ev](d);
+    }
+  }
+}
+
+function streamInto(b) {
+  let text = "";
+  return {
+    route: (d) => { if (d.need_question && !text) b.textContent = "질문 준비 중…"; },
+    delta: (d) => { text += d.text || ""; b.textContent = text; $("chat").scrollTop = $("chat").scrollHeight; },
+    done: (d) => { b.textContent = d.reply || text || "(no reply)"; },
+    error: (d) => { b.textContent = "에러: " + d.error; },
+  };
+}
+
 function uid() { return $("userId").value.trim() || "test"; }
 
 async function sendChat(text) {
   if (!text) return;
   bubble(text, "me");
-  const data = await postJSON("/chat", { user_id: uid(), message: text });
-  if (data.error) bubble("에러: " + data.error, "bot");
-  else bubble(data.reply || "(no reply)", "bot");
+  const b = bubble("…", "bot");
+  await postSSE("/chat/stream", { user_id: uid(), message: text }, streamInto(b));
 }
 
 $("send").onclick = () => { const t = $("msg").value; $("msg").value=""; sendChat(t); };
@@ -51,9 +95,9 @@ $("btnHistory").onclick = async () => {
 };
 
 $("btnRadar").onclick = async () => {
-  const data = await postJSON("/radar", { user_id: uid() });
   bubble("— RADAR —", "bot");
-  bubble(data.reply || JSON.stringify(data, null, 2), "bot");
+  const b = bubble("…", "bot");
+  await postSSE("/radar/stream", { user_id: uid() }, streamInto(b));
 };
 
 $("btnPulse").onclick = async () => {
@@ -0,0 +1,12 @@
+import pytest
+
+from app import db
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """테스트마다 빈 SQLite 파일(DB_PATH)로 init_db."""
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "app.db"))
+    db.init_db()
+    yield db.get_conn()
+    db.close_all_conns()
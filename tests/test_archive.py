@@ -0,0 +1,44 @@
+import os
+
+from app import archive
+
+
+def _ts(conn, log_id, ts):
+    with conn:
+        conn.execute("UPDATE logs SET ts = ? WHERE id = ?", (ts, log_id))
+
+
+def test_out_of_order_ts_row_is_archived_not_lost(tmp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    for i in range(1, 4):
+        tmp_db.execute(
+            "INSERT INTO logs (user_id, state, message, reply) VALUES ('u1', 'CHAT', ?, '')", (f"m{i}",)
+        ).lastrowid
+    tmp_db.commit()
+    # id 1은 아직 최근, 2/3은 오래됨 -> 첫 실행은 2, 3만 옮긴다
+    _ts(tmp_db, 1, "2999-01-01 00:00:00")
+    _ts(tmp_db, 2, "2000-01-01 00:00:00")
+    _ts(tmp_db, 3, "2000-01-02 00:00:00")
+    out = archive.archive_logs(older_than_days=30)
+    assert (out["archived"], out["deleted"]) == (2, 2)
+
+    # id 1이 나중에 오래되면(watermark=3보다 작은 id) 세그먼트에 써진 뒤에만 지워져야 한다
+    _ts(tmp_db, 1, "2000-01-03 00:00:00")
+    out = archive.archive_logs(older_than_days=30)
+    assert (out["archived"], out["deleted"]) == (1, 1)
+    assert [r["message"] for r in archive.iter_archived_logs("u1")] == ["m3", "m2", "m1"]
+
+
+def test_rerun_after_crash_does_not_duplicate(tmp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    tmp_db.execute("INSERT INTO logs (user_id, state, message, reply, ts) VALUES ('u1', 'CHAT', 'm', '', '2000-01-01 00:00:00')")
+    tmp_db.commit()
+    # 세그먼트 + pending 기록 후 DELETE 전에 죽은 상황
+    os.makedirs(archive.ARCHIVE_DIR)
+    row = dict(tmp_db.execute("SELECT id, ts, user_id, state, message, reply, slots_json FROM logs").fetchone())
+    archive._append_segment("2000-01-01", [row])
+    archive._write_json_atomic(archive._path(archive._MANIFEST), {"watermark": row["id"], "pending": [row["id"]]})
+
+    out = archive.archive_logs(older_than_days=30)
+    assert (out["archived"], out["deleted"]) == (0, 1)
+    assert len(list(archive.iter_archived_logs("u1"))) == 1
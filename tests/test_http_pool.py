@@ -0,0 +1,48 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.http_pool import HTTPPool
+
+
+class _NotFound(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"nope"
+        self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _NotFound)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}/x"
+    srv.shutdown()
+
+
+def test_error_counts_match_for_request_and_stream(url):
+    pool = HTTPPool()
+    with pytest.raises(httpx.HTTPStatusError):
+        pool.get(url).raise_for_status()
+    with pytest.raises(httpx.HTTPStatusError):
+        with pool.stream("GET", url) as r:
+            r.raise_for_status()
+    with pytest.raises(ValueError):
+        with pool.stream("GET", url) as r:
+            raise ValueError("caller-side parse error")
+    for call in (lambda: pool.get("http://127.0.0.1:1/"),
+                 lambda: pool.stream("GET", "http://127.0.0.1:1/").__enter__()):
+        with pytest.raises(httpx.ConnectError):
+            call()
+    stats = pool.stats()
+    pool.close()
+    assert (stats["requests"], stats["errors"]) == (5, 2)
@@ -0,0 +1,17 @@
+import json
+
+from app.db import fetch_logs, insert_log
+from app.insights import make_alerts
+
+
+def test_alerts_endpoint_matches_row_level_alerts(tmp_db):
+    from app import main
+
+    insert_log("u1", "CHAT", "민감 진정 선크림", "", json.dumps({"need": "민감 진정"}, ensure_ascii=False))
+    insert_log("u1", "CHAT", "백탁 없는", "", json.dumps({"need": "백탁 적음"}, ensure_ascii=False))
+    insert_log("u2", "CHAT", "백탁", "", json.dumps({"need": "백탁"}, ensure_ascii=False))
+
+    out = main.alerts(user_id="u1")
+    expected = make_alerts(fetch_logs(user_id="u1", limit=50))
+    assert out["alerts_count"] == expected["alerts_count"] == 2
+    assert {a["title"] for a in out["alerts"]} == {a["title"] for a in expected["alerts"]}
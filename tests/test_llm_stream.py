@@ -0,0 +1,27 @@
+import json
+from types import SimpleNamespace
+
+from app import llm
+
+
+def test_early_stop_closes_llm_event_stream(tmp_db, monkeypatch):
+    text = json.dumps({"intent": "LAUNCH", "need_question": True, "slot": "country",
+                       "question": "어느 국가?", "reply": "x" * 200}, ensure_ascii=False)
+    state = {"closed": False}
+    held = []
+
+    def responses_stream(**kwargs):
+        def events():
+            try:
+                for i in range(0, len(text), 8):
+                    yield SimpleNamespace(type="response.output_text.delta", delta=text[i:i + 8])
+            finally:
+                state["closed"] = True
+        gen = events()
+        held.append(gen)  # 참조를 잡고 있어도(refcount로 정리되지 않아도) 닫혀야 한다
+        return gen
+
+    monkeypatch.setattr(llm.llm_clients, "responses_stream", responses_stream)
+    data = llm.route_llm("미국 선크림", [], user_id="u1")
+    assert data["question"] == "어느 국가?"
+    assert state["closed"]
@@ -0,0 +1,21 @@
+import json
+
+from tools.replay import ingest
+
+
+def test_ingest_keeps_input_ts(tmp_db, tmp_path):
+    path = tmp_path / "logs.jsonl"
+    rows = [
+        {"user_id": "u1", "message": "a", "ts": "2024-03-01T09:30:00Z"},
+        {"user_id": "u1", "message": "b", "ts": "2024-03-01T18:30:00+09:00"},
+        {"user_id": "u1", "message": "c", "ts": 1709285400},
+        {"user_id": "u1", "message": "d"},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    assert ingest(str(path), batch=2)["rows"] == 4
+
+    ts = dict(tmp_db.execute("SELECT message, ts FROM logs").fetchall())
+    assert ts["a"] == "2024-03-01 09:30:00"
+    assert ts["b"] == "2024-03-01 09:30:00"
+    assert ts["c"] == "2024-03-01 09:30:00"
+    assert ts["d"] > "2024-03-01 09:30:00"  # ts 없으면 지금
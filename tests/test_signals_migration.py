@@ -0,0 +1,64 @@
+import sqlite3
+
+from app import db
+
+# 처음 스키마의 signals (id/인덱스 없음)
+BASELINE_SIGNALS = """
+CREATE TABLE IF NOT EXISTS signals (
+    ts TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload_json TEXT
+)
+"""
+
+
+def _legacy_db(path, ddl, rows):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(ddl)
+        conn.executemany("INSERT INTO signals (ts, user_id, kind, payload_json) VALUES (?, ?, ?, ?)", rows)
+    conn.close()
+
+
+def _migrated(monkeypatch, path):
+    monkeypatch.setenv("DB_PATH", str(path))
+    db.init_db()
+    rows = db.get_conn().execute("SELECT ts, user_id, kind, payload_json FROM signals ORDER BY id").fetchall()
+    return [tuple(r) for r in rows]
+
+
+def test_baseline_rows_with_bad_ts_or_payload_are_coalesced(tmp_path, monkeypatch):
+    path = tmp_path / "app.db"
+    _legacy_db(path, BASELINE_SIGNALS, [
+        ("2024-01-01 09:00:00", "u1", "skin", '{"oil": 1}'),
+        ("2024-01-02T10:30:00Z", "u1", "skin", "{broken"),
+        ("not-a-date", "u2", "weather", ""),
+    ])
+    try:
+        rows = _migrated(monkeypatch, path)
+        assert rows[0] == ("2024-01-01 09:00:00", "u1", "skin", '{"oil": 1}')
+        assert rows[1] == ("2024-01-02 10:30:00", "u1", "skin", None)
+        ts, user_id, kind, payload = rows[2]
+        assert (user_id, kind, payload) == ("u2", "weather", None)
+        assert len(ts) == 19 and ts != "not-a-date"
+        # 옮긴 뒤 rollup이 bucket_ts NULL로 깨지지 않아야 한다
+        db.apply_signal_retention()
+    finally:
+        db.close_all_conns()
+
+
+def test_rows_without_user_or_kind_are_skipped(tmp_path, monkeypatch):
+    path = tmp_path / "app.db"
+    # 제약 없이 만들어진 더 오래된 DB
+    _legacy_db(path, "CREATE TABLE signals (ts TEXT, user_id TEXT, kind TEXT, payload_json TEXT)", [
+        (None, "u1", "skin", None),
+        ("2024-01-01 09:00:00", None, "skin", None),
+        ("2024-01-01 09:00:00", "u1", None, None),
+    ])
+    try:
+        rows = _migrated(monkeypatch, path)
+        assert len(rows) == 1
+        assert rows[0][1:] == ("u1", "skin", None) and rows[0][0]
+    finally:
+        db.close_all_conns()
@@ -0,0 +1,23 @@
+from app.slots import split_answer
+
+QUESTION = "선크림 타겟 고객과 가격대를 알려줘"
+ANSWER = "20대 여성, 2만원대"
+
+
+def test_split_answer_does_not_overwrite_known_slot():
+    known = {"category": "선크림"}
+    out = split_answer(ANSWER, ["category", "target", "price"], known=known)
+    assert out == {"target": "20대 여성", "price": "2만원대"}
+
+
+def test_question_cue_for_filled_slot_is_not_pending(tmp_db):
+    from app import main
+
+    session = main.Session(user_id="u1", state=main.State.BRIEF, slots={"category": "선크림"})
+    main._chat_apply(session, "선크림 런칭", {"final": False, "question": QUESTION})
+    assert session.pending_slots == ["target", "price"]
+
+    main._chat_local(session, ANSWER)
+    assert session.slots["category"] == "선크림"
+    assert session.slots["target"] == "20대 여성"
+    assert session.slots["price"] == "2만원대"
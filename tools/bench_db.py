@@ -0,0 +1,118 @@
+"""
+DB 벤치마크: 기존 방식(호출마다 connect + rollback journal) vs 연결 재사용(WAL).
+
+    python -m tools.bench_db --rows 5000 --threads 4 --fetches 2000
+
+각 모드마다 임시 DB 파일을 새로 만들어서
+- insert_log 처리량 (inserts/sec, 여러 스레드 동시)
+- fetch_logs 지연시간 p50/p99 (ms)
+를 출력한다.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from app import db
+
+
+def _legacy_conn(path: str) -> sqlite3.Connection:
+    # 변경 전 get_conn()과 동일: 매번 makedirs + connect, 기본 journal
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _legacy_insert(path, user_id, state, message, reply, slots_json):
+    conn = _legacy_conn(path)
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO logs (user_id, state, message, reply, slots_json) VALUES (?, ?, ?, ?, ?)",
+        (user_id, state, message, reply, slots_json),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _legacy_fetch(path, user_id, limit):
+    conn = _legacy_conn(path)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT ts, state, message, reply, slots_json FROM logs WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+        (user_id, int(limit)),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def _run(mode: str, rows: int, threads: int, fetches: int, users: int) -> dict:
+    tmp = tempfile.mkdtemp(prefix="bench_db_")
+    path = os.path.join(tmp, "app.db")
+    os.environ["DB_PATH"] = path
+    if mode == "legacy":
+        os.environ["DB_JOURNAL_MODE"] = "DELETE"
+        os.environ["DB_SYNCHRONOUS"] = "FULL"
+    else:
+        os.environ.pop("DB_JOURNAL_MODE", None)
+        os.environ.pop("DB_SYNCHRONOUS", None)
+    db.close_all_conns()
+    db.init_db()
+    db.close_all_conns()
+
+    if mode == "legacy":
+        insert = lambda *a: _legacy_insert(path, *a)
+        fetch = lambda u, n: _legacy_fetch(path, u, n)
+    else:
+        insert = db.insert_log
+        fetch = db.fetch_logs
+
+    per_thread = rows // threads
+
+    def writer(tid):
+        for i in range(per_thread):
+            insert(f"u{(tid * per_thread + i) % users}", "CHAT", f"message {i}", "reply " * 20, '{"country": "미국"}')
+
+    ts = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    insert_s = time.perf_counter() - t0
+
+    lat = []
+    for _ in range(fetches):
+        t1 = time.perf_counter()
+        fetch(f"u{random.randrange(users)}", 20)
+        lat.append((time.perf_counter() - t1) * 1000.0)
+    lat.sort()
+
+    db.close_all_conns()
+    return {
+        "mode": mode,
+        "inserts_per_sec": round(per_thread * threads / insert_s, 1),
+        "fetch_p50_ms": round(statistics.median(lat), 3),
+        "fetch_p99_ms": round(lat[int(len(lat) * 0.99) - 1], 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--fetches", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=50)
+    args = ap.parse_args()
+
+    for mode in ("legacy", "pooled"):
+        print(_run(mode, args.rows, args.threads, args.fetches, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+pulse/alerts lexicon 스코어링 벤치마크: 기존 방식 vs LexiconMatcher(정규식 하나, 문서당 한 번 스캔).
+
+    python -m tools.bench_lexicon --posts 100000
+
+기존 방식 = build_pulse_from_signals(키 x 키워드 부분 문자열 루프)
+          + build_alerts_from_signals(키 x 패턴 re.search).
+두 방식의 결과(needs/risks 상위 목록, alerts)가 같은지 먼저 확인하고(다르면 종료 코드 1),
+각각 posts/sec와 MB/sec를 출력한다.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+from app import signals as sig
+
+
+def _legacy_count_substr(signals, lex):
+    # BEGIN_SIGNALS_STABILITY_V2의 build_pulse_from_signals 안 _count_lex와 동일
+    cnt = {}
+    for s in (signals or []):
+        if not isinstance(s, dict): continue
+        hay = ((s.get("title") or "") + " " + (s.get("text") or s.get("body") or "")).lower()
+        for k, terms in (lex or {}).items():
+            for t in terms:
+                if t in hay:
+                    cnt[k] = cnt.get(k, 0) + 1
+                    break
+    return sorted(cnt.items(), key=lambda x: x[1], reverse=True)
+
+
+def _legacy_count_re(signals, lex):
+    # 원래 모듈 상단 _count_lex와 동일(패턴을 매번 re.search)
+    counts = {k: 0 for k in lex.keys()}
+    for s in (signals or []):
+        txt = ((s.get("title") or "") + " " + (s.get("text") or "")).lower()
+        for k, pats in lex.items():
+            for p in pats:
+                if re.search(p, txt):
+                    counts[k] += 1
+                    break
+    return {k: v for k, v in counts.items() if v > 0}
+
+
+def _legacy(signals) -> Dict[str, Any]:
+    risks = _legacy_count_re(signals, sig.RISK_LEX)
+    alerts = [k for k, v in sorted(risks.items(), key=lambda x: x[1], reverse=True) if v >= 4]
+    return {"needs": _legacy_count_substr(signals, sig.NEED_LEX)[:10],
+            "risks": _legacy_count_substr(signals, sig.RISK_LEX)[:10],
+            "alerts": alerts}
+
+
+def _matcher(signals) -> Dict[str, Any]:
+    pulse = sig.build_pulse_from_signals(signals)
+    alerts = [a["risk"] for a in sig.build_alerts_from_signals(signals)["alerts"]]
+    return {"needs": pulse["insights"][0]["top"], "risks": pulse["insights"][1]["top"], "alerts": alerts}
+
+
+_FILLER = ["just", "tried", "this", "sunscreen", "from", "korea", "and", "honestly", "my", "skin", "feels",
+           "the", "texture", "is", "k-beauty", "spf", "50", "review", "after", "two", "weeks", "요즘", "선크림", "후기"]
+
+
+def _synthetic(n: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    vocab = [t for lex in (sig.NEED_LEX, sig.RISK_LEX) for terms in lex.values() for t in terms]
+    vocab += [t.title() for t in vocab if t.isascii()]
+    out = []
+    for i in range(n):
+        words = rng.choices(_FILLER, k=rng.randint(10, 80)) + rng.choices(vocab, k=rng.randint(0, 5))
+        rng.shuffle(words)
+        title = " ".join(words[:8])
+        out.append({"source": "reddit", "title": title, "text": " ".join(words[8:]),
+                    "url": f"https://example.com/p/{i}"})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=100000)
+    ap.add_argument("--batch", type=int, default=100, help="signals per pulse/alerts call")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    posts = _synthetic(args.posts, args.seed)
+    batches = [posts[i:i + args.batch] for i in range(0, len(posts), args.batch)]
+    mb = sum(len((p["title"] + " " + p["text"]).encode("utf-8")) for p in posts) / 1e6
+
+    bad = [b for b in batches if _legacy(b) != _matcher(b)]
+    if bad:
+        print({"legacy": _legacy(bad[0]), "matcher": _matcher(bad[0])})
+        print({"mismatched_batches": len(bad), "batches": len(batches)})
+        sys.exit(1)
+
+    for name, fn in (("legacy", _legacy), ("matcher", _matcher)):
+        t0 = time.perf_counter()
+        for b in batches:
+            fn(b)
+        s = time.perf_counter() - t0
+        print({"mode": name, "posts": len(posts), "seconds": round(s, 3),
+               "posts_per_sec": round(len(posts) / s, 1), "mb_per_sec": round(mb / s, 2)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+슬롯 추출 벤치마크: 기존 방식(if/elif 부분 문자열 검사 + 정규식 여러 개) vs SlotMatcher(정규식 하나, 한 번 스캔).
+
+    python -m tools.bench_slots --texts 100000
+    python -m tools.bench_slots --db data/app.db          # 로그 히스토리(message + reply) 전체로
+    python -m tools.bench_slots --texts 100000 --join 20  # 20개씩 이어 붙인 긴 텍스트(대화 히스토리 크기)
+
+두 구현의 결과가 모든 텍스트에서 같은지 먼저 확인하고(다르면 예시를 찍고 종료 코드 1),
+각각 texts/sec와 MB/sec를 출력한다.
+"""
+import argparse
+import random
+import re
+import sqlite3
+import sys
+import time
+from typing import List
+
+from app.slots import SLOT_LEXICON, extract_slots_from_text
+
+
+def _legacy_extract(text: str) -> dict:
+    # 변경 전 extract_slots_from_text와 동일
+    t = (text or "").strip()
+    tl = t.lower()
+    slots: dict = {}
+
+    if "미국" in t or "usa" in tl or "u.s" in tl or "united states" in tl:
+        slots["country"] = "미국"
+    elif "일본" in t or "japan" in tl:
+        slots["country"] = "일본"
+    elif "동남아" in t:
+        slots["country"] = "동남아"
+
+    if "선크림" in t:
+        slots["category"] = "선크림"
+    elif "선스틱" in t:
+        slots["category"] = "선스틱"
+    elif "선케어" in t:
+        slots["category"] = "선케어"
+
+    m = re.search(r'(\d+)\s*~\s*(\d+)\s*만원대', t)
+    if m:
+        slots["price"] = f'{m.group(1)}~{m.group(2)}만원대'
+    else:
+        m2 = re.search(r'(\d+)\s*만원대', t)
+        if m2:
+            slots["price"] = f'{m2.group(1)}만원대'
+
+    chans = []
+    if "아마존" in t or "amazon" in tl:
+        chans.append("아마존")
+    if "올리브영" in t or "olive young" in tl or "올영" in t:
+        if "글로벌" in t or "global" in tl:
+            chans.append("올리브영글로벌")
+        else:
+            chans.append("올리브영")
+    if "qoo10" in tl or "큐텐" in t:
+        chans.append("큐텐")
+    if chans:
+        slots["channel"] = " + ".join(dict.fromkeys(chans))
+
+    m = re.search(r'(\d+)\s*~\s*(\d+)\s*대\s*(여성|남성)?', t)
+    if m:
+        age = f"{m.group(1)}~{m.group(2)}대"
+        gender = (m.group(3) or "").strip()
+        slots["target"] = (age + (" " + gender if gender else "")).strip()
+    elif "20대" in t and "30대" in t:
+        g = "여성" if "여성" in t else ("남성" if "남성" in t else "")
+        slots["target"] = (("20~30대") + (" " + g if g else "")).strip()
+
+    need_keys = []
+    for k in ["민감", "진정", "백탁", "보습", "유분", "트러블", "톤업", "끈적", "가벼움"]:
+        if k in t:
+            need_keys.append(k)
+    if need_keys:
+        slots["need"] = " / ".join(dict.fromkeys(need_keys))
+
+    return slots
+
+
+_FILLER = ["요즘", "고민", "중인데", "제품", "리뷰", "보면", "괜찮은", "느낌", "sunscreen", "texture",
+           "좋아", "어때", "그리고", "launch", "brand", "최근", "반응", "많이"]
+_EXTRA = ["USA", "U.S.", "United States", "Olive Young Global", "QOO10", "2 ~ 3 만원대", "1~2대 남성",
+          "10~20대", "120대", "20만원대", "2030대", "20~30대여성", "3만원대 또는 1~2만원대"]
+
+
+def _synthetic(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocab = [t for entries in SLOT_LEXICON.values() for _, terms in entries for t in terms]
+    vocab += [t.upper() for t in vocab if t.isascii()] + _EXTRA
+    out = []
+    for _ in range(n):
+        words = rng.choices(_FILLER, k=rng.randint(3, 25)) + rng.choices(vocab, k=rng.randint(0, 6))
+        rng.shuffle(words)
+        # 공백 없이 붙은 경우도 섞는다(부분 문자열 매칭 확인)
+        out.append("".join(w + (" " if rng.random() < 0.8 else "") for w in words))
+    return out
+
+
+def _from_db(path: str) -> List[str]:
+    conn = sqlite3.connect(path)
+    try:
+        out = []
+        for message, reply in conn.execute("SELECT message, reply FROM logs"):
+            out.extend(x for x in (message, reply) if x)
+        return out
+    finally:
+        conn.close()
+
+
+def _time(fn, texts: List[str]) -> float:
+    t0 = time.perf_counter()
+    for t in texts:
+        fn(t)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--texts", type=int, default=100000, help="synthetic text count (ignored with --db)")
+    ap.add_argument("--db", help="read logs.message/reply from this SQLite file instead")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--join", type=int, default=1, help="concatenate every N texts into one")
+    args = ap.parse_args()
+
+    texts = _from_db(args.db) if args.db else _synthetic(args.texts, args.seed)
+    if args.join > 1:
+        texts = ["\n".join(texts[i:i + args.join]) for i in range(0, len(texts), args.join)]
+    mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+
+    bad = [t for t in texts if _legacy_extract(t) != extract_slots_from_text(t)]
+    if bad:
+        for t in bad[:5]:
+            print({"text": t, "legacy": _legacy_extract(t), "matcher": extract_slots_from_text(t)})
+        print({"mismatches": len(bad), "texts": len(texts)})
+        sys.exit(1)
+
+    for name, fn in (("legacy", _legacy_extract), ("matcher", extract_slots_from_text)):
+        s = _time(fn, texts)
+        print({"mode": name, "texts": len(texts), "seconds": round(s, 3),
+               "texts_per_sec": round(len(texts) / s, 1), "mb_per_sec": round(mb / s, 2)})
+
+
+if __name__ == "__main__":
+    main()
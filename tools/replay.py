@@ -0,0 +1,220 @@
+"""
+대량 ingest / replay 도구 (벤치마크용 DB 시드).
+
+    # 로그 행을 그대로 적재: {"user_id", "message", "reply"?, "state"?, "slots"? | "slots_json"?, "ts"?}
+    # ts가 있으면 그 시각으로(ISO 8601 / "YYYY-MM-DD HH:MM:SS" / unix 초, 시간대 없으면 UTC), 없으면 지금
+    python -m tools.replay ingest logs.jsonl --batch 5000
+
+    # 대화를 /chat 상태머신에 흘려보내기(LLM은 fake 백엔드): {"user_id", "message"}
+    # 사용자별 순서는 지키고 사용자끼리는 --concurrency개 스레드로 동시에
+    # 입력은 읽으면서 바로 흘려보낸다(사용자별 대기열은 --queue개까지, 차면 읽기를 멈춘다)
+    LLM_FAKE_LATENCY_MS=800 LLM_FAKE_ERROR_RATE=0.02 python -m tools.replay replay conversations.jsonl --concurrency 16
+
+파일 대신 "-"를 주면 stdin에서 읽는다. 끝나면 rows/sec를 출력한다.
+DB 위치는 평소처럼 DB_PATH 환경변수.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig")
+    try:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                d = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(d, dict):
+                yield d
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _log_ts(value: Any) -> Optional[str]:
+    """입력 ts(ISO 8601 / "YYYY-MM-DD HH:MM:SS" / unix 초) -> logs.ts 형식(UTC). 없거나 못 읽으면 None(지금)."""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).isdigit():
+            dt = datetime.fromtimestamp(float(value), tz=timezone.utc)
+        else:
+            dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _log_row(d: Dict[str, Any]) -> tuple:
+    slots_json = d.get("slots_json")
+    if slots_json is None and d.get("slots"):
+        slots_json = json.dumps(d["slots"], ensure_ascii=False)
+    return (
+        str(d.get("user_id") or "replay"),
+        d.get("state") or "CHAT",
+        d.get("message") or "",
+        d.get("reply") or "",
+        slots_json,
+        _log_ts(d.get("ts")),
+    )
+
+
+def ingest(path: str, batch: int) -> Dict[str, Any]:
+    """JSONL 행을 batch개씩 한 트랜잭션으로 insert_logs. user_id가 GLOBAL_SCOPE("*")인 행은 건너뛴다."""
+    from app.db import GLOBAL_SCOPE, init_db, insert_logs
+
+    init_db()
+    rows = 0
+    skipped = 0
+    buf = []
+    t0 = time.perf_counter()
+    for d in _iter_jsonl(path):
+        row = _log_row(d)
+        if row[0] == GLOBAL_SCOPE:
+            skipped += 1
+            continue
+        buf.append(row)
+        if len(buf) >= batch:
+            rows += insert_logs(buf)
+            buf = []
+    rows += insert_logs(buf)
+    dt = time.perf_counter() - t0
+    return {"mode": "ingest", "rows": rows, "skipped": skipped, "seconds": round(dt, 3), "rows_per_sec": round(rows / dt, 1) if dt else None}
+
+
+def _pct(xs: List[float], p: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(len(xs) * p))], 2)
+
+
+def replay(path: str, backend: str = "fake", concurrency: int = 1, per_user_queue: int = 32) -> Dict[str, Any]:
+    """
+    대화 메시지를 in-process로 chat()에 넣는다(LLM 호출은 llm_clients의 backend로).
+    로그는 write-behind writer로 배치 저장.
+    파일을 다 읽어 두지 않고 한 줄씩 사용자별 대기열에 넣는다. 대기열이 있는 사용자는
+    워커 하나가 순서대로 비우고, 비면 대기열을 지운다. 사용자 대기열이 per_user_queue개로 차거나
+    대기열을 가진 사용자가 concurrency*2명이면 읽기를 멈추므로 메모리는 입력 크기와 무관하다.
+    """
+    from app import main
+    from app.llm_client import llm_clients
+    from app.logwriter import start_log_writer, stop_log_writer, log_writer
+
+    llm_clients.use_backend(backend)
+    workers = max(1, concurrency)
+    per_user_queue = max(1, per_user_queue)
+
+    lock = threading.Lock()
+    states: Counter = Counter()
+    errors: Counter = Counter()
+    latencies: List[float] = []
+    seen = set()
+
+    cond = threading.Condition()
+    pending: Dict[str, Deque[str]] = {}  # 워커가 잡힌 사용자 -> 남은 메시지
+    user_slots = threading.BoundedSemaphore(workers * 2)
+
+    def next_message(user_id: str):
+        with cond:
+            q = pending[user_id]
+            if not q:
+                del pending[user_id]
+                cond.notify_all()
+                return None
+            message = q.popleft()
+            cond.notify_all()
+            return message
+
+    def run_user(user_id: str) -> None:
+        try:
+            while True:
+                message = next_message(user_id)
+                if message is None:
+                    return
+                t = time.perf_counter()
+                try:
+                    out = main.chat(main.ChatIn(user_id=user_id, message=message))
+                    key, bucket = out.state, states
+                except Exception as e:
+                    key, bucket = type(e).__name__, errors
+                ms = (time.perf_counter() - t) * 1000.0
+                with lock:
+                    bucket[key] += 1
+                    latencies.append(ms)
+        finally:
+            user_slots.release()
+
+    start_log_writer()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for d in _iter_jsonl(path):
+            user_id = str(d.get("user_id") or "replay")
+            message = str(d.get("message") or "")
+            seen.add(user_id)
+            with cond:
+                # 이미 워커가 잡힌 사용자면 그 대기열 뒤에(가득 차면 빌 때까지 대기)
+                while user_id in pending and len(pending[user_id]) >= per_user_queue:
+                    cond.wait()
+                if user_id in pending:
+                    pending[user_id].append(message)
+                    continue
+            user_slots.acquire()
+            with cond:
+                pending[user_id] = deque([message])
+            ex.submit(run_user, user_id)
+    stop_log_writer()  # 남은 로그까지 저장
+    dt = time.perf_counter() - t0
+    turns = len(latencies)
+    return {
+        "mode": "replay",
+        "backend": backend,
+        "concurrency": concurrency,
+        "users": len(seen),
+        "turns": turns,
+        "errors": dict(errors),
+        "states": dict(states),
+        "latency_ms": {"p50": _pct(latencies, 0.50), "p95": _pct(latencies, 0.95), "p99": _pct(latencies, 0.99)},
+        "llm": llm_clients.stats(),
+        "rows_written": log_writer.written,
+        "rows_dropped": log_writer.dropped,
+        "seconds": round(dt, 3),
+        "turns_per_sec": round(turns / dt, 1) if dt else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk ingest / replay chat logs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest", help="insert log rows in batched transactions")
+    p.add_argument("path")
+    p.add_argument("--batch", type=int, default=5000)
+    p = sub.add_parser("replay", help="drive the /chat state machine in-process (fake LLM backend by default)")
+    p.add_argument("path")
+    p.add_argument("--backend", default="fake")
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--queue", type=int, default=32, help="max buffered messages per user")
+    args = ap.parse_args()
+
+    if args.cmd == "ingest":
+        out = ingest(args.path, args.batch)
+    else:
+        out = replay(args.path, args.backend, args.concurrency, args.queue)
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()